@@ -14,13 +14,17 @@ FIGURES_DIR = RESULTS_DIR / "figures"
 
 # Select a profile to populate all experiment parameters.
 # FAST_DEBUG keeps runs short for interactive debugging.
-# FULL_BENCH scales until timeouts and success rates begin to degrade.
+# FULL_BENCH runs larger fixed grids; experiment_scaling searches for the N at
+# which timeouts and success rates begin to degrade.
 PROFILE = "FULL_BENCH"
 
 PROFILE_SETTINGS = {
     "FAST_DEBUG": {
         "CP_NS": [4, 8],
         "CP_TIMEOUTS": [3],
+        "CP_JOBS": 1,
+        "NATIVE_NS": [8, 1_000, 100_000],
+        "COUNT_NS": [4, 6, 8],
         "QUBO_NS": [4],
         "QUBO_TIMEOUTS": [1.0],
         "QUBO_RUNS_PER_CONFIG": 1,
@@ -31,6 +35,9 @@ PROFILE_SETTINGS = {
     "FULL_BENCH": {
         "CP_NS": [4, 8, 12, 16],
         "CP_TIMEOUTS": [5, 15],
+        "CP_JOBS": 4,
+        "NATIVE_NS": [8, 1_000, 100_000, 1_000_000, 4_000_000],
+        "COUNT_NS": list(range(4, 15)),
         "QUBO_NS": [4, 8, 12],
         "QUBO_TIMEOUTS": [1.0, 3.0],
         "QUBO_RUNS_PER_CONFIG": 3,
@@ -47,6 +54,9 @@ _profile = PROFILE_SETTINGS[PROFILE]
 # Constraint Programming settings
 CP_NS = _profile["CP_NS"]
 CP_TIMEOUTS = _profile["CP_TIMEOUTS"]  # seconds
+CP_JOBS = _profile["CP_JOBS"]  # parallel MiniZinc workers (1 = serial)
+CP_PIN_CPUS = False  # bind each worker to one CPU so concurrent solvers do not share cores
+CP_EXECUTOR = "process"  # "process" (worker pool) or "async" (CP_JOBS asyncio subprocesses)
 CP_MODELS = {
     "classic": ROOT / "models" / "queens_classic.mzn",
     "pb": ROOT / "models" / "queens_pb.mzn",
@@ -63,14 +73,114 @@ QUBO_PENALTIES = _profile["QUBO_PENALTIES"]
 AMPLIFY_NUM_SAMPLES = 20
 AMPLIFY_TOKEN_ENV = "AMPLIFY_TOKEN"
 
+# QUBO backend: "amplify" (remote Fixstars AE), "local_sa" (in-process annealer)
+# or "local_pt" (in-process parallel tempering)
+QUBO_BACKEND = "amplify"
+LOCAL_SA_NUM_REPLICAS = AMPLIFY_NUM_SAMPLES
+LOCAL_SA_NUM_SWEEPS = 1000  # used when no timeout is given
+LOCAL_SA_BETA_RANGE = (0.1, 10.0)  # inverse temperatures at start/end of the schedule
+# Parallel tempering ("local_pt"): independent chains, one per worker process
+PT_NUM_CHAINS = 4
+PT_JOBS = 4
+PT_NUM_TEMPERATURES = 16  # replicas per chain, geometrically spaced over PT_BETA_RANGE
+PT_BETA_RANGE = (0.05, 5.0)
+PT_EXCHANGE_INTERVAL = 1  # sweeps between replica-exchange rounds
+PT_NUM_SWEEPS = 1000  # used when no timeout is given
+PT_TARGET_ENERGY = 0.0  # valid placements have zero penalty; None runs the full budget
+# Penalty tuning (experiment_tuning): successive halving over log-uniform penalty draws
+TUNING_NUM_CONFIGS = 16  # includes the QUBO_PENALTIES grid
+TUNING_PENALTY_RANGE = (0.25, 8.0)  # bounds for each of row/col/diag
+TUNING_ETA = 2  # keep the best 1/eta settings per rung; survivors run eta times as often
+TUNING_MIN_RUNS = 1  # runs per setting on the first rung
+TUNING_TIMEOUT = QUBO_TIMEOUTS[0]
+
+# QUBO encoding: "grid" (one-hot board), "permutation" (one-hot rows, pairwise columns)
+# or "domain_wall" (N - 1 bits per row); see src/qubo/encodings.py. None has fewer
+# couplings than "grid" (permutation has the same, domain_wall more)
+QUBO_ENCODING = "grid"
+# Amplify requests kept in flight by experiment_qubo (1 = submit and wait one at a time)
+QUBO_CONCURRENCY = 1
+# Local stand-in service ("amplify_local" backend): concurrent jobs and round-trip latency
+QUBO_MOCK_CAPACITY = 2
+QUBO_MOCK_LATENCY_S = 0.2
+
+# Built QUBO models: in-memory LRU size and on-disk structure store (None disables it)
+QUBO_CACHE_SIZE = 32
+QUBO_CACHE_DIR = RESULTS_DIR / "cache" / "qubo"
+
 # Paths for binaries
 MINIZINC_BINARY = "minizinc"
+MINIZINC_SOLVER = None  # None uses MiniZinc's default solver
+MINIZINC_STATISTICS = True  # request --statistics and record nodes/failures/times per run
+# Flatten each (model, N, solver) once and reuse the .fzn/.ozn pair across runs
+MINIZINC_FZN_CACHE = True
+FZN_CACHE_DIR = RESULTS_DIR / "cache" / "fzn"
+# In-process constructive + min-conflicts backend, run by experiment_cp next to MiniZinc
+NATIVE_NS = _profile["NATIVE_NS"]
+NATIVE_START = "constructive"  # or "greedy": a randomized start repaired by min-conflicts
+NATIVE_MAX_STEPS = None  # cap on repair swaps (None: until solved or timed out)
+# Exhaustive bitboard counting; MiniZinc all-solutions runs cross-check N up to the limit
+COUNT_NS = _profile["COUNT_NS"]
+COUNT_CROSS_CHECK_MAX_N = 10
+COUNT_CROSS_CHECK_TIMEOUT = 60
+# Seconds a cancelled/timed-out solver gets after SIGTERM before it is killed
+MINIZINC_KILL_GRACE_S = 1.0
+# Also pass the remaining time as --time-limit, so the solver stops itself and still prints
+# its statistics; its process group is only stopped this many seconds after that limit
+MINIZINC_SOLVER_TIME_LIMIT = True
+MINIZINC_TIME_LIMIT_SLACK_S = 1.0
+# Portfolio racing: every CP model runs under each solver id (None = MiniZinc's default)
+PORTFOLIO_SOLVERS = [None]
+PORTFOLIO_TIMEOUT = max(CP_TIMEOUTS)
+
+# Adaptive N scaling (experiment_scaling): N grows by SCALING_GROWTH from
+# SCALING_START_N until it fails, then the pass/fail interval is bisected. All
+# models and solvers share SCALING_BUDGET_S seconds of wall-clock time.
+SCALING_BUDGET_S = 1800
+SCALING_START_N = 4
+SCALING_GROWTH = 2.0
+SCALING_RESOLUTION = 0.05  # stop bisecting once the interval is within 5% of N (or 1)
+SCALING_MIN_SUCCESS_RATE = 1.0  # share of runs at an N that must be valid for it to pass
+SCALING_MAX_N = 10_000_000
+SCALING_QUBO_MAX_N = 256  # QUBO models grow as N^3 couplings; building them is not timed out
+SCALING_CP_TIMEOUT = max(CP_TIMEOUTS)
+SCALING_QUBO_TIMEOUT = max(QUBO_TIMEOUTS)
+SCALING_QUBO_RUNS = QUBO_RUNS_PER_CONFIG  # runs per N; CP and native solvers run once
+SCALING_RUN_OVERHEAD_S = 2.0  # beyond the timeout, for a run's worst case against the budget
 
 # Random seeds used for experiments where applicable
 DEFAULT_SEED = 1234
 
+# Raw rows are appended as runs finish; write+fsync after this many rows
+RESULTS_FSYNC_EVERY = 1
+# Analysis keeps a typed Parquet copy of each raw CSV here, partitioned by
+# solver and N (needs pyarrow; otherwise the CSVs are parsed on every load)
+RESULTS_STORE_DIR = RESULTS_DIR / "store"
+RESULTS_STORE_ENABLED = True
+
+# Per-run phase spans are always recorded; "cprofile" also writes one .prof per
+# run to PROFILE_DIR and "tracemalloc" records the peak Python heap per run
+PHASE_PROFILE = None
+PROFILE_DIR = RESULTS_DIR / "profiles"
+
+# Benchmark suite (src/benchmarks): timing samples per case, minimum time per
+# sample, and the slowdown over the baseline reported as a regression
+BENCH_REPEAT = 5
+BENCH_MIN_TIME_S = 0.2
+BENCH_TOLERANCE = 0.25  # flag cases more than 25% slower than the baseline
+BENCH_RESULTS_DIR = RESULTS_DIR / "benchmarks"
+BENCH_LATEST_JSON = BENCH_RESULTS_DIR / "latest.json"
+BENCH_BASELINE_JSON = BENCH_RESULTS_DIR / "baseline.json"
+
 # CSV schema
 CP_RESULTS_CSV = RAW_RESULTS_DIR / "cp_results.csv"
 QUBO_RESULTS_CSV = RAW_RESULTS_DIR / "qubo_results.csv"
 AGG_CP_CSV = AGG_RESULTS_DIR / "cp_aggregated.csv"
 AGG_QUBO_CSV = AGG_RESULTS_DIR / "qubo_aggregated.csv"
+PORTFOLIO_RESULTS_CSV = RAW_RESULTS_DIR / "portfolio_results.csv"
+AGG_PORTFOLIO_CSV = AGG_RESULTS_DIR / "portfolio_wins.csv"
+COUNT_RESULTS_CSV = RAW_RESULTS_DIR / "count_results.csv"
+TUNING_RUNS_CSV = RAW_RESULTS_DIR / "tuning_runs.csv"
+AGG_TUNING_CSV = AGG_RESULTS_DIR / "tuned_penalties.csv"
+SCALING_RUNS_CSV = RAW_RESULTS_DIR / "scaling_runs.csv"
+AGG_SCALING_CSV = AGG_RESULTS_DIR / "scaling_limits.csv"
@@ -4,38 +4,75 @@ from __future__ import annotations
 import os
 import sys
 
-from config import CP_MODELS
-from src.minizinc.run_minizinc import run_minizinc
+from config import CP_JOBS, CP_MODELS
+from src.minizinc.async_minizinc import MiniZincJob, run_many_blocking
 from src.minizinc.parse_minizinc_output import parse_positions
-from src.validation.validate_solution import validate_solution
-from src.qubo.run_amplify import AmplifyRunner, AmplifyTokenMissing
+from src.minizinc.stream_minizinc import MiniZincStream
+from src.native.bitboard_count import count_solutions
+from src.native.min_conflicts import MinConflictsRunner
+from src.validation.placement import Placement
+from src.validation.validate_solution import validate_many, validate_solution
+from src.qubo.concurrent_submit import QuboJob, submit_many
+from src.qubo.encodings import ENCODINGS
+from src.qubo.local_anneal import LocalAnnealRunner
+from src.qubo.mock_amplify import LocalAmplifyRunner, LocalAmplifyService
+from src.qubo.parallel_tempering import ParallelTemperingRunner
+from src.qubo.run_amplify import AmplifyRunner, AmplifyUnavailable
 
 
 def check_cp_models() -> bool:
     ok = True
-    for model_name, model_path in CP_MODELS.items():
-        for n in (4, 8):
-            result = run_minizinc(str(model_path), {"N": n}, timeout=5)
-            try:
-                positions = parse_positions(result.stdout) if result.status == "SAT" else []
-            except ValueError:
-                positions = []
-            validity = validate_solution(positions, n)
-            success = result.status == "SAT" and validity["valid"]
-            print(
-                f"CP {model_name} N={n} status={result.status} valid={validity['valid']} "
-                f"reason={validity['reason_summary']}"
+    cases = [(model_name, n) for model_name in CP_MODELS for n in (4, 8)]
+    jobs = [MiniZincJob(str(CP_MODELS[name]), {"N": n}, timeout=5) for name, n in cases]
+    for (model_name, n), result in zip(cases, run_many_blocking(jobs, CP_JOBS)):
+        try:
+            positions = (
+                parse_positions(result.stdout, n) if result.status == "SAT" else Placement.empty()
             )
-            ok = ok and success
+        except ValueError:
+            positions = Placement.empty()
+        validity = validate_solution(positions, n)
+        success = result.status == "SAT" and validity["valid"]
+        print(
+            f"CP {model_name} N={n} status={result.status} valid={validity['valid']} "
+            f"reason={validity['reason_summary']}"
+        )
+        ok = ok and success
     return ok
 
 
+def check_streaming() -> bool:
+    # Stop an all-solutions run after three solutions; each must be a valid placement
+    stream = MiniZincStream(
+        str(CP_MODELS["classic"]), {"N": 8}, timeout=5, all_solutions=True,
+        stop_when=lambda solution: solution.index >= 2,
+    )
+    placements = [solution.positions() for solution in stream]
+    all_valid = all(validate_solution(positions, 8)["valid"] for positions in placements)
+    print(
+        f"CP stream N=8 status={stream.status} solutions={stream.num_solutions} "
+        f"first_solution={stream.first_solution_time} valid={all_valid}"
+    )
+    return stream.status == "SAT" and len(placements) == 3 and all_valid
+
+
 def check_validator() -> bool:
     invalid = [(1, 1), (1, 2), (2, 2), (3, 3)]
     validity = validate_solution(invalid, 4)
     detected = not validity["valid"] and validity["reason_summary"] != "ok"
     print("Validator negative test reason=", validity["reason_summary"], "violations=", validity["violations"])
-    return detected
+
+    # Batch API: a valid permutation, a diagonal clash and the invalid placement above
+    batch = validate_many([[2, 4, 1, 3], [1, 2, 3, 4]], 4)
+    coords = validate_many([invalid], 4)
+    batch_ok = (
+        batch.valid.tolist() == [True, False]
+        and batch.reason(1) == "diag_conflict"
+        and coords.reason(0) == validity["reason_summary"]
+        and coords.details(0)["violations"] == validity["violations"]
+    )
+    print("Batch validator reasons=", [batch.reason(0), batch.reason(1), coords.reason(0)])
+    return detected and batch_ok
 
 
 def check_qubo_behavior() -> bool:
@@ -45,8 +82,8 @@ def check_qubo_behavior() -> bool:
         return True
     try:
         runner = AmplifyRunner()
-    except AmplifyTokenMissing as exc:
-        print("QUBO skipped (AMPLIFY_TOKEN missing)", exc)
+    except AmplifyUnavailable as exc:
+        print("QUBO skipped (Amplify unavailable)", exc)
         return True
     weak_penalties = {"row": 0.5, "col": 0.5, "diag": 0.5}
     outcome = runner.solve(4, weak_penalties, timeout=1.0)
@@ -60,12 +97,89 @@ def check_qubo_behavior() -> bool:
     return outcome.num_candidates >= 0  # only fail on solver crash
 
 
+def check_local_qubo() -> bool:
+    runner = LocalAnnealRunner(num_sweeps=200)
+    outcome = runner.solve(4, {"row": 2.0, "col": 2.0, "diag": 2.0})
+    print(
+        "Local QUBO run energy=", outcome.energy,
+        "valid=", outcome.valid,
+        "candidates=", outcome.num_candidates,
+        "reason=", outcome.reason_summary,
+    )
+    if not outcome.valid:
+        return False
+
+    tempering = ParallelTemperingRunner(num_chains=2, num_sweeps=200, jobs=2)
+    outcome = tempering.solve(8, {"row": 2.0, "col": 2.0, "diag": 2.0})
+    print(
+        "Parallel tempering run energy=", outcome.energy,
+        "valid=", outcome.valid,
+        "runtime=", round(outcome.runtime, 3),
+        "reason=", outcome.reason_summary,
+    )
+    return outcome.valid
+
+
+def check_encodings() -> bool:
+    ok = True
+    penalties = {"row": 2.0, "col": 2.0, "diag": 2.0}
+    for name in ENCODINGS:
+        runner = LocalAnnealRunner(num_sweeps=200, encoding=name)
+        for n in (1, 6):
+            qubo, _ = runner.cache.sparse(n, penalties, name)
+            outcome = runner.solve(n, penalties)
+            print(
+                f"Encoding {name} N={n} variables={qubo.num_variables} "
+                f"couplings={qubo.num_couplings} valid={outcome.valid}"
+            )
+            ok = ok and outcome.valid
+    return ok
+
+
+def check_amplify_local() -> bool:
+    runner = LocalAmplifyRunner(LocalAmplifyService(capacity=2, latency=0.05))
+    jobs = [QuboJob(4, {"row": 2.0, "col": 2.0, "diag": 2.0}, timeout=0.2) for _ in range(3)]
+    outcomes = [outcome for _, outcome in submit_many(runner, jobs, concurrency=3)]
+    for outcome in outcomes:
+        print(
+            "Local Amplify run valid=", outcome.valid,
+            "queue=", round(outcome.queue_time, 3),
+            "transfer=", round(outcome.transfer_time, 3),
+            "execution=", round(outcome.execution_time, 3),
+        )
+    return all(outcome.valid for outcome in outcomes)
+
+
+def check_native() -> bool:
+    ok = True
+    for start in ("constructive", "greedy"):
+        runner = MinConflictsRunner(start=start)
+        for n in (8, 100_000):
+            result = runner.solve(n, timeout=10)
+            valid = bool(validate_many(result.placement, n).valid[0])
+            print(f"Native {start} N={n} status={result.status} valid={valid} swaps={result.steps}")
+            ok = ok and result.status == "SAT" and valid
+    return ok
+
+
+def check_counting() -> bool:
+    # 8-Queens has 92 solutions, 12 of them fundamental
+    result = count_solutions(8, jobs=2)
+    print(
+        f"Count N=8 total={result.total} unique={result.unique} "
+        f"nodes/s={result.nodes_per_sec:.0f}"
+    )
+    return result.total == 92 and result.unique == 12
+
+
 def main() -> None:
-    cp_ok = check_cp_models()
+    cp_ok = check_cp_models() and check_streaming()
     validator_ok = check_validator()
     qubo_ok = check_qubo_behavior()
+    local_qubo_ok = check_local_qubo() and check_encodings() and check_amplify_local()
+    native_ok = check_native() and check_counting()
 
-    all_ok = cp_ok and validator_ok and qubo_ok
+    all_ok = cp_ok and validator_ok and qubo_ok and local_qubo_ok and native_ok
     if not all_ok:
         sys.exit(1)
 
@@ -1,87 +1,151 @@
-"""Aggregate raw CSV experiment results."""
+"""Aggregate raw experiment results, one vectorized ``agg`` call per table."""
 from __future__ import annotations
 
+import logging
+from typing import Dict, List
+
+import numpy as np
 import pandas as pd
 
 import config
+from src.minizinc.run_minizinc import USAGE_COLUMNS
 from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PHASE_TIME_COLUMNS
+from src.utils.results_store import load_table
 
 logger = setup_logging(__name__)
 
+# Per-run cost breakdown columns of cp_results.csv, summarized as medians over all runs
+CP_COST_COLUMNS = [
+    "flatten_time_s",
+    "solve_time_s",
+    *USAGE_COLUMNS,
+    "stat_nodes",
+    "stat_failures",
+    "stat_propagations",
+    "stat_flat_time",
+    "stat_solve_time",
+    "stat_peak_depth",
+    *PHASE_TIME_COLUMNS,
+]
+
+
+def _with_successes(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Add ``<column>_success`` copies blanked on failed runs.
+
+    Plain medians and means of those copies then cover successful runs only,
+    so every statistic of a group comes out of one ``agg`` call.
+    """
+    valid = df["is_valid"].fillna(False).astype(bool)
+    return df.assign(
+        is_valid=valid, **{f"{column}_success": df[column].where(valid) for column in columns}
+    )
+
+
+def _max_solved_n(agg: pd.DataFrame, by: List[str]) -> pd.Series:
+    """Largest N at 100% success within each ``by`` group, broadcast to its rows."""
+    solved_n = agg["N"].where(agg["success_rate"] >= 1.0)
+    return solved_n.groupby([agg[column] for column in by], observed=True).transform("max")
+
 
 def aggregate_cp(df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    grouped = df.groupby(["model_name", "N"], dropna=False)
-    for (model, n), group in grouped:
-        successes = group[group["is_valid"]]
-        success_rate = len(successes) / len(group)
-        runtime_median_success = successes["runtime_s"].median() if not successes.empty else None
-        runtime_mean_success = successes["runtime_s"].mean() if not successes.empty else None
-        rows.append(
-            {
-                "model_name": model,
-                "N": n,
-                "success_rate": success_rate,
-                "runtime_median_success": runtime_median_success,
-                "runtime_mean_success": runtime_mean_success,
-            }
+    costs = [column for column in CP_COST_COLUMNS if column in df]
+    df = _with_successes(df, ["runtime_s"])
+    # Untyped frames may hold blanks or text in the cost columns
+    df = df.assign(**{column: pd.to_numeric(df[column], errors="coerce") for column in costs})
+    agg = (
+        df.groupby(["model_name", "N"], dropna=False, observed=True)
+        .agg(
+            success_rate=("is_valid", "mean"),
+            runtime_median_success=("runtime_s_success", "median"),
+            runtime_mean_success=("runtime_s_success", "mean"),
+            **{f"{column}_median": (column, "median") for column in costs},
         )
-    agg = pd.DataFrame(rows)
-
-    max_rows = []
-    for model, group in agg.groupby("model_name"):
-        solved = group[group["success_rate"] >= 1.0]
-        max_n = solved["N"].max() if not solved.empty else None
-        max_rows.append({"model_name": model, "N_max_at_100pct_success": max_n})
-    max_df = pd.DataFrame(max_rows)
-    return agg.merge(max_df, on="model_name", how="left")
+        .reset_index()
+    )
+    agg["N_max_at_100pct_success"] = _max_solved_n(agg, ["model_name"])
+    return agg
 
 
 def aggregate_qubo(df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    grouped = df.groupby(["N", "penalty_set_name", "penalty_values"], dropna=False)
-    for (n, penalty_name, penalty_values), group in grouped:
-        successes = group[group["is_valid"]]
-        success_rate = len(successes) / len(group)
-        runtime_median_success = successes["runtime_s"].median() if not successes.empty else None
-        runtime_mean_success = successes["runtime_s"].mean() if not successes.empty else None
-        energy_median = successes["energy"].median() if not successes.empty else None
-        rows.append(
-            {
-                "N": n,
-                "penalty_set_name": penalty_name,
-                "penalty_values": penalty_values,
-                "success_rate": success_rate,
-                "runtime_median_success": runtime_median_success,
-                "runtime_mean_success": runtime_mean_success,
-                "energy_median_success": energy_median,
-            }
+    # Columns missing from runs logged before encodings and timings were recorded
+    defaults = {"encoding": "grid", "num_variables": np.nan, "num_couplings": np.nan}
+    df = df.assign(**{column: value for column, value in defaults.items() if column not in df})
+    # Remote round-trip and per-phase breakdowns; absent from older CSVs
+    timing = [
+        column
+        for column in ("queue_time_s", "transfer_time_s", "execution_time_s", *PHASE_TIME_COLUMNS)
+        if column in df
+    ]
+    df = _with_successes(df, ["runtime_s", "energy"])
+    agg = (
+        df.groupby(
+            ["solver_name", "encoding", "N", "penalty_set_name", "penalty_values"],
+            dropna=False,
+            observed=True,
         )
-    agg = pd.DataFrame(rows)
-    solved = agg[agg["success_rate"] >= 1.0]
-    max_n = solved["N"].max() if not solved.empty else None
-    agg["N_max_at_100pct_success"] = max_n
+        .agg(
+            num_variables=("num_variables", "max"),
+            num_couplings=("num_couplings", "max"),
+            success_rate=("is_valid", "mean"),
+            runtime_median_success=("runtime_s_success", "median"),
+            runtime_mean_success=("runtime_s_success", "mean"),
+            energy_median_success=("energy_success", "median"),
+            **{f"{column[:-2]}_median": (column, "median") for column in timing},
+        )
+        .reset_index()
+    )
+    # Largest fully solved N per solver, so local and remote backends compare side by side
+    agg["N_max_at_100pct_success"] = _max_solved_n(agg, ["solver_name", "encoding"])
     return agg
 
 
-def run() -> None:
-    config.AGG_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+def aggregate_portfolio(df: pd.DataFrame) -> pd.DataFrame:
+    """Win counts and shares per N for each model/solver combination."""
+    races = df.groupby("N").size().rename("races")
+    won = df[df["winner_model"].notna() & (df["status"] == "SAT")]
+    agg = (
+        won.groupby(["N", "winner_model", "winner_solver"], observed=True)
+        .agg(wins=("runtime_s", "size"), runtime_median_win=("runtime_s", "median"))
+        .reset_index()
+        .join(races, on="N")
+    )
+    if agg.empty:
+        return agg
+    agg["win_share"] = agg["wins"] / agg["races"]
+    agg = agg[
+        ["N", "winner_model", "winner_solver", "races", "wins", "win_share", "runtime_median_win"]
+    ]
+    # The most frequent winner at each N is the suggested default for that board size
+    best = agg.sort_values(["N", "wins", "runtime_median_win"], ascending=[True, False, True])
+    best = best.drop_duplicates("N")[["N", "winner_model", "winner_solver"]]
+    agg = agg.merge(
+        best.rename(columns={"winner_model": "best_model", "winner_solver": "best_solver"}),
+        on="N",
+        how="left",
+    )
+    return agg
+
 
-    try:
-        cp_df = pd.read_csv(config.CP_RESULTS_CSV)
-        cp_agg = aggregate_cp(cp_df)
-        cp_agg.to_csv(config.AGG_CP_CSV, index=False)
-        logger.info("Saved CP aggregation to %s", config.AGG_CP_CSV)
-    except FileNotFoundError:
-        logger.warning("CP results file not found at %s", config.CP_RESULTS_CSV)
-
-    try:
-        qubo_df = pd.read_csv(config.QUBO_RESULTS_CSV)
-        qubo_agg = aggregate_qubo(qubo_df)
-        qubo_agg.to_csv(config.AGG_QUBO_CSV, index=False)
-        logger.info("Saved QUBO aggregation to %s", config.AGG_QUBO_CSV)
-    except FileNotFoundError:
-        logger.warning("QUBO results file not found at %s", config.QUBO_RESULTS_CSV)
+def run() -> Dict[str, pd.DataFrame]:
+    """Aggregate every raw table present; returns the aggregates by table name."""
+    config.AGG_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    aggregators = {
+        "cp": (aggregate_cp, config.AGG_CP_CSV, logging.WARNING),
+        "qubo": (aggregate_qubo, config.AGG_QUBO_CSV, logging.WARNING),
+        "portfolio": (aggregate_portfolio, config.AGG_PORTFOLIO_CSV, logging.DEBUG),
+    }
+    frames: Dict[str, pd.DataFrame] = {}
+    for table, (aggregate, path, missing_level) in aggregators.items():
+        try:
+            raw = load_table(table)
+        except FileNotFoundError as exc:
+            logger.log(missing_level, "%s", exc)
+            continue
+        frames[table] = aggregate(raw)
+        frames[table].to_csv(path, index=False)
+        logger.info("Saved %s aggregation of %d runs to %s", table, len(raw), path)
+    return frames
 
 
 if __name__ == "__main__":
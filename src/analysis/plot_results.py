@@ -1,6 +1,9 @@
 """Generate plots from aggregated experiment results."""
 from __future__ import annotations
 
+from pathlib import Path
+from typing import Dict, Optional
+
 import matplotlib.pyplot as plt
 import pandas as pd
 
@@ -19,11 +22,17 @@ def _save(fig, name: str) -> None:
     plt.close(fig)
 
 
-def plot_cp_runtime():
+def _load(path: Path, label: str) -> Optional[pd.DataFrame]:
     try:
-        df = pd.read_csv(config.AGG_CP_CSV)
+        return pd.read_csv(path)
     except FileNotFoundError:
-        logger.warning("Aggregated CP results not found at %s", config.AGG_CP_CSV)
+        logger.warning("Aggregated %s results not found at %s", label, path)
+        return None
+
+
+def plot_cp_runtime(df: Optional[pd.DataFrame] = None):
+    df = df if df is not None else _load(config.AGG_CP_CSV, "CP")
+    if df is None:
         return
     fig, ax = plt.subplots()
     for model, group in df.groupby("model_name"):
@@ -41,11 +50,9 @@ def plot_cp_runtime():
     _save(fig, "cp_runtime.png")
 
 
-def plot_qubo_success():
-    try:
-        df = pd.read_csv(config.AGG_QUBO_CSV)
-    except FileNotFoundError:
-        logger.warning("Aggregated QUBO results not found at %s", config.AGG_QUBO_CSV)
+def plot_qubo_success(df: Optional[pd.DataFrame] = None):
+    df = df if df is not None else _load(config.AGG_QUBO_CSV, "QUBO")
+    if df is None:
         return
     fig, ax = plt.subplots()
     avg = df.groupby("N")["success_rate"].mean().reset_index()
@@ -58,11 +65,9 @@ def plot_qubo_success():
     _save(fig, "qubo_success_rate.png")
 
 
-def plot_penalty_sensitivity():
-    try:
-        df = pd.read_csv(config.AGG_QUBO_CSV)
-    except FileNotFoundError:
-        logger.warning("Aggregated QUBO results not found at %s", config.AGG_QUBO_CSV)
+def plot_penalty_sensitivity(df: Optional[pd.DataFrame] = None):
+    df = df if df is not None else _load(config.AGG_QUBO_CSV, "QUBO")
+    if df is None:
         return
     fig, ax = plt.subplots()
     for penalty_name, group in df.groupby("penalty_set_name"):
@@ -81,10 +86,21 @@ def plot_penalty_sensitivity():
     _save(fig, "qubo_penalties.png")
 
 
-def run() -> None:
-    plot_cp_runtime()
-    plot_qubo_success()
-    plot_penalty_sensitivity()
+def run(frames: Optional[Dict[str, pd.DataFrame]] = None) -> None:
+    """Draw every figure, loading each aggregate once unless ``frames`` already holds it.
+
+    ``frames`` is what :func:`src.analysis.aggregate_results.run` returns.
+    """
+    frames = dict(frames or {})
+    if "cp" not in frames:
+        frames["cp"] = _load(config.AGG_CP_CSV, "CP")
+    if "qubo" not in frames:
+        frames["qubo"] = _load(config.AGG_QUBO_CSV, "QUBO")
+    if frames["cp"] is not None:
+        plot_cp_runtime(frames["cp"])
+    if frames["qubo"] is not None:
+        plot_qubo_success(frames["qubo"])
+        plot_penalty_sensitivity(frames["qubo"])
 
 
 if __name__ == "__main__":
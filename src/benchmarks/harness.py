@@ -0,0 +1,162 @@
+"""Time benchmark cases, store the timings as JSON and compare against a baseline.
+
+A case is a zero-argument callable prepared for one N. Like ``timeit``, each
+case is first auto-ranged so that one sample takes at least ``min_time``
+seconds, then sampled ``repeat`` times. The per-call minimum is compared
+because it is the least noisy statistic; medians and means are kept for
+reference.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import BENCH_MIN_TIME_S, BENCH_REPEAT, BENCH_TOLERANCE, ROOT
+
+CaseKey = Tuple[str, int]
+
+
+@dataclass
+class Timing:
+    """Seconds per call of one case at one N."""
+
+    name: str
+    n: int
+    number: int
+    repeat: int
+    min_s: float
+    median_s: float
+    mean_s: float
+
+    @property
+    def key(self) -> CaseKey:
+        return self.name, self.n
+
+
+@dataclass
+class Comparison:
+    name: str
+    n: int
+    baseline_s: Optional[float]
+    current_s: float
+    ratio: Optional[float]
+    status: str  # "regression", "faster", "ok" or "new"
+
+
+def measure(
+    name: str,
+    n: int,
+    func: Callable[[], object],
+    repeat: int = BENCH_REPEAT,
+    min_time: float = BENCH_MIN_TIME_S,
+) -> Timing:
+    """Auto-range ``func`` to ``min_time`` per sample, then take ``repeat`` samples."""
+    timer = timeit.Timer(func)
+    number, elapsed = 1, 0.0
+    # timeit's autorange with a configurable target; the first call also warms up
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)) + 1)
+    samples = np.array(timer.repeat(repeat, number)) / number
+    return Timing(
+        name=name,
+        n=n,
+        number=number,
+        repeat=repeat,
+        min_s=float(samples.min()),
+        median_s=float(np.median(samples)),
+        mean_s=float(samples.mean()),
+    )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def environment() -> Dict[str, object]:
+    """Where the timings were taken; comparisons across machines are only indicative."""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_report(
+    path: Path, timings: Sequence[Timing], skipped: Dict[str, str]
+) -> Dict[str, object]:
+    report = {
+        "environment": environment(),
+        "results": [asdict(timing) for timing in timings],
+        "skipped": skipped,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    return report
+
+
+def load_report(path: Path) -> Tuple[Dict[str, object], List[Timing]]:
+    report = json.loads(Path(path).read_text())
+    return report.get("environment", {}), [Timing(**row) for row in report["results"]]
+
+
+def compare(
+    current: Sequence[Timing], baseline: Sequence[Timing], tolerance: float = BENCH_TOLERANCE
+) -> List[Comparison]:
+    """Match cases by (name, N) and classify each by its minimum-time ratio."""
+    reference = {timing.key: timing for timing in baseline}
+    comparisons = []
+    for timing in current:
+        base = reference.get(timing.key)
+        if base is None:
+            comparisons.append(
+                Comparison(timing.name, timing.n, None, timing.min_s, None, "new")
+            )
+            continue
+        ratio = timing.min_s / base.min_s if base.min_s > 0 else float("inf")
+        if ratio > 1.0 + tolerance:
+            status = "regression"
+        elif ratio < 1.0 / (1.0 + tolerance):
+            status = "faster"
+        else:
+            status = "ok"
+        comparisons.append(
+            Comparison(timing.name, timing.n, base.min_s, timing.min_s, ratio, status)
+        )
+    return comparisons
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
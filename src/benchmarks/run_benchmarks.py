@@ -0,0 +1,266 @@
+"""Benchmark the hot paths of the solver pipeline across an N sweep.
+
+Cases cover QUBO construction, MiniZinc output parsing, validation, Amplify
+candidate decoding and an end-to-end MiniZinc run. Remote services are never
+contacted: candidate decoding replays canned candidates through
+``AmplifyRunner.solve``, and ``run_minizinc`` uses whichever ``minizinc``
+binary is on ``PATH``. Timings are written as JSON; with ``--compare`` each
+case is checked against a stored baseline and the exit status is 1 if any
+case got slower by more than ``--tolerance``.
+
+    python -m src.benchmarks.run_benchmarks --save-baseline
+    python -m src.benchmarks.run_benchmarks --compare
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import shutil
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from src.benchmarks.harness import (
+    Timing,
+    compare,
+    format_seconds,
+    load_report,
+    measure,
+    write_report,
+)
+from src.minizinc.parse_minizinc_output import SEPARATOR, parse_positions
+from src.minizinc.run_minizinc import run_minizinc
+from src.native.min_conflicts import constructive_placement
+from src.qubo.encodings import ENCODINGS
+from src.qubo.mock_amplify import LocalAmplifyClient, LocalCandidate
+from src.qubo.qubo_builders import (
+    assemble_qubo,
+    build_qubo,
+    build_qubo_matrix,
+    build_qubo_structure,
+    gen_symbols,
+    generate_mapping,
+)
+from src.qubo.qubo_cache import QuboCache
+from src.qubo.run_amplify import AmplifyRunner
+from src.validation.placement import Placement
+from src.validation.validate_solution import validate_many, validate_solution
+
+PENALTIES = {"row": 2.0, "col": 2.0, "diag": 2.0}
+
+
+@dataclass
+class Case:
+    """A benchmark: ``setup(n)`` prepares inputs and returns the callable to time."""
+
+    name: str
+    ns: Sequence[int]
+    setup: Callable[[int], Callable[[], object]]
+    unavailable: Callable[[], Optional[str]] = lambda: None
+
+
+def _minizinc_output(n: int, blocks: int = 2) -> str:
+    """``blocks`` copies of the classic model's solution text, as an all-solutions run prints."""
+    cols = constructive_placement(n)
+    pairs = ", ".join(f"({row},{col})" for row, col in enumerate(cols.tolist(), start=1))
+    block = f"positions=[{pairs}]\n{SEPARATOR}\n"
+    return block * blocks + "==========\n"
+
+
+class _ReplaySolver:
+    """Returns the same candidates on every call, so only decoding is timed."""
+
+    model_format = "sparse"
+
+    def __init__(self, candidates: List[LocalCandidate]):
+        self.client = LocalAmplifyClient()
+        self.candidates = candidates
+
+    def solve(self, qubo) -> List[LocalCandidate]:
+        return self.candidates
+
+
+def _decode_setup(n: int) -> Callable[[], object]:
+    cache = QuboCache(cache_dir=None)
+    rng = np.random.default_rng(config.DEFAULT_SEED)
+    # Replayed states use the grid layout, whatever QUBO_ENCODING is set to
+    states = rng.integers(0, 2, size=(config.AMPLIFY_NUM_SAMPLES, n * n))
+    # One valid board among random ones, as in a typical successful call
+    states[0] = 0
+    states[0, np.arange(n) * n + constructive_placement(n) - 1] = 1
+    candidates = [
+        LocalCandidate(float(k), dict(enumerate(state.tolist()))) for k, state in enumerate(states)
+    ]
+    runner = AmplifyRunner(
+        cache=cache, solver_factory=lambda: _ReplaySolver(candidates), encoding="grid"
+    )
+    runner.solve(n, PENALTIES)  # build and cache the model outside the timed call
+    return lambda: runner.solve(n, PENALTIES)
+
+
+def _structure_setup(n: int) -> Callable[[], object]:
+    return lambda: build_qubo_structure(n)
+
+
+def _assemble_setup(n: int) -> Callable[[], object]:
+    structure = build_qubo_structure(n)
+    return lambda: assemble_qubo(structure, PENALTIES)
+
+
+def _encoding_setup(name: str) -> Callable[[int], Callable[[], object]]:
+    def setup(n: int) -> Callable[[], object]:
+        structure = build_qubo_structure(n)
+        return lambda: ENCODINGS[name].build(structure, PENALTIES)
+
+    return setup
+
+
+def _parse_setup(n: int) -> Callable[[], object]:
+    output = _minizinc_output(n)
+    return lambda: parse_positions(output, n)
+
+
+def _validate_setup(n: int) -> Callable[[], object]:
+    placement = Placement.from_coords(
+        np.stack([np.arange(1, n + 1), constructive_placement(n)], axis=1), n
+    )
+    return lambda: validate_solution(placement, n)
+
+
+def _validate_many_setup(n: int) -> Callable[[], object]:
+    rng = np.random.default_rng(config.DEFAULT_SEED)
+    permutations = [rng.permutation(n) + 1 for _ in range(64)]
+    return lambda: validate_many(permutations, n)
+
+
+def _minizinc_setup(n: int) -> Callable[[], object]:
+    model_path = str(config.CP_MODELS["classic"])
+    return lambda: run_minizinc(model_path, {"N": n}, timeout=30)
+
+
+def _needs_amplify() -> Optional[str]:
+    return None if gen_symbols is not None else "Amplify SDK not installed"
+
+
+def _needs_minizinc() -> Optional[str]:
+    if shutil.which(config.MINIZINC_BINARY) is None:
+        return f"{config.MINIZINC_BINARY} not found on PATH"
+    return None
+
+
+CASES: List[Case] = [
+    Case("generate_mapping", [8, 64, 256], lambda n: lambda: generate_mapping(n)),
+    Case("qubo_structure", [8, 32, 64, 128], _structure_setup),
+    Case("qubo_assemble", [8, 32, 64, 128], _assemble_setup),
+    Case("build_qubo_matrix", [8, 32, 64, 128], lambda n: lambda: build_qubo_matrix(n, PENALTIES)),
+    *[
+        Case(f"encoding_{name}", [8, 32, 64], _encoding_setup(name))
+        for name in ENCODINGS
+        if name != "grid"  # the grid encoding is qubo_assemble
+    ],
+    Case("build_qubo", [8, 16], lambda n: lambda: build_qubo(n, PENALTIES), _needs_amplify),
+    Case("parse_positions", [1_000, 10_000, 100_000], _parse_setup),
+    Case("validate_solution", [1_000, 100_000, 1_000_000], _validate_setup),
+    Case("validate_many", [8, 64, 1_000], _validate_many_setup),
+    Case("amplify_decode", [8, 16, 32], _decode_setup),
+    Case("run_minizinc", [8, 12], _minizinc_setup, _needs_minizinc),
+]
+
+
+def run_cases(
+    cases: Sequence[Case],
+    repeat: int = config.BENCH_REPEAT,
+    min_time: float = config.BENCH_MIN_TIME_S,
+    ns: Optional[Sequence[int]] = None,
+) -> Tuple[List[Timing], Dict[str, str]]:
+    """Time every case at each of its N (or only at ``ns``); returns timings and skips."""
+    timings: List[Timing] = []
+    skipped: Dict[str, str] = {}
+    for case in cases:
+        reason = case.unavailable()
+        if reason:
+            skipped[case.name] = reason
+            print(f"{case.name:<22} skipped: {reason}")
+            continue
+        for n in case.ns if ns is None else [n for n in case.ns if n in ns]:
+            # Solver paths log every call at INFO; keep that out of the output and timings
+            logging.disable(logging.INFO)
+            try:
+                timing = measure(case.name, n, case.setup(n), repeat, min_time)
+            finally:
+                logging.disable(logging.NOTSET)
+            timings.append(timing)
+            print(
+                f"{case.name:<22} N={n:<8} {format_seconds(timing.min_s):>9} min "
+                f"{format_seconds(timing.median_s):>9} median  ({timing.number} calls x {repeat})"
+            )
+    return timings, skipped
+
+
+def report_comparison(timings: Sequence[Timing], baseline_path, tolerance: float) -> bool:
+    """Print the comparison against ``baseline_path``; False if anything regressed."""
+    try:
+        baseline_env, baseline = load_report(baseline_path)
+    except FileNotFoundError:
+        print(f"\nNo baseline at {baseline_path}; store one with --save-baseline")
+        return True
+    print(
+        f"\nCompared with {baseline_path} "
+        f"(revision {baseline_env.get('git_revision')}, {baseline_env.get('timestamp')}):"
+    )
+    regressions = 0
+    for row in compare(timings, baseline, tolerance):
+        ratio = "-" if row.ratio is None else f"{row.ratio:.2f}x"
+        print(
+            f"{row.name:<22} N={row.n:<8} {format_seconds(row.baseline_s):>9} -> "
+            f"{format_seconds(row.current_s):>9} {ratio:>7}  {row.status}"
+        )
+        regressions += row.status == "regression"
+    if regressions:
+        print(f"{regressions} case(s) slower than the baseline by more than {tolerance:.0%}")
+    return regressions == 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", help="case names to run (default: all)")
+    parser.add_argument("--ns", type=int, nargs="+", help="restrict every case to these N")
+    parser.add_argument("--repeat", type=int, default=config.BENCH_REPEAT)
+    parser.add_argument(
+        "--min-time", type=float, default=config.BENCH_MIN_TIME_S, help="seconds per sample"
+    )
+    parser.add_argument("--output", default=config.BENCH_LATEST_JSON, help="JSON report path")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=config.BENCH_BASELINE_JSON,
+        help="baseline JSON to compare with (default: BENCH_BASELINE_JSON)",
+    )
+    parser.add_argument("--tolerance", type=float, default=config.BENCH_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="also store this run as the baseline"
+    )
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.only:
+        unknown = set(args.only) - {case.name for case in CASES}
+        if unknown:
+            parser.error(f"unknown cases: {sorted(unknown)}")
+        cases = [case for case in CASES if case.name in args.only]
+
+    timings, skipped = run_cases(cases, args.repeat, args.min_time, args.ns)
+    write_report(args.output, timings, skipped)
+    print(f"\nWrote {len(timings)} timings to {args.output}")
+    if args.save_baseline:
+        write_report(config.BENCH_BASELINE_JSON, timings, skipped)
+        print(f"Stored them as the baseline in {config.BENCH_BASELINE_JSON}")
+    if args.compare and not report_comparison(timings, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Count all solutions per N with the bitboard engine and cross-check small N with MiniZinc."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import config
+from src.minizinc.stream_minizinc import MiniZincStream
+from src.native.bitboard_count import count_solutions
+from src.utils.logging_utils import setup_logging
+from src.utils.results_writer import StreamingCsvWriter
+
+logger = setup_logging(__name__)
+
+COUNT_COLUMNS = [
+    "timestamp",
+    "N",
+    "total_solutions",
+    "unique_solutions",
+    "nodes",
+    "runtime_s",
+    "nodes_per_s",
+    "jobs",
+    "minizinc_solutions",
+    "minizinc_complete",
+    "minizinc_runtime_s",
+    "counts_match",
+]
+
+
+def minizinc_count(
+    n: int, model_name: str = "classic", timeout: float = config.COUNT_CROSS_CHECK_TIMEOUT
+) -> Tuple[int, bool, float]:
+    """Solutions enumerated by a MiniZinc all-solutions run, whether it finished, and its time."""
+    stream = MiniZincStream(
+        str(config.CP_MODELS[model_name]), {"N": n}, timeout=timeout, all_solutions=True
+    )
+    for _ in stream:
+        pass
+    complete = stream.complete or stream.status == "UNSAT"
+    return stream.num_solutions, complete, stream.runtime
+
+
+def count_row(n: int, jobs: int, cross_check: bool) -> Dict[str, object]:
+    result = count_solutions(n, jobs=jobs)
+    row: Dict[str, object] = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "N": n,
+        "total_solutions": result.total,
+        "unique_solutions": result.unique,
+        "nodes": result.nodes,
+        "runtime_s": result.runtime,
+        "nodes_per_s": result.nodes_per_sec,
+        "jobs": result.jobs,
+    }
+    if cross_check:
+        solutions, complete, runtime = minizinc_count(n)
+        # An unfinished enumeration can only bound the count from below
+        match = solutions == result.total if complete else solutions <= result.total
+        if not match:
+            logger.error("N=%d: engine counted %d, MiniZinc %d", n, result.total, solutions)
+        row.update(
+            minizinc_solutions=solutions,
+            minizinc_complete=complete,
+            minizinc_runtime_s=runtime,
+            counts_match=match,
+        )
+    return row
+
+
+def run_count_experiments(
+    ns: Optional[List[int]] = None,
+    jobs: int = config.CP_JOBS,
+    cross_check_max_n: int = config.COUNT_CROSS_CHECK_MAX_N,
+) -> None:
+    ns = config.COUNT_NS if ns is None else ns
+    with StreamingCsvWriter(config.COUNT_RESULTS_CSV, COUNT_COLUMNS) as writer:
+        for n in ns:
+            writer.write(count_row(n, jobs, cross_check=n <= cross_check_max_n))
+    logger.info("Saved solution counts to %s", config.COUNT_RESULTS_CSV)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ns", type=int, nargs="+", help="board sizes (default: COUNT_NS)")
+    parser.add_argument("--jobs", type=int, default=config.CP_JOBS, help="counting processes")
+    parser.add_argument(
+        "--cross-check-max-n",
+        type=int,
+        default=config.COUNT_CROSS_CHECK_MAX_N,
+        help="compare against MiniZinc all-solutions runs up to this N (0 disables)",
+    )
+    args = parser.parse_args()
+    run_count_experiments(ns=args.ns, jobs=args.jobs, cross_check_max_n=args.cross_check_max_n)
@@ -1,60 +1,325 @@
-"""Run MiniZinc CP experiments and capture per-run rows."""
+"""Run MiniZinc CP experiments (and the native backend) and capture per-run rows."""
 from __future__ import annotations
 
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-
-import pandas as pd
+from typing import Dict, List, Optional, Tuple
 
 import config
 from src.minizinc.parse_minizinc_output import parse_positions
-from src.minizinc.run_minizinc import run_minizinc
+from src.minizinc.async_minizinc import run_minizinc_async
+from src.minizinc.run_minizinc import USAGE_COLUMNS, MiniZincResult, run_minizinc
+from src.native.min_conflicts import MinConflictsRunner
 from src.utils.logging_utils import setup_logging
-from src.validation.validate_solution import validate_solution
+from src.utils.phase_timer import PHASE_COLUMNS, PROFILE_MODES, PhaseTimer
+from src.utils.results_writer import StreamingCsvWriter, load_completed_keys
+from src.validation.placement import Placement
+from src.validation.validate_solution import validate_many
 
 logger = setup_logging(__name__)
 
+# (solver_name, model_name, model_path, N, timeout, run_id); native cells have no model path
+CpCell = Tuple[str, str, str, int, int, int]
+MINIZINC_SOLVER_NAME = "minizinc"
 
-def run_cp_experiments() -> None:
-    results = []
-    config.RAW_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+CP_COLUMNS = [
+    "timestamp",
+    "solver_name",
+    "model_name",
+    "run_id",
+    "N",
+    "timeout_s",
+    "status",
+    "runtime_s",
+    "flatten_time_s",
+    "solve_time_s",
+    "flatten_cached",
+    *USAGE_COLUMNS,
+    "stat_nodes",
+    "stat_failures",
+    "stat_propagations",
+    "stat_flat_time",
+    "stat_solve_time",
+    "stat_peak_depth",
+    "is_valid",
+    "reason_summary",
+    "num_queens",
+    "violations",
+    *PHASE_COLUMNS,
+]
+# Columns identifying a finished cell when resuming
+CP_KEY_COLUMNS = ["solver_name", "model_name", "N", "timeout_s"]
 
-    run_counter = 0
+
+def build_cp_grid(native: bool = True) -> List[CpCell]:
+    """Enumerate (solver, model, N, timeout) cells in a fixed order; the index is the run_id."""
+    cells: List[CpCell] = []
     for model_name, model_path in config.CP_MODELS.items():
         for n in config.CP_NS:
             for timeout in config.CP_TIMEOUTS:
-                logger.info("Running %s with N=%d timeout=%ss", model_name, n, timeout)
-                result = run_minizinc(str(model_path), {"N": n}, timeout=timeout)
-                timestamp = datetime.utcnow().isoformat()
-
-                try:
-                    positions = parse_positions(result.stdout) if result.status == "SAT" else []
-                except ValueError as exc:
-                    logger.error("Parsing failed: %s", exc)
-                    positions = []
-
-                validity = validate_solution(positions, n)
-                results.append(
-                    {
-                        "timestamp": timestamp,
-                        "solver_name": "minizinc",
-                        "model_name": model_name,
-                        "run_id": run_counter,
-                        "N": n,
-                        "timeout_s": timeout,
-                        "status": result.status,
-                        "runtime_s": result.runtime,
-                        "is_valid": validity["valid"],
-                        "reason_summary": validity["reason_summary"],
-                        "num_queens": len(positions),
-                        "violations": ";".join(validity["violations"]),
-                    }
+                cells.append(
+                    (MINIZINC_SOLVER_NAME, model_name, str(model_path), n, timeout, len(cells))
+                )
+    if native:
+        solver_name = MinConflictsRunner.solver_name
+        model_name = MinConflictsRunner().model_name
+        for n in config.NATIVE_NS:
+            for timeout in config.CP_TIMEOUTS:
+                cells.append((solver_name, model_name, "", n, timeout, len(cells)))
+    return cells
+
+
+def cp_row(
+    solver_name: str,
+    model_name: str,
+    n: int,
+    timeout: int,
+    run_id: int,
+    status: str,
+    runtime: float,
+    placement: Placement,
+    phases: Optional[PhaseTimer] = None,
+    **extra: object,
+) -> Dict[str, object]:
+    """Validate a placement into its CSV row."""
+    phases = phases if phases is not None else PhaseTimer(profile=None)
+    timestamp = datetime.utcnow().isoformat()
+    with phases.span("validate"):
+        validity = validate_many(placement, n)
+    violations = [] if validity.valid[0] else validity.details(0)["violations"]
+    return {
+        "timestamp": timestamp,
+        "solver_name": solver_name,
+        "model_name": model_name,
+        "run_id": run_id,
+        "N": n,
+        "timeout_s": timeout,
+        "status": status,
+        "runtime_s": runtime,
+        **extra,
+        "is_valid": bool(validity.valid[0]),
+        "reason_summary": validity.reason(0),
+        "num_queens": len(placement),
+        "violations": ";".join(violations),
+        **phases.as_row(),
+    }
+
+
+def _dump_profile(phases: PhaseTimer, solver_name: str, model_name: str, n: int, run_id: int):
+    path = phases.dump(config.PROFILE_DIR / f"cp_{solver_name}_{model_name}_N{n}_run{run_id}.prof")
+    if path is not None:
+        logger.info("Saved profile to %s", path)
+
+
+def minizinc_row(
+    model_name: str,
+    n: int,
+    timeout: int,
+    run_id: int,
+    result: MiniZincResult,
+    profile: Optional[str] = config.PHASE_PROFILE,
+) -> Dict[str, object]:
+    """Parse one MiniZinc result into its CSV row."""
+    phases = PhaseTimer(profile)
+    phases.add("build", result.flatten_time)
+    phases.add("wait", result.solve_time)
+    phases.add("decode", result.format_time)
+    # Whatever the run spent outside its subprocesses: cache lookups and process spawning
+    phases.add(
+        "submit",
+        max(0.0, result.runtime - result.flatten_time - result.solve_time - result.format_time),
+    )
+    with phases.span("decode"):
+        try:
+            positions = (
+                parse_positions(result.stdout, n) if result.status == "SAT" else Placement.empty()
+            )
+        except ValueError as exc:
+            logger.error("Parsing failed: %s", exc)
+            positions = Placement.empty()
+
+    row = cp_row(
+        MINIZINC_SOLVER_NAME,
+        model_name,
+        n,
+        timeout,
+        run_id,
+        result.status,
+        result.runtime,
+        positions,
+        phases,
+        flatten_time_s=result.flatten_time,
+        solve_time_s=result.solve_time,
+        flatten_cached=result.flatten_cached,
+        **result.usage_row(),
+        **result.statistics.as_row(),
+    )
+    _dump_profile(phases, MINIZINC_SOLVER_NAME, model_name, n, run_id)
+    return row
+
+
+def native_row(
+    n: int, timeout: int, run_id: int, profile: Optional[str] = config.PHASE_PROFILE
+) -> Dict[str, object]:
+    """Run the in-process min-conflicts backend on N and return its CSV row."""
+    runner = MinConflictsRunner()
+    phases = PhaseTimer(profile)
+    # The starting placement is the native backend's model; only the repair is solving
+    result = runner.solve(n, timeout=timeout, phases=phases)
+    with phases.span("decode"):
+        placement = result.placement if result.status == "SAT" else Placement.empty()
+    row = cp_row(
+        runner.solver_name,
+        runner.model_name,
+        n,
+        timeout,
+        run_id,
+        result.status,
+        result.runtime,
+        placement,
+        phases,
+        solve_time_s=result.repair_time,
+    )
+    _dump_profile(phases, runner.solver_name, runner.model_name, n, run_id)
+    return row
+
+
+def run_cp_cell(
+    solver_name: str,
+    model_name: str,
+    model_path: str,
+    n: int,
+    timeout: int,
+    run_id: int,
+    profile: Optional[str] = config.PHASE_PROFILE,
+) -> Dict[str, object]:
+    """Run one solver/model/N/timeout cell and return its CSV row."""
+    logger.info("Running %s %s with N=%d timeout=%ss", solver_name, model_name, n, timeout)
+    if solver_name == MinConflictsRunner.solver_name:
+        return native_row(n, timeout, run_id, profile)
+    result = run_minizinc(model_path, {"N": n}, timeout=timeout)
+    return minizinc_row(model_name, n, timeout, run_id, result, profile)
+
+
+async def _run_cells_async(
+    cells: List[CpCell], jobs: int, writer: StreamingCsvWriter, profile: Optional[str] = None
+) -> None:
+    """Run cells as asyncio subprocesses, ``jobs`` at a time, writing rows as they finish."""
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    async def run_cell(cell: CpCell):
+        solver_name, model_name, model_path, n, timeout, run_id = cell
+        async with semaphore:
+            if solver_name != MINIZINC_SOLVER_NAME:
+                # In-process backends run on a worker thread to keep the loop responsive
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, run_cp_cell, *cell, profile
                 )
-                run_counter += 1
+            logger.info("Running %s with N=%d timeout=%ss", model_name, n, timeout)
+            result = await run_minizinc_async(model_path, {"N": n}, timeout=timeout)
+        return minizinc_row(model_name, n, timeout, run_id, result, profile)
+
+    for row in asyncio.as_completed([run_cell(cell) for cell in cells]):
+        writer.write(await row)
+
+
+def _pin_worker(cpu_queue) -> None:
+    """Pool initializer: bind this worker (and the solvers it spawns) to one CPU."""
+    cpu = cpu_queue.get()
+    os.sched_setaffinity(0, {cpu})
+    logger.debug("Worker %d pinned to CPU %d", os.getpid(), cpu)
+
+
+def _make_pool(jobs: int, pin_cpus: bool) -> ProcessPoolExecutor:
+    if not pin_cpus:
+        return ProcessPoolExecutor(max_workers=jobs)
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU pinning is not supported on this platform; running unpinned")
+        return ProcessPoolExecutor(max_workers=jobs)
+
+    cpus = sorted(os.sched_getaffinity(0))
+    if jobs > len(cpus):
+        logger.warning("%d workers share %d CPUs; timings will contend", jobs, len(cpus))
+    cpu_queue = multiprocessing.Queue()
+    for worker in range(jobs):
+        cpu_queue.put(cpus[worker % len(cpus)])
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_pin_worker, initargs=(cpu_queue,))
+
+
+def run_cp_experiments(
+    jobs: int = config.CP_JOBS,
+    pin_cpus: bool = config.CP_PIN_CPUS,
+    resume: bool = False,
+    executor: str = config.CP_EXECUTOR,
+    native: bool = True,
+    profile: Optional[str] = config.PHASE_PROFILE,
+) -> None:
+    if executor not in ("process", "async"):
+        raise ValueError(f"Unknown CP executor: {executor}")
+    config.RAW_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    cells = build_cp_grid(native=native)
+    if resume:
+        done = load_completed_keys(config.CP_RESULTS_CSV, CP_KEY_COLUMNS)
+        cells = [
+            cell for cell in cells if (cell[0], cell[1], str(cell[3]), str(cell[4])) not in done
+        ]
+        logger.info("Resuming: %d finished cells skipped, %d to run", len(done), len(cells))
 
-    df = pd.DataFrame(results)
-    df.to_csv(config.CP_RESULTS_CSV, index=False)
+    with StreamingCsvWriter(config.CP_RESULTS_CSV, CP_COLUMNS, resume=resume) as writer:
+        if executor == "async":
+            logger.info("Running %d CP cells as %d concurrent subprocesses", len(cells), jobs)
+            asyncio.run(_run_cells_async(cells, jobs, writer, profile))
+        elif jobs <= 1:
+            for cell in cells:
+                writer.write(run_cp_cell(*cell, profile))
+        else:
+            logger.info("Running %d CP cells on %d workers (pinned=%s)", len(cells), jobs, pin_cpus)
+            with _make_pool(jobs, pin_cpus) as pool:
+                futures = [pool.submit(run_cp_cell, *cell, profile) for cell in cells]
+                # Rows land in completion order; run_id still identifies the grid cell
+                for future in as_completed(futures):
+                    writer.write(future.result())
     logger.info("Saved CP results to %s", config.CP_RESULTS_CSV)
 
 
 if __name__ == "__main__":
-    run_cp_experiments()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=config.CP_JOBS, help="parallel MiniZinc workers")
+    parser.add_argument(
+        "--pin-cpus",
+        action=argparse.BooleanOptionalAction,
+        default=config.CP_PIN_CPUS,
+        help="bind each worker to its own CPU",
+    )
+    parser.add_argument("--resume", action="store_true", help="skip cells already in the CSV")
+    parser.add_argument(
+        "--executor",
+        choices=["process", "async"],
+        default=config.CP_EXECUTOR,
+        help="worker processes or asyncio subprocesses",
+    )
+    parser.add_argument(
+        "--native",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="also run the in-process min-conflicts backend on NATIVE_NS",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=config.PHASE_PROFILE,
+        help="also profile each run (default: PHASE_PROFILE)",
+    )
+    args = parser.parse_args()
+    run_cp_experiments(
+        jobs=args.jobs,
+        pin_cpus=args.pin_cpus,
+        resume=args.resume,
+        executor=args.executor,
+        native=args.native,
+        profile=args.profile,
+    )
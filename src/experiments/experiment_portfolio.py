@@ -0,0 +1,81 @@
+"""Race the CP portfolio on each N and append the winners to a growing CSV."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+from src.minizinc.portfolio import PortfolioOutcome, portfolio_entrants, race
+from src.utils.logging_utils import setup_logging
+from src.utils.results_writer import StreamingCsvWriter
+
+logger = setup_logging(__name__)
+
+PORTFOLIO_COLUMNS = [
+    "timestamp",
+    "N",
+    "timeout_s",
+    "status",
+    "runtime_s",
+    "winner_model",
+    "winner_solver",
+    "winner_solve_time_s",
+    "num_entrants",
+    "entrant_statuses",
+    "entrant_errors",
+]
+
+
+def portfolio_row(outcome: PortfolioOutcome, timeout: float) -> Dict[str, object]:
+    winner, result = outcome.winner, outcome.result
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "N": outcome.n,
+        "timeout_s": timeout,
+        "status": outcome.status,
+        "runtime_s": outcome.runtime,
+        "winner_model": winner.model_name if winner else "",
+        "winner_solver": (winner.solver or "default") if winner else "",
+        "winner_solve_time_s": result.solve_time if result else None,
+        "num_entrants": len(outcome.entrant_statuses),
+        "entrant_statuses": ";".join(
+            f"{label}={status}" for label, status in outcome.entrant_statuses.items()
+        ),
+        "entrant_errors": ";".join(
+            f"{label}={message}" for label, message in outcome.entrant_errors.items()
+        ),
+    }
+
+
+def run_portfolio_experiments(
+    ns: Optional[List[int]] = None,
+    solvers: Optional[List[Optional[str]]] = None,
+    timeout: float = config.PORTFOLIO_TIMEOUT,
+) -> None:
+    """Race every N once; rows are appended so win statistics accumulate across sessions."""
+    ns = config.CP_NS if ns is None else ns
+    entrants = portfolio_entrants(solvers=config.PORTFOLIO_SOLVERS if solvers is None else solvers)
+    logger.info("Racing %s on N=%s", [entrant.label for entrant in entrants], ns)
+    with StreamingCsvWriter(config.PORTFOLIO_RESULTS_CSV, PORTFOLIO_COLUMNS, resume=True) as writer:
+        for n in ns:
+            writer.write(portfolio_row(race(n, entrants, timeout), timeout))
+    logger.info("Saved portfolio results to %s", config.PORTFOLIO_RESULTS_CSV)
+
+
+def _solver_id(text: str) -> Optional[str]:
+    return None if text == "default" else text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ns", type=int, nargs="+", help="board sizes (default: CP_NS)")
+    parser.add_argument(
+        "--solvers",
+        type=_solver_id,
+        nargs="+",
+        help="MiniZinc solver ids, 'default' for MiniZinc's default (default: PORTFOLIO_SOLVERS)",
+    )
+    parser.add_argument("--timeout", type=float, default=config.PORTFOLIO_TIMEOUT)
+    args = parser.parse_args()
+    run_portfolio_experiments(ns=args.ns, solvers=args.solvers, timeout=args.timeout)
@@ -1,66 +1,213 @@
-"""Run QUBO experiments with Amplify and log CSV rows."""
+"""Run QUBO experiments with Amplify or the local solvers and log CSV rows."""
 from __future__ import annotations
 
+import argparse
 from datetime import datetime
-
-import pandas as pd
+from typing import Dict, List, Optional
 
 import config
-from src.qubo.run_amplify import AmplifyRunner, AmplifyTokenMissing
+from src.qubo.concurrent_submit import QuboJob, submit_many
+from src.qubo.encodings import ENCODINGS
+from src.qubo.local_anneal import LocalAnnealRunner
+from src.qubo.mock_amplify import LocalAmplifyRunner
+from src.qubo.parallel_tempering import ParallelTemperingRunner
+from src.qubo.run_amplify import AmplifyRunner, AmplifyUnavailable
 from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PHASE_COLUMNS, PROFILE_MODES, PhaseTimer
+from src.utils.results_writer import (
+    StreamingCsvWriter,
+    drop_rows,
+    load_completed_keys,
+    row_key,
+)
 
 logger = setup_logging(__name__)
 
 
-def run_qubo_experiments() -> None:
+QUBO_COLUMNS = [
+    "timestamp",
+    "solver_name",
+    "model_name",
+    "run_id",
+    "N",
+    "timeout_s",
+    "status",
+    "runtime_s",
+    "is_valid",
+    "reason_summary",
+    "penalty_set_name",
+    "penalty_values",
+    "energy",
+    "num_candidates",
+    "best_valid_found",
+    "run_repeat",
+    "encoding",
+    "num_variables",
+    "num_couplings",
+    "queue_time_s",
+    "transfer_time_s",
+    "execution_time_s",
+    *PHASE_COLUMNS,
+]
+# Columns identifying a finished run when resuming
+QUBO_KEY_COLUMNS = ["solver_name", "encoding", "N", "penalty_values", "timeout_s", "run_repeat"]
+
+
+QUBO_BACKENDS = ["amplify", "amplify_local", "local_sa", "local_pt"]
+
+
+def make_runner(backend: str = config.QUBO_BACKEND, encoding: str = config.QUBO_ENCODING):
+    """Return the QUBO runner selected by ``backend``, building ``encoding`` models."""
+    if backend == "local_sa":
+        return LocalAnnealRunner(encoding=encoding)
+    if backend == "local_pt":
+        return ParallelTemperingRunner(encoding=encoding)
+    if backend == "amplify":
+        return AmplifyRunner(encoding=encoding)
+    if backend == "amplify_local":
+        return LocalAmplifyRunner(encoding=encoding)
+    raise ValueError(f"Unknown QUBO backend: {backend}")
+
+
+def run_qubo_experiments(
+    resume: bool = False,
+    backend: str = config.QUBO_BACKEND,
+    ns: Optional[List[int]] = None,
+    concurrency: int = config.QUBO_CONCURRENCY,
+    encoding: str = config.QUBO_ENCODING,
+    profile: Optional[str] = config.PHASE_PROFILE,
+) -> None:
     config.RAW_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    ns = config.QUBO_NS if ns is None else ns
     try:
-        runner = AmplifyRunner()
-    except AmplifyTokenMissing as exc:
+        runner = make_runner(backend, encoding)
+    except AmplifyUnavailable as exc:
         logger.error("Cannot run Amplify experiments: %s", exc)
         return
+    if concurrency > 1 and not isinstance(runner, AmplifyRunner):
+        # The in-process solvers are CPU-bound and share one random generator
+        logger.warning("Concurrent submission needs an Amplify backend; running serially")
+        concurrency = 1
+    if profile is not None and concurrency > 1:
+        logger.warning("Profiles of concurrent runs overlap; profile with --concurrency 1")
 
-    results = []
+    done = load_completed_keys(config.QUBO_RESULTS_CSV, QUBO_KEY_COLUMNS) if resume else set()
+    if done:
+        logger.info("Resuming: %d finished runs will be skipped", len(done))
+
+    rows: List[Dict[str, object]] = []
+    jobs: List[QuboJob] = []
     run_counter = 0
-    for n in config.QUBO_NS:
+    for n in ns:
         for penalty_idx, penalty_cfg in enumerate(config.QUBO_PENALTIES):
-            penalty_name = f"penalty_set_{penalty_idx}"
             for timeout in config.QUBO_TIMEOUTS:
                 for run_id in range(config.QUBO_RUNS_PER_CONFIG):
-                    logger.info(
-                        "QUBO run N=%d timeout=%.2fs penalties=%s run=%d",
-                        n,
-                        timeout,
-                        penalty_cfg,
-                        run_id,
-                    )
-                    outcome = runner.solve(n, penalty_cfg, timeout=timeout)
-                    results.append(
-                        {
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "solver_name": "amplify_ae",
-                            "model_name": "qubo",
-                            "run_id": run_counter,
-                            "N": n,
-                            "timeout_s": timeout,
-                            "status": outcome.status,
-                            "runtime_s": outcome.runtime,
-                            "is_valid": outcome.valid,
-                            "reason_summary": outcome.reason_summary,
-                            "penalty_set_name": penalty_name,
-                            "penalty_values": str(penalty_cfg),
-                            "energy": outcome.energy,
-                            "num_candidates": outcome.num_candidates,
-                            "best_valid_found": outcome.best_valid_found,
-                            "run_repeat": run_id,
-                        }
-                    )
+                    # run_id counts grid positions, so it is stable across resumes
+                    row = {
+                        "solver_name": runner.solver_name,
+                        "model_name": "qubo",
+                        "run_id": run_counter,
+                        "N": n,
+                        "timeout_s": timeout,
+                        "penalty_set_name": f"penalty_set_{penalty_idx}",
+                        "penalty_values": str(penalty_cfg),
+                        "run_repeat": run_id,
+                        "encoding": encoding,
+                    }
                     run_counter += 1
+                    if row_key(row, QUBO_KEY_COLUMNS) in done:
+                        continue
+                    rows.append(row)
+                    jobs.append(QuboJob(n, penalty_cfg, timeout, PhaseTimer(profile)))
+
+    append = resume
+    if not resume:
+        # A fresh sweep replaces only its own solver's and encoding's rows, so results
+        # of other backends and encodings stay in the file to be compared against
+        append = drop_rows(
+            config.QUBO_RESULTS_CSV,
+            {"solver_name": runner.solver_name, "encoding": encoding},
+            QUBO_COLUMNS,
+        )
+    logger.info("Submitting %d QUBO runs, %d at a time", len(jobs), max(1, concurrency))
+    with StreamingCsvWriter(config.QUBO_RESULTS_CSV, QUBO_COLUMNS, resume=append) as writer:
+        for index, outcome in submit_many(runner, jobs, concurrency):
+            row = rows[index]
+            phases = jobs[index].phases
+            # The runner built (and timed) the model; this is a cache hit
+            qubo, _ = runner.cache.sparse(row["N"], jobs[index].penalties, encoding)
+            logger.info(
+                "QUBO run N=%d timeout=%.2fs penalties=%s run=%d: %s in %.2fs",
+                row["N"],
+                row["timeout_s"],
+                row["penalty_values"],
+                row["run_repeat"],
+                outcome.status,
+                outcome.runtime,
+            )
+            writer.write(
+                {
+                    **row,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "status": outcome.status,
+                    "runtime_s": outcome.runtime,
+                    "is_valid": outcome.valid,
+                    "reason_summary": outcome.reason_summary,
+                    "energy": outcome.energy,
+                    "num_candidates": outcome.num_candidates,
+                    "best_valid_found": outcome.best_valid_found,
+                    "queue_time_s": outcome.queue_time,
+                    "transfer_time_s": outcome.transfer_time,
+                    "execution_time_s": outcome.execution_time,
+                    "num_variables": qubo.num_variables,
+                    "num_couplings": qubo.num_couplings,
+                    **phases.as_row(),
+                }
+            )
+            profile_path = phases.dump(
+                config.PROFILE_DIR
+                / f"qubo_{runner.solver_name}_{encoding}_N{row['N']}_run{row['run_id']}.prof"
+            )
+            if profile_path is not None:
+                logger.info("Saved profile to %s", profile_path)
 
-    df = pd.DataFrame(results)
-    df.to_csv(config.QUBO_RESULTS_CSV, index=False)
     logger.info("Saved QUBO results to %s", config.QUBO_RESULTS_CSV)
 
 
 if __name__ == "__main__":
-    run_qubo_experiments()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", action="store_true", help="skip runs already in the CSV")
+    parser.add_argument(
+        "--backend",
+        choices=QUBO_BACKENDS,
+        default=config.QUBO_BACKEND,
+        help="QUBO solver (default: QUBO_BACKEND)",
+    )
+    parser.add_argument("--ns", type=int, nargs="+", help="board sizes (default: QUBO_NS)")
+    parser.add_argument(
+        "--encoding",
+        choices=sorted(ENCODINGS),
+        default=config.QUBO_ENCODING,
+        help="QUBO encoding (default: QUBO_ENCODING)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.QUBO_CONCURRENCY,
+        help="Amplify requests kept in flight (default: QUBO_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=config.PHASE_PROFILE,
+        help="also profile each run (default: PHASE_PROFILE)",
+    )
+    args = parser.parse_args()
+    run_qubo_experiments(
+        resume=args.resume,
+        backend=args.backend,
+        ns=args.ns,
+        concurrency=args.concurrency,
+        encoding=args.encoding,
+        profile=args.profile,
+    )
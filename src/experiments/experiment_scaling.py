@@ -0,0 +1,262 @@
+"""Find the largest N each CP model and QUBO encoding solves, within one time budget."""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import config
+from src.experiments.experiment_cp import minizinc_row, native_row
+from src.experiments.experiment_qubo import QUBO_BACKENDS, make_runner
+from src.minizinc.run_minizinc import run_minizinc
+from src.native.min_conflicts import MinConflictsRunner
+from src.qubo.encodings import ENCODINGS
+from src.qubo.run_amplify import AmplifyUnavailable
+from src.utils.logging_utils import setup_logging
+from src.utils.results_writer import StreamingCsvWriter
+from src.utils.scaling_search import Probe, ScalingRun, find_scaling_limit
+
+logger = setup_logging(__name__)
+
+SCALING_TARGETS = ["cp", "native", "qubo"]
+
+SCALING_RUN_COLUMNS = [
+    "timestamp",
+    "solver_name",
+    "model_name",
+    "phase",
+    "N",
+    "run_repeat",
+    "timeout_s",
+    "status",
+    "is_valid",
+    "runtime_s",
+]
+SCALING_SUMMARY_COLUMNS = [
+    "timestamp",
+    "solver_name",
+    "model_name",
+    "timeout_s",
+    "runs_per_n",
+    "N_max",
+    "N_first_failed",
+    "timeouts_at_failed",
+    "probes",
+    "runs",
+    "wall_time_s",
+    "budget_s",
+    "stop_reason",
+]
+
+
+@dataclass
+class ScalingTarget:
+    """One model under one solver, and how to run it once at a given N."""
+
+    solver_name: str
+    model_name: str
+    timeout: float
+    runs_per_n: int
+    max_n: int
+    run: Callable[[int], ScalingRun]
+
+
+def _minizinc_target(model_name: str, model_path: str, solver: Optional[str]) -> ScalingTarget:
+    timeout = config.SCALING_CP_TIMEOUT
+
+    def run(n: int) -> ScalingRun:
+        result = run_minizinc(model_path, {"N": n}, timeout=timeout, solver=solver)
+        row = minizinc_row(model_name, n, timeout, 0, result, profile=None)
+        return ScalingRun(bool(row["is_valid"]), result.status, result.runtime)
+
+    solver_name = "minizinc" if solver is None else f"minizinc/{solver}"
+    return ScalingTarget(solver_name, model_name, timeout, 1, config.SCALING_MAX_N, run)
+
+
+def _native_target() -> ScalingTarget:
+    timeout = config.SCALING_CP_TIMEOUT
+
+    def run(n: int) -> ScalingRun:
+        row = native_row(n, timeout, 0, profile=None)
+        return ScalingRun(bool(row["is_valid"]), str(row["status"]), float(row["runtime_s"]))
+
+    runner = MinConflictsRunner()
+    return ScalingTarget(
+        runner.solver_name, runner.model_name, timeout, 1, config.SCALING_MAX_N, run
+    )
+
+
+def _qubo_target(backend: str, encoding: str) -> ScalingTarget:
+    runner = make_runner(backend, encoding)
+    timeout = config.SCALING_QUBO_TIMEOUT
+    penalties = config.QUBO_PENALTIES[0]
+
+    def run(n: int) -> ScalingRun:
+        outcome = runner.solve(n, penalties, timeout=timeout)
+        status = outcome.status
+        # QUBO runners report no timeouts of their own; spending the whole timeout
+        # without a valid placement is what a CP timeout means
+        if status == "OK" and not outcome.valid and outcome.runtime >= timeout:
+            status = "TIMEOUT"
+        return ScalingRun(outcome.valid, status, outcome.runtime)
+
+    return ScalingTarget(
+        runner.solver_name,
+        f"qubo_{encoding}",
+        timeout,
+        config.SCALING_QUBO_RUNS,
+        min(config.SCALING_MAX_N, config.SCALING_QUBO_MAX_N),
+        run,
+    )
+
+
+def build_targets(
+    kinds: List[str],
+    solvers: List[Optional[str]],
+    backend: str = config.QUBO_BACKEND,
+    encodings: Optional[List[str]] = None,
+) -> List[ScalingTarget]:
+    targets: List[ScalingTarget] = []
+    if "cp" in kinds:
+        for model_name, model_path in config.CP_MODELS.items():
+            for solver in solvers:
+                targets.append(_minizinc_target(model_name, str(model_path), solver))
+    if "native" in kinds:
+        targets.append(_native_target())
+    if "qubo" in kinds:
+        try:
+            for encoding in encodings or [config.QUBO_ENCODING]:
+                targets.append(_qubo_target(backend, encoding))
+        except AmplifyUnavailable as exc:
+            logger.error("Skipping QUBO targets: %s", exc)
+    return targets
+
+
+def run_scaling_experiments(
+    kinds: Optional[List[str]] = None,
+    budget: float = config.SCALING_BUDGET_S,
+    solvers: Optional[List[Optional[str]]] = None,
+    backend: str = config.QUBO_BACKEND,
+    encodings: Optional[List[str]] = None,
+) -> None:
+    """Search every target in turn; each gets an equal share of what is left of ``budget``."""
+    targets = build_targets(
+        SCALING_TARGETS if kinds is None else kinds,
+        [config.MINIZINC_SOLVER] if solvers is None else solvers,
+        backend,
+        encodings,
+    )
+    config.RAW_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    config.AGG_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    remaining = budget
+
+    with StreamingCsvWriter(config.SCALING_RUNS_CSV, SCALING_RUN_COLUMNS) as runs_writer, \
+            StreamingCsvWriter(config.AGG_SCALING_CSV, SCALING_SUMMARY_COLUMNS) as summary_writer:
+        for index, target in enumerate(targets):
+            share = remaining / (len(targets) - index)
+
+            def record(probe: Probe, repeat: int, outcome: ScalingRun, target=target) -> None:
+                runs_writer.write(
+                    {
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "solver_name": target.solver_name,
+                        "model_name": target.model_name,
+                        "phase": probe.phase,
+                        "N": probe.n,
+                        "run_repeat": repeat,
+                        "timeout_s": target.timeout,
+                        "status": outcome.status,
+                        "is_valid": outcome.valid,
+                        "runtime_s": outcome.runtime,
+                    }
+                )
+
+            logger.info(
+                "Scaling %s %s with %.0fs of budget", target.solver_name, target.model_name, share
+            )
+            result = find_scaling_limit(
+                target.run,
+                budget_s=share,
+                run_cost_s=target.timeout + config.SCALING_RUN_OVERHEAD_S,
+                runs_per_n=target.runs_per_n,
+                max_n=target.max_n,
+                on_run=record,
+            )
+            remaining -= result.wall_time
+            failed = next(
+                (probe for probe in result.probes if probe.n == result.smallest_failed), None
+            )
+            summary_writer.write(
+                {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "solver_name": target.solver_name,
+                    "model_name": target.model_name,
+                    "timeout_s": target.timeout,
+                    "runs_per_n": target.runs_per_n,
+                    "N_max": result.largest_passed,
+                    "N_first_failed": result.smallest_failed,
+                    "timeouts_at_failed": failed.timeouts if failed else None,
+                    "probes": len(result.probes),
+                    "runs": result.runs,
+                    "wall_time_s": result.wall_time,
+                    "budget_s": share,
+                    "stop_reason": result.stop_reason,
+                }
+            )
+            logger.info(
+                "%s %s: N_max=%s, first failure at N=%s (%s) after %d runs in %.1fs",
+                target.solver_name, target.model_name, result.largest_passed,
+                result.smallest_failed, result.stop_reason, result.runs, result.wall_time,
+            )
+
+    logger.info(
+        "Saved scaling runs to %s and limits to %s", config.SCALING_RUNS_CSV, config.AGG_SCALING_CSV
+    )
+
+
+def _solver_id(text: str) -> Optional[str]:
+    return None if text == "default" else text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--targets",
+        choices=SCALING_TARGETS,
+        nargs="+",
+        default=SCALING_TARGETS,
+        help="MiniZinc models, the native backend and/or QUBO encodings",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=config.SCALING_BUDGET_S,
+        help="total seconds for all targets (default: SCALING_BUDGET_S)",
+    )
+    parser.add_argument(
+        "--solvers",
+        type=_solver_id,
+        nargs="+",
+        help="MiniZinc solver ids, 'default' for MiniZinc's default (default: MINIZINC_SOLVER)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=QUBO_BACKENDS,
+        default=config.QUBO_BACKEND,
+        help="QUBO solver (default: QUBO_BACKEND)",
+    )
+    parser.add_argument(
+        "--encodings",
+        choices=sorted(ENCODINGS),
+        nargs="+",
+        help="QUBO encodings (default: QUBO_ENCODING)",
+    )
+    args = parser.parse_args()
+    run_scaling_experiments(
+        kinds=args.targets,
+        budget=args.budget,
+        solvers=args.solvers,
+        backend=args.backend,
+        encodings=args.encodings,
+    )
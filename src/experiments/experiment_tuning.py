@@ -0,0 +1,134 @@
+"""Tune QUBO penalties per N with successive halving and report the best settings."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+import config
+from src.experiments.experiment_qubo import QUBO_BACKENDS, make_runner
+from src.qubo.penalty_tuning import sample_penalties, successive_halving
+from src.qubo.run_amplify import AmplifyUnavailable
+from src.utils.logging_utils import setup_logging
+from src.utils.results_writer import StreamingCsvWriter
+
+logger = setup_logging(__name__)
+
+TUNING_RUN_COLUMNS = [
+    "timestamp",
+    "solver_name",
+    "N",
+    "rung",
+    "arm",
+    "penalty_values",
+    "status",
+    "best_valid_found",
+    "constraint_gap",
+    "energy",
+    "runtime_s",
+]
+TUNING_SUMMARY_COLUMNS = [
+    "solver_name",
+    "N",
+    "best_penalty_values",
+    "success_rate",
+    "mean_constraint_gap",
+    "runs_of_best",
+    "settings_tried",
+    "rungs",
+    "solver_calls",
+    "anneal_time_s",
+    "wall_time_s",
+    "exhaustive_solver_calls",
+]
+
+
+def run_tuning_experiments(
+    backend: str = config.QUBO_BACKEND,
+    ns: Optional[List[int]] = None,
+    num_configs: int = config.TUNING_NUM_CONFIGS,
+    timeout: float = config.TUNING_TIMEOUT,
+    eta: int = config.TUNING_ETA,
+) -> None:
+    ns = config.QUBO_NS if ns is None else ns
+    try:
+        runner = make_runner(backend)
+    except AmplifyUnavailable as exc:
+        logger.error("Cannot run penalty tuning: %s", exc)
+        return
+
+    rng = np.random.default_rng(config.DEFAULT_SEED)
+
+    def solve(n, penalties, timeout):
+        return runner.solve(n, penalties, timeout=timeout)
+
+    with StreamingCsvWriter(config.TUNING_RUNS_CSV, TUNING_RUN_COLUMNS) as runs_writer, \
+            StreamingCsvWriter(config.AGG_TUNING_CSV, TUNING_SUMMARY_COLUMNS) as summary_writer:
+
+        def record(evaluation):
+            runs_writer.write(
+                {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "solver_name": runner.solver_name,
+                    **evaluation,
+                }
+            )
+
+        for n in ns:
+            configs = sample_penalties(num_configs, rng=rng)
+            result = successive_halving(
+                solve, n, configs, timeout, runner.cache, eta=eta, on_evaluation=record
+            )
+            best = result.best
+            summary_writer.write(
+                {
+                    "solver_name": runner.solver_name,
+                    "N": n,
+                    "best_penalty_values": str(best.penalties),
+                    "success_rate": best.success_rate,
+                    "mean_constraint_gap": best.mean_gap,
+                    "runs_of_best": best.runs,
+                    "settings_tried": len(result.arms),
+                    "rungs": result.rungs,
+                    "solver_calls": result.solver_calls,
+                    "anneal_time_s": result.anneal_time,
+                    "wall_time_s": result.wall_time,
+                    # Calls needed to run every setting as often as the winner
+                    "exhaustive_solver_calls": len(result.arms) * best.runs,
+                }
+            )
+            logger.info(
+                "N=%d best penalties %s (success %.2f) after %d calls, %.2fs annealing",
+                n, best.penalties, best.success_rate, result.solver_calls, result.anneal_time,
+            )
+
+    logger.info(
+        "Saved tuning runs to %s and best penalties to %s",
+        config.TUNING_RUNS_CSV,
+        config.AGG_TUNING_CSV,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--backend",
+        choices=QUBO_BACKENDS,
+        default=config.QUBO_BACKEND,
+        help="QUBO solver (default: QUBO_BACKEND)",
+    )
+    parser.add_argument("--ns", type=int, nargs="+", help="board sizes (default: QUBO_NS)")
+    parser.add_argument(
+        "--configs", type=int, default=config.TUNING_NUM_CONFIGS, help="penalty settings per N"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=config.TUNING_TIMEOUT, help="seconds per solver call"
+    )
+    parser.add_argument("--eta", type=int, default=config.TUNING_ETA, help="halving rate")
+    args = parser.parse_args()
+    run_tuning_experiments(
+        backend=args.backend, ns=args.ns, num_configs=args.configs, timeout=args.timeout,
+        eta=args.eta,
+    )
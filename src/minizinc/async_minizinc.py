@@ -0,0 +1,157 @@
+"""Run many MiniZinc models concurrently with asyncio subprocesses.
+
+Each run executes the same steps as :func:`src.minizinc.run_minizinc.run_minizinc`
+and returns the same :class:`MiniZincResult`. A semaphore bounds how many solver
+processes are alive at once. Timeouts are enforced by cancelling the wait on a
+process; a cancelled solver's process group is terminated, given
+``MINIZINC_KILL_GRACE_S`` to exit, then killed, so cancelling a task never
+leaves its solver (or the backend ``minizinc`` spawned) running.
+
+The event loop reaps the processes itself, so results from these runs carry no
+``usage`` (CPU time and peak memory); use the blocking runner to measure them.
+"""
+from __future__ import annotations
+
+import asyncio
+import shlex
+import signal
+import time
+from dataclasses import dataclass
+from typing import Dict, Generator, Iterable, List, Optional
+
+from config import (
+    MINIZINC_FZN_CACHE,
+    MINIZINC_KILL_GRACE_S,
+    MINIZINC_SOLVER,
+    MINIZINC_STATISTICS,
+)
+from src.minizinc.run_minizinc import (
+    MiniZincResult,
+    ProcessCall,
+    ProcessOutcome,
+    binary_missing_result,
+    group_alive,
+    reap_strays,
+    run_steps,
+    signal_group,
+)
+from src.utils.logging_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+@dataclass
+class MiniZincJob:
+    """Arguments of one :func:`run_minizinc_async` call."""
+
+    model_path: str
+    params: Dict[str, int]
+    timeout: float = 10
+    solver: Optional[str] = MINIZINC_SOLVER
+
+
+async def _stop_process(proc: asyncio.subprocess.Process, grace: float) -> None:
+    if proc.returncode is not None:
+        return
+    signal_group(proc.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        signal_group(proc.pid, signal.SIGKILL)
+        await proc.wait()
+
+
+async def _drain(proc: asyncio.subprocess.Process, communicate, grace: float):
+    """Output of a stopped process, once every member of its group has closed the pipes."""
+    try:
+        return await asyncio.wait_for(asyncio.shield(communicate), grace)
+    except asyncio.TimeoutError:
+        # Descendants that ignored SIGTERM still hold the pipes open
+        signal_group(proc.pid, signal.SIGKILL)
+        return await communicate
+
+
+async def _reap_strays_async(pgid: int, grace: float) -> None:
+    if group_alive(pgid):
+        await asyncio.get_running_loop().run_in_executor(None, reap_strays, pgid, grace)
+
+
+async def _run_process_async(
+    call: ProcessCall, grace: float = MINIZINC_KILL_GRACE_S
+) -> ProcessOutcome:
+    """Async counterpart of ``_run_process``; returncode is ``None`` when it timed out."""
+    logger.debug("Executing MiniZinc: %s", " ".join(shlex.quote(x) for x in call.cmd))
+    start = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *call.cmd,
+        stdin=asyncio.subprocess.PIPE if call.stdin_text is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    stdin = call.stdin_text.encode() if call.stdin_text is not None else None
+    communicate = asyncio.ensure_future(proc.communicate(stdin))
+    try:
+        stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), call.timeout)
+    except asyncio.TimeoutError:
+        await _stop_process(proc, grace)
+        stdout, stderr = await _drain(proc, communicate, grace)
+        elapsed = time.perf_counter() - start
+        await _reap_strays_async(proc.pid, grace)
+        return None, stdout.decode(), stderr.decode(), elapsed, None
+    except asyncio.CancelledError:
+        await _stop_process(proc, grace)
+        # Let the pipes reach EOF so they are closed while the loop is still running
+        await _drain(proc, communicate, grace)
+        await _reap_strays_async(proc.pid, grace)
+        raise
+    elapsed = time.perf_counter() - start
+    await _reap_strays_async(proc.pid, grace)
+    return proc.returncode, stdout.decode(), stderr.decode(), elapsed, None
+
+
+async def drive_steps_async(steps: Generator[ProcessCall, ProcessOutcome, object]):
+    """Execute a step generator with asyncio subprocesses and return its value."""
+    try:
+        call = next(steps)
+        while True:
+            call = steps.send(await _run_process_async(call))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_minizinc_async(
+    model_path: str,
+    params: Dict[str, int],
+    timeout: float = 10,
+    solver: Optional[str] = MINIZINC_SOLVER,
+    use_cache: bool = MINIZINC_FZN_CACHE,
+    statistics: bool = MINIZINC_STATISTICS,
+) -> MiniZincResult:
+    """Async :func:`~src.minizinc.run_minizinc.run_minizinc` with identical results."""
+    start = time.perf_counter()
+    steps = run_steps(model_path, params, timeout, solver, use_cache, statistics)
+    try:
+        return await drive_steps_async(steps)
+    except FileNotFoundError as exc:
+        return binary_missing_result(exc, time.perf_counter() - start)
+
+
+async def run_many(
+    jobs: Iterable[MiniZincJob], concurrency: int
+) -> List[MiniZincResult]:
+    """Run ``jobs`` with at most ``concurrency`` solvers alive; results keep job order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def guarded(job: MiniZincJob) -> MiniZincResult:
+        async with semaphore:
+            return await run_minizinc_async(
+                job.model_path, job.params, timeout=job.timeout, solver=job.solver
+            )
+
+    return await asyncio.gather(*(guarded(job) for job in jobs))
+
+
+def run_many_blocking(jobs: Iterable[MiniZincJob], concurrency: int) -> List[MiniZincResult]:
+    """Synchronous entry point to :func:`run_many` for scripts without an event loop."""
+    return asyncio.run(run_many(jobs, concurrency))
@@ -1,28 +1,64 @@
-"""Parse MiniZinc output, keeping the last solution block."""
+"""Parse MiniZinc output, keeping the last solution block.
+
+Besides the model's ``positions=[...]`` text, typed solutions can be read from
+dzn assignments (raw FlatZinc solver output or ``--output-mode dzn``) and from
+``--output-mode json`` blocks.
+"""
 from __future__ import annotations
 
+import json
 import re
-from typing import List, Tuple
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from src.validation.placement import Placement
 
 
 POSITION_PATTERN = re.compile(r"positions=\[(?P<body>[^\]]*)\]")
 PAIR_PATTERN = re.compile(r"\(\s*(?P<row>\d+)\s*,\s*(?P<col>\d+)\s*\)")
 SEPARATOR = "----------"
 TERMINATOR = "=========="
+UNSAT_MARKER = "=====UNSATISFIABLE====="
+ASSIGNMENT_PATTERN = re.compile(r"(?P<name>[A-Za-z_]\w*)\s*=\s*(?P<value>[^;]*);")
+ARRAY_PATTERN = re.compile(r"^array\d+d\((?P<ranges>.*?),\s*\[(?P<body>.*)\]\s*\)$", re.S)
+RANGE_PATTERN = re.compile(r"(-?\d+)\s*\.\.\s*(-?\d+)")
+STAT_PATTERN = re.compile(r"^%%%mzn-stat:?\s*(?P<name>\w+)\s*=\s*(?P<value>.*?)\s*$", re.M)
+
+DznValue = Union[int, bool, np.ndarray]
+
+
+def _strip_comments(block: str) -> str:
+    """Drop ``%`` comment lines such as ``%%%mzn-stat`` output from a block."""
+    if "%" not in block:
+        return block.strip()
+    lines = [line for line in block.splitlines() if not line.lstrip().startswith("%")]
+    return "\n".join(lines).strip()
 
 
 def _extract_last_block(raw_output: str) -> str:
-    text = raw_output.replace(TERMINATOR, "").strip()
-    if SEPARATOR in text:
-        candidates = [block.strip() for block in text.split(SEPARATOR) if block.strip()]
-        if not candidates:
-            raise ValueError("No solution blocks found in MiniZinc output")
-        return candidates[-1]
-    return text
+    text = raw_output.replace(TERMINATOR, "")
+    end = len(text)
+    if SEPARATOR not in text:
+        return _strip_comments(text)
+    # Walk blocks backwards instead of splitting the whole output
+    while end > 0:
+        start = text.rfind(SEPARATOR, 0, end)
+        block = _strip_comments(text[start + len(SEPARATOR) if start >= 0 else 0 : end])
+        if block:
+            return block
+        if start < 0:
+            break
+        end = start
+    raise ValueError("No solution blocks found in MiniZinc output")
 
 
-def parse_positions(raw_output: str) -> List[Tuple[int, int]]:
-    """Extract ``(row, col)`` pairs from the final MiniZinc solution block."""
+def parse_positions(raw_output: str, n: Optional[int] = None) -> Placement:
+    """Extract the ``(row, col)`` pairs of the final MiniZinc solution block.
+
+    The pairs are returned as a compact :class:`Placement`; ``n`` sizes its row
+    array when known (otherwise the largest coordinate is used).
+    """
     block = _extract_last_block(raw_output)
     match = POSITION_PATTERN.search(block)
     if not match:
@@ -30,13 +66,78 @@ def parse_positions(raw_output: str) -> List[Tuple[int, int]]:
 
     body = match.group("body").strip()
     if not body:
-        return []
-
-    positions: List[Tuple[int, int]] = []
-    for pair_match in PAIR_PATTERN.finditer(body):
-        row = int(pair_match.group("row"))
-        col = int(pair_match.group("col"))
-        positions.append((row, col))
-    if not positions:
+        return Placement.empty()
+
+    pairs = PAIR_PATTERN.findall(body)
+    if not pairs:
         raise ValueError("No coordinate pairs parsed from MiniZinc output")
-    return positions
+    return Placement.from_coords(np.array(pairs, dtype=np.int64), n)
+
+
+def _parse_elements(body: str) -> np.ndarray:
+    tokens = [token.strip() for token in body.replace("|", ",").split(",") if token.strip()]
+    if tokens and tokens[0] in ("true", "false"):
+        return np.array([token == "true" for token in tokens], dtype=bool)
+    return np.array(tokens, dtype=np.int64)
+
+
+def parse_dzn_value(text: str) -> DznValue:
+    """Parse a dzn scalar, ``[...]``, ``[| ... |]`` or ``arrayNd(..., [...])`` literal."""
+    text = text.strip()
+    match = ARRAY_PATTERN.match(text)
+    if match:
+        ranges = RANGE_PATTERN.findall(match.group("ranges"))
+        shape = tuple(int(hi) - int(lo) + 1 for lo, hi in ranges)
+        return _parse_elements(match.group("body")).reshape(shape)
+    if text.startswith("[|"):
+        rows = [row for row in text[2:-2].split("|") if row.strip()]
+        return _parse_elements(text[2:-2]).reshape(len(rows), -1)
+    if text.startswith("["):
+        return _parse_elements(text[1:-1])
+    if text in ("true", "false"):
+        return text == "true"
+    return int(text)
+
+
+def parse_dzn_block(block: str) -> Dict[str, DznValue]:
+    """Parse all ``name = value;`` assignments of one solution block."""
+    lines = [line for line in block.splitlines() if not line.lstrip().startswith("%")]
+    return {
+        match.group("name"): parse_dzn_value(match.group("value"))
+        for match in ASSIGNMENT_PATTERN.finditer("\n".join(lines))
+    }
+
+
+def parse_json_block(block: str) -> Dict[str, DznValue]:
+    """Parse one ``--output-mode json`` solution block."""
+    data = json.loads(block)
+    return {
+        name: np.asarray(value) if isinstance(value, list) else value
+        for name, value in data.items()
+    }
+
+
+def positions_from_values(values: Dict[str, DznValue]) -> Placement:
+    """Queen placement from the classic ``q`` columns or the Boolean ``x`` grid."""
+    if "q" in values:
+        return Placement(columns=np.asarray(values["q"]))
+    if "x" in values:
+        return Placement.from_grid(np.asarray(values["x"], dtype=bool))
+    raise ValueError("Solution has neither 'q' nor 'x' variables")
+
+
+def _stat_value(text: str) -> Union[int, float, str]:
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text.strip('"')
+
+
+def parse_statistics(raw_output: str) -> Dict[str, Union[int, float, str]]:
+    """Collect ``%%%mzn-stat: name=value`` lines; later values override earlier ones."""
+    return {
+        match.group("name"): _stat_value(match.group("value"))
+        for match in STAT_PATTERN.finditer(raw_output)
+    }
@@ -0,0 +1,150 @@
+"""Race several model/solver combinations on the same N and keep the first answer.
+
+Every entrant runs at once through :func:`run_minizinc_async`. The first run
+whose placement validates wins (a proof of unsatisfiability also settles the
+race); the remaining entrants are cancelled, which terminates their solvers.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import config
+from src.minizinc.async_minizinc import run_minizinc_async
+from src.minizinc.parse_minizinc_output import parse_positions
+from src.minizinc.run_minizinc import MiniZincResult
+from src.utils.logging_utils import setup_logging
+from src.validation.placement import Placement
+from src.validation.validate_solution import validate_many
+
+logger = setup_logging(__name__)
+
+
+@dataclass(frozen=True)
+class PortfolioEntrant:
+    """One model encoding paired with one MiniZinc backend solver."""
+
+    model_name: str
+    model_path: str
+    solver: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.model_name}/{self.solver or 'default'}"
+
+
+@dataclass
+class PortfolioOutcome:
+    """Result of one race; ``winner`` is ``None`` when no entrant settled N."""
+
+    n: int
+    status: str
+    runtime: float
+    winner: Optional[PortfolioEntrant] = None
+    result: Optional[MiniZincResult] = None
+    positions: Placement = field(default_factory=Placement.empty)
+    entrant_statuses: Dict[str, str] = field(default_factory=dict)
+    entrant_errors: Dict[str, str] = field(default_factory=dict)  # label -> exception message
+
+
+def portfolio_entrants(
+    models: Optional[Dict[str, object]] = None,
+    solvers: Sequence[Optional[str]] = config.PORTFOLIO_SOLVERS,
+) -> List[PortfolioEntrant]:
+    """Cross every CP model with every solver (``None`` is MiniZinc's default)."""
+    models = config.CP_MODELS if models is None else models
+    return [
+        PortfolioEntrant(model_name, str(model_path), solver)
+        for model_name, model_path in models.items()
+        for solver in solvers
+    ]
+
+
+def _validated_positions(result: MiniZincResult, n: int) -> Optional[Placement]:
+    if result.status != "SAT":
+        return None
+    try:
+        positions = parse_positions(result.stdout, n)
+    except ValueError as exc:
+        logger.error("Parsing failed: %s", exc)
+        return None
+    return positions if validate_many(positions, n).valid[0] else None
+
+
+def _overall_status(statuses: Dict[str, str]) -> str:
+    for status in ("TIMEOUT", "ERROR"):
+        if status in statuses.values():
+            return status
+    return "INVALID"
+
+
+async def race_async(
+    n: int, entrants: Sequence[PortfolioEntrant], timeout: float = config.PORTFOLIO_TIMEOUT
+) -> PortfolioOutcome:
+    """Run all ``entrants`` on N concurrently and return the first validated answer."""
+    start = time.perf_counter()
+    tasks = {
+        asyncio.ensure_future(
+            run_minizinc_async(entrant.model_path, {"N": n}, timeout=timeout, solver=entrant.solver)
+        ): entrant
+        for entrant in entrants
+    }
+    statuses = {entrant.label: "CANCELLED" for entrant in entrants}
+    errors: Dict[str, str] = {}
+    outcome: Optional[PortfolioOutcome] = None
+    pending = set(tasks)
+    try:
+        while pending and outcome is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            completed = []
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    completed.append(task)
+                    continue
+                # A crashed entrant is out of the race; the others keep running
+                label = tasks[task].label
+                statuses[label], errors[label] = "ERROR", f"{type(exc).__name__}: {exc}"
+                logger.error("Portfolio entrant %s failed: %s", label, errors[label])
+            # Runs finishing in the same wake-up are ranked by their own runtime
+            for task in sorted(completed, key=lambda finished: finished.result().runtime):
+                entrant, result = tasks[task], task.result()
+                statuses[entrant.label] = result.status
+                if outcome is not None:
+                    continue
+                if result.status == "UNSAT":
+                    outcome = PortfolioOutcome(n, "UNSAT", 0.0, entrant, result)
+                    continue
+                positions = _validated_positions(result, n)
+                if positions is not None:
+                    outcome = PortfolioOutcome(n, "SAT", 0.0, entrant, result, positions)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if outcome is None:
+        outcome = PortfolioOutcome(n, _overall_status(statuses), 0.0)
+    outcome.runtime = time.perf_counter() - start
+    outcome.entrant_statuses = statuses
+    outcome.entrant_errors = errors
+    if outcome.winner is not None:
+        logger.info(
+            "Portfolio N=%d won by %s (%s) in %.3fs", n, outcome.winner.label, outcome.status,
+            outcome.runtime,
+        )
+    else:
+        logger.warning("Portfolio N=%d produced no answer (%s)", n, outcome.status)
+    return outcome
+
+
+def race(
+    n: int,
+    entrants: Optional[Sequence[PortfolioEntrant]] = None,
+    timeout: float = config.PORTFOLIO_TIMEOUT,
+) -> PortfolioOutcome:
+    """Blocking :func:`race_async` over :func:`portfolio_entrants` by default."""
+    entrants = portfolio_entrants() if entrants is None else entrants
+    return asyncio.run(race_async(n, entrants, timeout))
@@ -1,18 +1,136 @@
-"""Run MiniZinc models from Python and capture status/runtime."""
+"""Run MiniZinc models from Python and capture status/runtime.
+
+Models are flattened once per (model content, parameters, solver) into a cached
+``.fzn``/``.ozn`` pair; later calls only solve the FlatZinc and format its
+output, so ``solve_time`` excludes flattening.
+
+The steps of a run are written as generators that yield the subprocess calls
+they need. :func:`run_minizinc` executes them with blocking ``Popen`` calls and
+``src.minizinc.async_minizinc`` with asyncio subprocesses, so both share the
+same command construction and result handling.
+
+Every subprocess starts in a session (and process group) of its own. A call
+that runs out of time has the whole group terminated, then killed after
+``MINIZINC_KILL_GRACE_S``, so the backend solvers that ``minizinc`` spawned
+go down with it. After every call the group is checked for leftover
+processes, which are stopped before the next call starts. The solver also gets
+the remaining time as ``--time-limit`` (``MINIZINC_SOLVER_TIME_LIMIT``), so it
+usually stops on its own and still reports its statistics.
+
+The blocking runner reaps each subprocess itself with ``wait4``, so a result also
+carries the CPU time and peak resident memory of its processes
+(:class:`ResourceUsage`). The kernel folds in every descendant the process
+waited for, which covers the backend solver that ``minizinc`` spawns.
+"""
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import shlex
+import signal
 import subprocess
+import sys
+import tempfile
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Generator, List, Optional, Tuple, Union
 
-from config import MINIZINC_BINARY
+from config import (
+    FZN_CACHE_DIR,
+    MINIZINC_BINARY,
+    MINIZINC_FZN_CACHE,
+    MINIZINC_KILL_GRACE_S,
+    MINIZINC_SOLVER,
+    MINIZINC_SOLVER_TIME_LIMIT,
+    MINIZINC_STATISTICS,
+    MINIZINC_TIME_LIMIT_SLACK_S,
+)
+from src.minizinc.parse_minizinc_output import parse_statistics
 from src.utils.logging_utils import setup_logging
 
 logger = setup_logging(__name__)
 
 
+# MiniZinc statistic names mapped to SolverStatistics fields
+STAT_FIELDS = {
+    "nodes": "nodes",
+    "failures": "failures",
+    "propagations": "propagations",
+    "flatTime": "flat_time",
+    "solveTime": "solve_time",
+    "peakDepth": "peak_depth",
+}
+
+
+@dataclass
+class SolverStatistics:
+    """Search and timing statistics reported by MiniZinc/the solver (``--statistics``)."""
+
+    nodes: Optional[int] = None
+    failures: Optional[int] = None
+    propagations: Optional[int] = None
+    flat_time: Optional[float] = None
+    solve_time: Optional[float] = None
+    peak_depth: Optional[int] = None
+    raw: Dict[str, Union[int, float, str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_output(cls, text: str, flatten_time: Optional[float] = None) -> "SolverStatistics":
+        raw = parse_statistics(text)
+        known = {attr: raw[name] for name, attr in STAT_FIELDS.items() if name in raw}
+        if "flat_time" not in known and flatten_time is not None:
+            known["flat_time"] = flatten_time
+        return cls(raw=raw, **known)
+
+    def as_row(self) -> Dict[str, object]:
+        return {f"stat_{attr}": getattr(self, attr) for attr in STAT_FIELDS.values()}
+
+
+# Resource usage columns of a run, from ResourceUsage.as_row
+USAGE_COLUMNS = ["cpu_user_s", "cpu_sys_s", "peak_rss_mb"]
+
+
+@dataclass
+class ResourceUsage:
+    """CPU seconds and peak resident memory of finished subprocesses (``wait4``)."""
+
+    user_time: float = 0.0
+    sys_time: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    @classmethod
+    def from_rusage(cls, rusage) -> "ResourceUsage":
+        # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+        rss_bytes = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        return cls(rusage.ru_utime, rusage.ru_stime, rss_bytes / 2**20)
+
+    @property
+    def cpu_time(self) -> float:
+        return self.user_time + self.sys_time
+
+    def __add__(self, other: "ResourceUsage") -> "ResourceUsage":
+        """Usage of two processes run one after the other: CPU adds up, memory peaks."""
+        return ResourceUsage(
+            self.user_time + other.user_time,
+            self.sys_time + other.sys_time,
+            max(self.peak_rss_mb, other.peak_rss_mb),
+        )
+
+    def as_row(self) -> Dict[str, object]:
+        return dict(zip(USAGE_COLUMNS, (self.user_time, self.sys_time, self.peak_rss_mb)))
+
+
+def _total_usage(*usages: Optional[ResourceUsage]) -> Optional[ResourceUsage]:
+    """Combined usage of the measured processes; ``None`` when none was measured."""
+    measured = [usage for usage in usages if usage is not None]
+    if not measured:
+        return None
+    return sum(measured[1:], measured[0])
+
+
 @dataclass
 class MiniZincResult:
     """Container for MiniZinc run results."""
@@ -21,11 +139,49 @@ class MiniZincResult:
     runtime: float
     stdout: str
     stderr: str
+    flatten_time: float = 0.0  # flattening paid by this call; 0.0 when the cache was hit
+    solve_time: float = 0.0
+    format_time: float = 0.0  # solns2out turning solver output into the model's output
+    flatten_cached: bool = False
+    statistics: SolverStatistics = field(default_factory=SolverStatistics)
+    # All subprocesses of the call; None where they could not be measured (asyncio runs)
+    usage: Optional[ResourceUsage] = None
+
+    def usage_row(self) -> Dict[str, object]:
+        """:data:`USAGE_COLUMNS` of this run, blank when the usage is unknown."""
+        if self.usage is None:
+            return dict.fromkeys(USAGE_COLUMNS)
+        return self.usage.as_row()
 
     def as_tuple(self) -> Tuple[str, float, str, str]:
         return self.status, self.runtime, self.stdout, self.stderr
 
 
+@dataclass
+class FlatZincArtifact:
+    """A flattened model ready for solve-only invocations."""
+
+    fzn_path: Path
+    ozn_path: Path
+    flatten_time: float
+    cached: bool
+    usage: Optional[ResourceUsage] = None
+
+
+@dataclass
+class ProcessCall:
+    """A subprocess a run step needs executed."""
+
+    cmd: List[str]
+    timeout: Optional[float]
+    stdin_text: Optional[str] = None
+
+
+# (returncode or None on timeout, stdout, stderr, elapsed seconds, usage or None)
+ProcessOutcome = Tuple[Optional[int], str, str, float, Optional[ResourceUsage]]
+RunSteps = Generator[ProcessCall, ProcessOutcome, MiniZincResult]
+
+
 def _format_params(params: Dict[str, int]) -> List[str]:
     cmd_params: List[str] = []
     for key, val in params.items():
@@ -34,10 +190,17 @@ def _format_params(params: Dict[str, int]) -> List[str]:
     return cmd_params
 
 
+def _solver_args(solver: Optional[str]) -> List[str]:
+    return ["--solver", solver] if solver else []
+
+
 def _detect_status(stdout: str, returncode: int) -> str:
     text = stdout.lower()
     if "unsatisfiable" in text:
         return "UNSAT"
+    if "=====unknown=====" in text:
+        # The solver stopped at its --time-limit without an answer
+        return "TIMEOUT"
     if "satisfiable" in text or "positions=" in text:
         return "SAT"
     if returncode == 0:
@@ -45,39 +208,313 @@ def _detect_status(stdout: str, returncode: int) -> str:
     return "ERROR"
 
 
-def run_minizinc(model_path: str, params: Dict[str, int], timeout: int = 10) -> MiniZincResult:
-    """Execute a MiniZinc model with parameters and a timeout."""
-    cmd = [MINIZINC_BINARY, model_path]
-    cmd.extend(_format_params(params))
-    logger.debug("Executing MiniZinc: %s", " ".join(shlex.quote(x) for x in cmd))
+def _wait_accounted(
+    pid: int, timeout: Optional[float]
+) -> Optional[Tuple[int, ResourceUsage]]:
+    """Reap child ``pid`` with ``wait4``; ``None`` if it is still running after ``timeout``.
 
-    start = time.perf_counter()
+    Returns the exit code (negative for a signal, as in ``Popen.returncode``) and the
+    child's rusage, which ``waitpid`` (and so ``Popen.wait``) would discard.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        flags = 0 if deadline is None else os.WNOHANG
+        reaped, status, rusage = os.wait4(pid, flags)
+        if reaped == pid:
+            return os.waitstatus_to_exitcode(status), ResourceUsage.from_rusage(rusage)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        # Same backoff as Popen.wait(timeout=...)
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
+
+
+def signal_group(pgid: int, sig: int) -> bool:
+    """Send ``sig`` to process group ``pgid``; False when the group no longer exists."""
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _running_in_group(pgid: int) -> bool:
+    """Scan ``/proc`` for a member of ``pgid`` that is not a zombie."""
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as handle:
+                stat = handle.read()
+        except OSError:
+            continue  # exited while scanning
+        # "pid (comm) state ppid pgrp ..."; comm may itself contain spaces and parentheses
+        state, _, pgrp = stat[stat.rindex(b")") + 2 :].split(b" ", 3)[:3]
+        if int(pgrp) == pgid and state != b"Z":
+            return True
+    return False
+
+
+def group_alive(pgid: int) -> bool:
+    """Whether process group ``pgid`` still has a running member."""
     try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # the group exists but belongs to someone else
+    # Killed orphans stay in the group as zombies until init reaps them; they cost nothing
+    return _running_in_group(pgid) if os.path.isdir("/proc/self") else True
+
+
+def stop_group(pgid: int, grace: float = MINIZINC_KILL_GRACE_S) -> bool:
+    """Terminate group ``pgid``, kill it after ``grace``; False if it survived SIGKILL.
+
+    Members need not be our children, so the group is polled until it is empty.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        signal_group(pgid, sig)
+        deadline = time.monotonic() + grace
+        while group_alive(pgid):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+        else:
+            return True
+    logger.error("Process group %d is still alive after SIGKILL", pgid)
+    return False
+
+
+def reap_strays(pgid: int, grace: float = MINIZINC_KILL_GRACE_S) -> bool:
+    """Stop what is left of a finished call's process group; True if anything was left."""
+    if not group_alive(pgid):
+        return False
+    logger.warning("Processes of group %d outlived their MiniZinc call; stopping them", pgid)
+    stop_group(pgid, grace)
+    return True
+
+
+def _stop_call(pid: int, grace: float) -> Tuple[int, ResourceUsage]:
+    """Terminate process group ``pid``, kill it after ``grace``, and reap its leader."""
+    stop_group(pid, grace)
+    return _wait_accounted(pid, None)
+
+
+def _run_process(
+    cmd: List[str],
+    timeout: Optional[float],
+    stdin_text: Optional[str] = None,
+    grace: float = MINIZINC_KILL_GRACE_S,
+) -> ProcessOutcome:
+    """Run ``cmd`` to completion; returncode is ``None`` when it timed out.
+
+    Output goes to temporary files rather than pipes, so the child can be reaped
+    here with ``wait4`` (keeping its rusage) instead of inside ``communicate``.
+    """
+    logger.debug("Executing MiniZinc: %s", " ".join(shlex.quote(x) for x in cmd))
+    with tempfile.TemporaryFile("w+") as stdin_file, tempfile.TemporaryFile("w+") as out_file, \
+            tempfile.TemporaryFile("w+") as err_file:
+        if stdin_text is not None:
+            stdin_file.write(stdin_text)
+            stdin_file.flush()
+            stdin_file.seek(0)
+        start = time.perf_counter()
         proc = subprocess.Popen(
             cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+            stdin=stdin_file if stdin_text is not None else None,
+            stdout=out_file,
+            stderr=err_file,
+            start_new_session=True,
         )
-        try:
-            stdout, stderr = proc.communicate(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            stdout, stderr = proc.communicate()
-            runtime = time.perf_counter() - start
-            logger.warning("MiniZinc timeout after %.3fs", runtime)
-            return MiniZincResult(
-                status="TIMEOUT", runtime=runtime, stdout=stdout or "", stderr=stderr or ""
-            )
-    except FileNotFoundError as exc:
+        reaped = _wait_accounted(proc.pid, timeout)
+        timed_out = reaped is None
+        if timed_out:
+            reaped = _stop_call(proc.pid, grace)
+        elapsed = time.perf_counter() - start
+        # Already reaped: tell Popen, so that it does not wait for the pid again
+        proc.returncode, usage = reaped
+        reap_strays(proc.pid, grace)
+        out_file.seek(0)
+        err_file.seek(0)
+        stdout, stderr = out_file.read(), err_file.read()
+    return None if timed_out else proc.returncode, stdout, stderr, elapsed, usage
+
+
+def drive_steps(steps: Generator[ProcessCall, ProcessOutcome, object]):
+    """Execute a step generator with blocking subprocess calls and return its value."""
+    try:
+        call = next(steps)
+        while True:
+            call = steps.send(_run_process(call.cmd, call.timeout, call.stdin_text))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _cache_key(model_path: str, params: Dict[str, int], solver: Optional[str]) -> str:
+    digest = hashlib.sha256(Path(model_path).read_bytes())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update((solver or "default").encode())
+    return digest.hexdigest()[:20]
+
+
+def compile_steps(
+    model_path: str,
+    params: Dict[str, int],
+    solver: Optional[str] = MINIZINC_SOLVER,
+    timeout: Optional[float] = None,
+    cache_dir: Path = FZN_CACHE_DIR,
+) -> Generator[ProcessCall, ProcessOutcome, FlatZincArtifact]:
+    """Steps of :func:`compile_model`; raise ``TimeoutExpired``/``RuntimeError`` on failure."""
+    key = _cache_key(model_path, params, solver)
+    target = Path(cache_dir) / f"{Path(model_path).stem}_{key}"
+    fzn_path, ozn_path = target.with_suffix(".fzn"), target.with_suffix(".ozn")
+    if fzn_path.exists() and ozn_path.exists():
+        return FlatZincArtifact(fzn_path, ozn_path, flatten_time=0.0, cached=True)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temporary names let concurrent workers and tasks compile the same key safely
+    unique = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    tmp_fzn = target.with_suffix(f".{unique}.fzn.tmp")
+    tmp_ozn = target.with_suffix(f".{unique}.ozn.tmp")
+    cmd = [MINIZINC_BINARY, "-c", model_path, *_format_params(params), *_solver_args(solver)]
+    cmd.extend(["--fzn", str(tmp_fzn), "--ozn", str(tmp_ozn)])
+    returncode, _, stderr, elapsed, usage = yield ProcessCall(cmd, timeout)
+    if returncode is None:
+        raise subprocess.TimeoutExpired(cmd, timeout or 0.0)
+    if returncode != 0:
+        raise RuntimeError(f"MiniZinc flattening failed ({returncode}): {stderr.strip()}")
+    os.replace(tmp_ozn, ozn_path)
+    os.replace(tmp_fzn, fzn_path)
+    logger.debug("Flattened %s in %.3fs -> %s", model_path, elapsed, fzn_path)
+    return FlatZincArtifact(fzn_path, ozn_path, flatten_time=elapsed, cached=False, usage=usage)
+
+
+def compile_model(
+    model_path: str,
+    params: Dict[str, int],
+    solver: Optional[str] = MINIZINC_SOLVER,
+    timeout: Optional[float] = None,
+    cache_dir: Path = FZN_CACHE_DIR,
+) -> FlatZincArtifact:
+    """Flatten ``model_path`` for ``solver``, reusing a cached ``.fzn``/``.ozn`` pair."""
+    return drive_steps(compile_steps(model_path, params, solver, timeout, cache_dir))
+
+
+def _stats_args(statistics: bool) -> List[str]:
+    return ["--statistics"] if statistics else []
+
+
+def _solve_limits(remaining: float) -> Tuple[List[str], float]:
+    """``--time-limit`` arguments for the solver and the hard timeout of its process."""
+    if not MINIZINC_SOLVER_TIME_LIMIT:
+        return [], remaining
+    # A limit of 0 would mean none at all
+    millis = max(1, int(remaining * 1000))
+    return ["--time-limit", str(millis)], remaining + MINIZINC_TIME_LIMIT_SLACK_S
+
+
+def _finish(
+    returncode: Optional[int], runtime: float, stdout: str, stderr: str, **timing
+) -> MiniZincResult:
+    if returncode is None:
+        logger.warning("MiniZinc timeout after %.3fs", runtime)
+        return MiniZincResult("TIMEOUT", runtime, stdout, stderr, **timing)
+    status = _detect_status(stdout, returncode)
+    if status == "TIMEOUT":
+        logger.warning("MiniZinc reached its time limit after %.3fs", runtime)
+    elif returncode != 0 and status == "ERROR":
+        logger.error("MiniZinc returned non-zero exit code %s", returncode)
+    return MiniZincResult(status, runtime, stdout, stderr, **timing)
+
+
+def run_steps(
+    model_path: str,
+    params: Dict[str, int],
+    timeout: float,
+    solver: Optional[str] = MINIZINC_SOLVER,
+    use_cache: bool = MINIZINC_FZN_CACHE,
+    statistics: bool = MINIZINC_STATISTICS,
+) -> RunSteps:
+    """Steps of one MiniZinc run, ending with its :class:`MiniZincResult`."""
+    start = time.perf_counter()
+    if not use_cache:
+        limit_args, hard_timeout = _solve_limits(timeout)
+        cmd = [MINIZINC_BINARY, *_solver_args(solver), *_stats_args(statistics), *limit_args]
+        cmd.append(model_path)
+        cmd.extend(_format_params(params))
+        returncode, stdout, stderr, runtime, usage = yield ProcessCall(cmd, hard_timeout)
+        stats = SolverStatistics.from_output(stdout)
+        return _finish(
+            returncode, runtime, stdout, stderr, solve_time=runtime, statistics=stats, usage=usage
+        )
+
+    try:
+        artifact = yield from compile_steps(model_path, params, solver, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        runtime = time.perf_counter() - start
+        logger.warning("MiniZinc flattening timeout after %.3fs", runtime)
+        return MiniZincResult("TIMEOUT", runtime, "", "", flatten_time=runtime)
+    except RuntimeError as exc:
         runtime = time.perf_counter() - start
-        message = f"MiniZinc binary not found: {exc}"
-        logger.error(message)
-        return MiniZincResult(status="ERROR", runtime=runtime, stdout="", stderr=message)
+        logger.error(str(exc))
+        return MiniZincResult("ERROR", runtime, "", str(exc), flatten_time=runtime)
+
+    limit_args, hard_timeout = _solve_limits(max(timeout - (time.perf_counter() - start), 0.0))
+    cmd = [MINIZINC_BINARY, *_solver_args(solver), *_stats_args(statistics), *limit_args]
+    cmd.append(str(artifact.fzn_path))
+    returncode, raw_stdout, stderr, solve_time, solve_usage = yield ProcessCall(
+        cmd, hard_timeout
+    )
+    # solns2out turns raw FlatZinc assignments into the model's output item
+    format_cmd = [MINIZINC_BINARY, "--ozn-file", str(artifact.ozn_path)]
+    _, stdout, format_stderr, format_time, format_usage = yield ProcessCall(
+        format_cmd, None, stdin_text=raw_stdout
+    )
+
+    return _finish(
+        returncode,
+        time.perf_counter() - start,
+        stdout,
+        stderr + format_stderr,
+        flatten_time=artifact.flatten_time,
+        solve_time=solve_time,
+        format_time=format_time,
+        flatten_cached=artifact.cached,
+        # A cache hit did not flatten; leave stat_flat_time blank rather than 0.0
+        statistics=SolverStatistics.from_output(
+            raw_stdout, flatten_time=None if artifact.cached else artifact.flatten_time
+        ),
+        usage=_total_usage(artifact.usage, solve_usage, format_usage),
+    )
+
 
-    runtime = time.perf_counter() - start
-    status = _detect_status(stdout or "", proc.returncode)
-    if proc.returncode != 0 and status == "ERROR":
-        logger.error("MiniZinc returned non-zero exit code %s", proc.returncode)
+def binary_missing_result(exc: FileNotFoundError, runtime: float) -> MiniZincResult:
+    message = f"MiniZinc binary not found: {exc}"
+    logger.error(message)
+    return MiniZincResult(status="ERROR", runtime=runtime, stdout="", stderr=message)
 
-    return MiniZincResult(status=status, runtime=runtime, stdout=stdout or "", stderr=stderr or "")
+
+def run_minizinc(
+    model_path: str,
+    params: Dict[str, int],
+    timeout: int = 10,
+    solver: Optional[str] = MINIZINC_SOLVER,
+    use_cache: bool = MINIZINC_FZN_CACHE,
+    statistics: bool = MINIZINC_STATISTICS,
+) -> MiniZincResult:
+    """Execute a MiniZinc model with parameters and a timeout.
+
+    ``timeout`` bounds the whole call, including flattening on a cache miss.
+    The solver is asked to stop at the end of it, and is stopped
+    ``MINIZINC_TIME_LIMIT_SLACK_S`` later if it has not.
+    With ``statistics`` the solver's ``%%%mzn-stat`` output is parsed into
+    ``MiniZincResult.statistics``. ``MiniZincResult.usage`` sums the CPU time
+    of every subprocess the call ran and keeps the largest peak RSS.
+    """
+    start = time.perf_counter()
+    try:
+        return drive_steps(run_steps(model_path, params, timeout, solver, use_cache, statistics))
+    except FileNotFoundError as exc:
+        return binary_missing_result(exc, time.perf_counter() - start)
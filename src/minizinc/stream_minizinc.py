@@ -0,0 +1,204 @@
+"""Stream MiniZinc solutions as the solver prints them.
+
+The solver's dzn (or JSON) output is read line by line; only the current
+solution block is held in memory. Each complete block is yielded as a typed
+:class:`StreamedSolution`, and the solver can be stopped as soon as a condition
+on the solutions seen so far is met.
+"""
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import MINIZINC_BINARY, MINIZINC_FZN_CACHE, MINIZINC_SOLVER, MINIZINC_STATISTICS
+from src.minizinc.parse_minizinc_output import (
+    SEPARATOR,
+    TERMINATOR,
+    UNSAT_MARKER,
+    DznValue,
+    parse_dzn_block,
+    parse_json_block,
+    positions_from_values,
+)
+from src.minizinc.run_minizinc import (
+    SolverStatistics,
+    _format_params,
+    _solver_args,
+    _stats_args,
+    compile_model,
+    reap_strays,
+    stop_group,
+)
+from src.utils.logging_utils import setup_logging
+from src.validation.placement import Placement
+
+logger = setup_logging(__name__)
+
+
+@dataclass
+class StreamedSolution:
+    """One solution with the time it arrived, relative to the solver start."""
+
+    index: int
+    elapsed: float
+    values: Dict[str, DznValue]
+
+    def positions(self) -> Placement:
+        return positions_from_values(self.values)
+
+
+class MiniZincStream:
+    """Iterate over the solutions of one MiniZinc run.
+
+    After iteration, ``status``, ``runtime``, ``num_solutions``,
+    ``first_solution_time`` and ``complete`` (search exhausted) describe the run.
+    With the FlatZinc cache the solver prints dzn assignments directly;
+    otherwise ``output_mode`` selects ``"dzn"`` or ``"json"``.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        params: Dict[str, int],
+        timeout: float = 10,
+        solver: Optional[str] = MINIZINC_SOLVER,
+        all_solutions: bool = False,
+        stop_when: Optional[Callable[[StreamedSolution], bool]] = None,
+        output_mode: str = "dzn",
+        use_cache: bool = MINIZINC_FZN_CACHE,
+        statistics: bool = MINIZINC_STATISTICS,
+    ):
+        if output_mode not in ("dzn", "json"):
+            raise ValueError(f"Unsupported output mode: {output_mode}")
+        if use_cache and output_mode != "dzn":
+            raise ValueError("Cached FlatZinc runs always produce dzn output")
+        self.model_path = model_path
+        self.params = params
+        self.timeout = timeout
+        self.solver = solver
+        self.all_solutions = all_solutions
+        self.stop_when = stop_when
+        self.output_mode = output_mode
+        self.use_cache = use_cache
+        self.collect_statistics = statistics
+
+        self.status = "UNKNOWN"
+        self.runtime = 0.0
+        self.flatten_time = 0.0
+        self.flatten_cached = False
+        self.first_solution_time: Optional[float] = None
+        self.num_solutions = 0
+        self.complete = False
+        self.stderr = ""
+        self.statistics = SolverStatistics()
+
+    def _command(self) -> List[str]:
+        if self.use_cache:
+            artifact = compile_model(
+                self.model_path, self.params, self.solver, timeout=self.timeout
+            )
+            self.flatten_time = artifact.flatten_time
+            self.flatten_cached = artifact.cached
+            cmd = [MINIZINC_BINARY, *_solver_args(self.solver), str(artifact.fzn_path)]
+        else:
+            cmd = [MINIZINC_BINARY, *_solver_args(self.solver), self.model_path]
+            cmd.extend(_format_params(self.params))
+            cmd.extend(["--output-mode", self.output_mode])
+        if self.all_solutions:
+            cmd.append("-a")
+        cmd.extend(_stats_args(self.collect_statistics))
+        return cmd
+
+    def __iter__(self) -> Iterator[StreamedSolution]:
+        start = time.perf_counter()
+        try:
+            cmd = self._command()
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                start_new_session=True,
+            )
+        except (FileNotFoundError, RuntimeError, subprocess.TimeoutExpired) as exc:
+            self.status = "TIMEOUT" if isinstance(exc, subprocess.TimeoutExpired) else "ERROR"
+            self.stderr = str(exc)
+            self.runtime = time.perf_counter() - start
+            logger.error("MiniZinc stream could not start: %s", exc)
+            return
+
+        solve_start = time.perf_counter()
+        timed_out = threading.Event()
+
+        def expire() -> None:
+            timed_out.set()
+            # stdout only ends once every process of the group has let go of it
+            stop_group(proc.pid)
+
+        timer = threading.Timer(max(self.timeout - (solve_start - start), 0.0), expire)
+        timer.start()
+        stderr_parts: List[str] = []
+        stderr_reader = threading.Thread(target=lambda: stderr_parts.append(proc.stderr.read()))
+        stderr_reader.start()
+
+        parse_block = parse_dzn_block if self.output_mode == "dzn" else parse_json_block
+        block: List[str] = []
+        stat_lines: List[str] = []
+        stopped = False
+        unsat = False
+        try:
+            for line in proc.stdout:
+                marker = line.strip()
+                if marker == SEPARATOR:
+                    elapsed = time.perf_counter() - solve_start
+                    values = parse_block("".join(block))
+                    solution = StreamedSolution(self.num_solutions, elapsed, values)
+                    block = []
+                    if self.first_solution_time is None:
+                        self.first_solution_time = elapsed
+                    self.num_solutions += 1
+                    yield solution
+                    if self.stop_when is not None and self.stop_when(solution):
+                        stopped = True
+                        break
+                elif marker == TERMINATOR:
+                    self.complete = True
+                elif marker == UNSAT_MARKER:
+                    unsat = True
+                elif marker.startswith("%%%mzn-stat"):
+                    stat_lines.append(line)
+                elif not marker.startswith("%"):
+                    block.append(line)
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                stop_group(proc.pid)
+            proc.wait()
+            reap_strays(proc.pid)
+            stderr_reader.join()
+            self.stderr = "".join(stderr_parts)
+            self.runtime = time.perf_counter() - start
+            # Only a run that flattened reports a flattening time
+            flattened = self.use_cache and not self.flatten_cached
+            self.statistics = SolverStatistics.from_output(
+                "".join(stat_lines), flatten_time=self.flatten_time if flattened else None
+            )
+
+            if unsat:
+                self.status = "UNSAT"
+            elif self.num_solutions and (stopped or self.complete or not timed_out.is_set()):
+                self.status = "SAT"
+            elif timed_out.is_set():
+                self.status = "TIMEOUT"
+            elif proc.returncode not in (0, None) and not stopped:
+                self.status = "ERROR"
+            logger.debug(
+                "MiniZinc stream finished: status=%s solutions=%d first=%.3fs",
+                self.status,
+                self.num_solutions,
+                self.first_solution_time or float("nan"),
+            )
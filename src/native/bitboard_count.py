@@ -0,0 +1,145 @@
+"""Count all N-Queens solutions with a bitboard backtracking search.
+
+Column and diagonal occupancy are three bitmasks; the free squares of a row are
+``~(cols | ld | rd)`` and the diagonal masks shift by one bit per row. Mirror
+symmetry halves the work: only first-row queens in the left half are searched
+(for odd N the middle column too, with the second-row queen in the left half)
+and each solution found stands for itself and its mirror image.
+
+The search tree is split into tasks by the columns of the first two queens so a
+process pool can share it. Fundamental (unique) solutions are counted as the
+solutions that are the lexicographically smallest of their eight symmetric
+images; that image always lies inside the halved search space.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from src.utils.logging_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# (columns of the first queens, multiplicity of each solution found under them)
+CountTask = Tuple[Tuple[int, ...], int]
+
+
+@dataclass
+class CountResult:
+    """Totals of one counting run; ``nodes`` counts queens placed during the search."""
+
+    n: int
+    total: int
+    unique: Optional[int]
+    nodes: int
+    runtime: float
+    jobs: int
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.runtime if self.runtime > 0 else 0.0
+
+
+def symmetric_images(columns: Sequence[int]) -> List[Tuple[int, ...]]:
+    """The eight rotations/reflections of a permutation placement (0-based columns)."""
+    n = len(columns)
+    inverse = [0] * n
+    for row, col in enumerate(columns):
+        inverse[col] = row
+    last = n - 1
+    return [
+        tuple(columns),
+        tuple(last - col for col in columns),
+        tuple(columns[::-1]),
+        tuple(last - col for col in columns[::-1]),
+        tuple(inverse),
+        tuple(last - row for row in inverse),
+        tuple(inverse[::-1]),
+        tuple(last - row for row in inverse[::-1]),
+    ]
+
+
+def is_canonical(columns: Sequence[int]) -> bool:
+    """Whether ``columns`` is the smallest member of its symmetry class."""
+    return tuple(columns) == min(symmetric_images(columns))
+
+
+def split_tasks(n: int) -> List[CountTask]:
+    """Two-row prefixes covering the mirror-halved search space."""
+    if n == 1:
+        return [((0,), 1)]
+    half, middle = n // 2, n // 2
+    tasks = [((first, second), 2) for first in range(half) for second in range(n)]
+    if n % 2:
+        tasks.extend(((middle, second), 2) for second in range(half))
+    return tasks
+
+
+def count_prefix(n: int, prefix: Tuple[int, ...], unique: bool = True) -> Tuple[int, int, int]:
+    """Solutions, canonical solutions and nodes below the queens in ``prefix``."""
+    full = (1 << n) - 1
+    cols = ld = rd = 0
+    for col in prefix:
+        bit = 1 << col
+        if (cols | ld | rd) & bit:
+            return 0, 0, 0
+        cols, ld, rd = cols | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1
+
+    placed = list(prefix)
+    solutions = canonical = nodes = 0
+
+    def place(cols: int, ld: int, rd: int) -> None:
+        nonlocal solutions, canonical, nodes
+        if cols == full:
+            solutions += 1
+            if unique and is_canonical(placed):
+                canonical += 1
+            return
+        free = full & ~(cols | ld | rd)
+        while free:
+            bit = free & -free
+            free ^= bit
+            nodes += 1
+            if unique:
+                placed.append(bit.bit_length() - 1)
+            place(cols | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1)
+            if unique:
+                placed.pop()
+
+    place(cols, ld, rd)
+    return solutions, canonical, nodes
+
+
+def _run_task(n: int, task: CountTask, unique: bool) -> Tuple[int, int, int]:
+    prefix, weight = task
+    solutions, canonical, nodes = count_prefix(n, prefix, unique)
+    return solutions * weight, canonical, nodes
+
+
+def count_solutions(n: int, jobs: int = 1, unique: bool = True) -> CountResult:
+    """Count all solutions of N-Queens, optionally on ``jobs`` worker processes."""
+    if n < 1:
+        raise ValueError("N must be positive")
+    start = time.perf_counter()
+    tasks = split_tasks(n)
+    if jobs <= 1:
+        outcomes = [_run_task(n, task, unique) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunksize = max(1, len(tasks) // (jobs * 4))
+            outcomes = list(
+                pool.map(
+                    _run_task, [n] * len(tasks), tasks, [unique] * len(tasks), chunksize=chunksize
+                )
+            )
+    total, canonical, nodes = (sum(values) for values in zip(*outcomes))
+    result = CountResult(
+        n, total, canonical if unique else None, nodes, time.perf_counter() - start, max(1, jobs)
+    )
+    logger.info(
+        "N=%d: %d solutions (%s unique), %d nodes in %.3fs (%.0f nodes/s)",
+        n, result.total, result.unique, result.nodes, result.runtime, result.nodes_per_sec,
+    )
+    return result
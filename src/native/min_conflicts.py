@@ -0,0 +1,294 @@
+"""In-process N-Queens backend for very large N.
+
+Placements are permutations (``cols[r]`` is the 1-based column of the queen in
+row ``r + 1``), so every row and column holds exactly one queen by construction
+and only the two diagonal families can conflict. Conflicts are tracked with one
+counter per diagonal, which makes evaluating or applying a swap of two queens
+O(1).
+
+Two starts are available:
+
+* ``"constructive"``: the closed-form placement (even columns, then odd ones,
+  with the classic fix-ups for ``N mod 6`` in {2, 3}); valid for every N >= 4.
+* ``"greedy"``: a randomized greedy permutation that places most queens
+  conflict-free, giving a different solution per seed.
+
+Either start is then repaired by min-conflicts swaps until no diagonal is shared.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+from config import DEFAULT_SEED, NATIVE_MAX_STEPS, NATIVE_START
+from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PhaseTimer
+from src.validation.placement import Placement, placement_dtype
+
+logger = setup_logging(__name__)
+
+START_MODES = ("constructive", "greedy")
+# Swap partners sampled per attacked queen; the least conflicting swap is taken
+_SWAP_SAMPLES = 8
+# Chance of a random swap when every sampled swap would add collisions
+_NOISE = 0.05
+# Greedy start tries about this many random columns per queen (Sosic & Gu)
+_GREEDY_TRIES = 3.08
+
+
+def constructive_placement(n: int) -> np.ndarray:
+    """Closed-form solution as 1-based columns per row; raises for N = 2, 3."""
+    if n in (2, 3):
+        raise ValueError(f"No placement exists for N={n}")
+    evens = np.arange(2, n + 1, 2)
+    odds = np.arange(1, n + 1, 2)
+    remainder = n % 6
+    if remainder == 2:
+        odds = np.concatenate(([3, 1], odds[3:], [5]))
+    elif remainder == 3:
+        evens = np.concatenate((evens[1:], [2]))
+        odds = np.concatenate((odds[2:], [1, 3]))
+    return np.concatenate((evens, odds)).astype(np.int64)
+
+
+class DiagonalCounters:
+    """Queens per diagonal and the resulting number of attacking pairs along them.
+
+    ``diag_rows``/``anti_rows`` hold the XOR of the rows on each diagonal, so the
+    other queen on a diagonal holding two is found in O(1). They are only
+    updated by :meth:`commit`, since trial swaps are undone before they count.
+    """
+
+    def __init__(self, cols: List[int]):
+        n = len(cols)
+        rows = np.arange(n)
+        cols_arr = np.asarray(cols, dtype=np.int64)
+        self.offset = n - 1
+        diag_idx, anti_idx = rows + cols_arr, rows - cols_arr + self.offset
+        self.diag = np.bincount(diag_idx, minlength=2 * n - 1).tolist()
+        self.anti = np.bincount(anti_idx, minlength=2 * n - 1).tolist()
+        self.diag_rows = np.zeros(2 * n - 1, dtype=np.int64)
+        self.anti_rows = np.zeros(2 * n - 1, dtype=np.int64)
+        np.bitwise_xor.at(self.diag_rows, diag_idx, rows)
+        np.bitwise_xor.at(self.anti_rows, anti_idx, rows)
+        self.diag_rows = self.diag_rows.tolist()
+        self.anti_rows = self.anti_rows.tolist()
+        self.collisions = sum(c - 1 for c in self.diag if c > 1)
+        self.collisions += sum(c - 1 for c in self.anti if c > 1)
+
+    def attacked(self, row: int, col: int) -> bool:
+        return self.diag[row + col] > 1 or self.anti[row - col + self.offset] > 1
+
+    def remove(self, row: int, col: int) -> None:
+        d, a = row + col, row - col + self.offset
+        self.collisions -= (self.diag[d] > 1) + (self.anti[a] > 1)
+        self.diag[d] -= 1
+        self.anti[a] -= 1
+
+    def add(self, row: int, col: int) -> None:
+        d, a = row + col, row - col + self.offset
+        self.collisions += (self.diag[d] > 0) + (self.anti[a] > 0)
+        self.diag[d] += 1
+        self.anti[a] += 1
+
+    def swap(self, cols: List[int], i: int, j: int) -> int:
+        """Swap the columns of rows ``i`` and ``j``; return the change in collisions."""
+        before = self.collisions
+        ci, cj = cols[i], cols[j]
+        self.remove(i, ci)
+        self.remove(j, cj)
+        self.add(i, cj)
+        self.add(j, ci)
+        cols[i], cols[j] = cj, ci
+        return self.collisions - before
+
+    def commit(self, cols: List[int], i: int, j: int) -> List[int]:
+        """Swap rows ``i`` and ``j`` for good; return the queens it leaves under attack."""
+        ci, cj = cols[i], cols[j]
+        for row, old, new in ((i, ci, cj), (j, cj, ci)):
+            self.diag_rows[row + old] ^= row
+            self.anti_rows[row - old + self.offset] ^= row
+            self.diag_rows[row + new] ^= row
+            self.anti_rows[row - new + self.offset] ^= row
+        self.swap(cols, i, j)
+
+        attacked = []
+        for row in (i, j):
+            d, a = row + cols[row], row - cols[row] + self.offset
+            if self.diag[d] > 1 or self.anti[a] > 1:
+                attacked.append(row)
+            if self.diag[d] == 2:
+                attacked.append(self.diag_rows[d] ^ row)
+            if self.anti[a] == 2:
+                attacked.append(self.anti_rows[a] ^ row)
+        return attacked
+
+
+def greedy_permutation(n: int, rng: np.random.Generator) -> List[int]:
+    """Random permutation (0-based) placed row by row on free diagonals where possible."""
+    cols = rng.permutation(n).tolist()
+    diag = [False] * (2 * n - 1)
+    anti = [False] * (2 * n - 1)
+    draws = rng.random(int(_GREEDY_TRIES * n) + 1).tolist()
+    used, budget, offset = 0, len(draws), n - 1
+    for i in range(n):
+        while used < budget:
+            j = i + int(draws[used] * (n - i))
+            used += 1
+            c = cols[j]
+            if not diag[i + c] and not anti[i - c + offset]:
+                cols[i], cols[j] = c, cols[i]
+                break
+        c = cols[i]
+        diag[i + c] = anti[i - c + offset] = True
+    return cols
+
+
+def _as_array(values: List[int]) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int64, count=len(values))
+
+
+def _attacked_rows(cols: List[int], counters: DiagonalCounters) -> List[int]:
+    rows = np.arange(len(cols))
+    cols_arr = _as_array(cols)
+    diag, anti = _as_array(counters.diag), _as_array(counters.anti)
+    mask = (diag[rows + cols_arr] > 1) | (anti[rows - cols_arr + counters.offset] > 1)
+    return np.flatnonzero(mask).tolist()
+
+
+def repair(
+    cols: List[int],
+    rng: np.random.Generator,
+    max_steps: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Tuple[DiagonalCounters, int]:
+    """Min-conflicts swaps on ``cols`` (0-based, in place) until no diagonal is shared.
+
+    Each attacked queen is swapped with the best of a few random partners when
+    that does not increase the number of collisions (sideways moves cross
+    plateaus); if every partner is worse, a random swap is taken now and then to
+    leave local minima. Queens a swap leaves under attack are queued directly and
+    queens that could not move are retried later, so the attacked rows are
+    scanned once up front. Returns the final counters and the number of repair
+    steps.
+    """
+    n = len(cols)
+    counters = DiagonalCounters(cols)
+    steps = 0
+    pending: Deque[int] = deque()
+    partners: List[List[int]] = []
+    noise: List[float] = []
+    while counters.collisions and (max_steps is None or steps < max_steps):
+        if not pending:
+            rows = _attacked_rows(cols, counters)
+            rng.shuffle(rows)
+            pending.extend(rows)
+        i = pending.pop()
+        if not counters.attacked(i, cols[i]):
+            continue
+        if not partners:
+            partners = rng.integers(0, n, size=(4096, _SWAP_SAMPLES)).tolist()
+            noise = rng.random(4096).tolist()
+
+        best_j, best_delta = -1, 1
+        for j in partners.pop():
+            if j == i:
+                continue
+            delta = counters.swap(cols, i, j)
+            counters.swap(cols, i, j)
+            if delta < best_delta:
+                best_j, best_delta = j, delta
+        if best_j < 0 and noise.pop() < _NOISE:
+            best_j = j
+        if best_j >= 0 and best_j != i:
+            pending.extend(counters.commit(cols, i, best_j))
+        else:
+            pending.appendleft(i)  # still attacked: retry after the others
+
+        steps += 1
+        if deadline is not None and steps % 1024 == 0 and time.perf_counter() > deadline:
+            break
+    return counters, steps
+
+
+@dataclass
+class NativeResult:
+    """Outcome of one native run; ``columns`` holds 1-based columns per row."""
+
+    status: str
+    runtime: float
+    columns: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint16))
+    steps: int = 0
+    collisions: int = 0
+    start_time: float = 0.0
+    repair_time: float = 0.0
+
+    @property
+    def placement(self) -> Placement:
+        return Placement(columns=self.columns)
+
+
+class MinConflictsRunner:
+    """Constructive/greedy start followed by min-conflicts repair, in-process."""
+
+    solver_name = "native_minconflicts"
+
+    def __init__(
+        self,
+        start: str = NATIVE_START,
+        max_steps: Optional[int] = NATIVE_MAX_STEPS,
+        seed: int = DEFAULT_SEED,
+    ):
+        if start not in START_MODES:
+            raise ValueError(f"Unknown start mode: {start}")
+        self.start = start
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def model_name(self) -> str:
+        return f"min_conflicts_{self.start}"
+
+    def solve(
+        self, n: int, timeout: Optional[float] = None, phases: Optional[PhaseTimer] = None
+    ) -> NativeResult:
+        """Solve N; the start is timed into ``phases`` as build, the repair as wait."""
+        phases = phases if phases is not None else PhaseTimer(profile=None)
+        begin = time.perf_counter()
+        if n in (2, 3):
+            return NativeResult("UNSAT", time.perf_counter() - begin)
+        deadline = begin + timeout if timeout is not None else None
+
+        with phases.span("build"):
+            if self.start == "constructive":
+                cols = (constructive_placement(n) - 1).tolist()
+            else:
+                cols = greedy_permutation(n, self.rng)
+        start_time = time.perf_counter() - begin
+
+        with phases.span("wait"):
+            counters, steps = repair(cols, self.rng, self.max_steps, deadline)
+        runtime = time.perf_counter() - begin
+        if counters.collisions == 0:
+            status = "SAT"
+        elif deadline is not None and time.perf_counter() > deadline:
+            status = "TIMEOUT"
+        else:
+            status = "UNKNOWN"
+        logger.debug(
+            "Native N=%d %s: status=%s swaps=%d collisions=%d in %.3fs",
+            n, self.start, status, steps, counters.collisions, runtime,
+        )
+        return NativeResult(
+            status,
+            runtime,
+            np.fromiter(cols, dtype=placement_dtype(n), count=n) + 1,
+            steps=steps,
+            collisions=counters.collisions,
+            start_time=start_time,
+            repair_time=runtime - start_time,
+        )
@@ -0,0 +1,51 @@
+"""Keep several QUBO solve requests in flight on a thread pool.
+
+Remote solves spend most of their wall time queued at the service or in
+transfer, so overlapping requests hides that latency. Threads are enough: the
+work happens on the service, and ``AmplifyRunner`` gives every worker thread its
+own reusable client.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence, Tuple
+
+from src.qubo.qubo_builders import PenaltyConfig
+from src.qubo.run_amplify import AmplifyResult
+from src.utils.phase_timer import PhaseTimer
+
+
+@dataclass
+class QuboJob:
+    """One solve request for :func:`submit_many`."""
+
+    n: int
+    penalties: PenaltyConfig
+    timeout: Optional[float] = None
+    phases: Optional[PhaseTimer] = None
+
+
+def _solve(runner, job: QuboJob, queued_at: float) -> AmplifyResult:
+    if job.phases is not None:
+        # Time spent waiting for a free worker counts as submission
+        job.phases.add("submit", time.perf_counter() - queued_at)
+    return runner.solve(job.n, job.penalties, job.timeout, phases=job.phases)
+
+
+def submit_many(
+    runner, jobs: Sequence[QuboJob], concurrency: int = 1
+) -> Iterator[Tuple[int, AmplifyResult]]:
+    """Yield ``(job index, result)`` as requests finish, ``concurrency`` at a time."""
+    if concurrency <= 1:
+        for index, job in enumerate(jobs):
+            yield index, _solve(runner, job, time.perf_counter())
+        return
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qubo-submit") as pool:
+        futures = {
+            pool.submit(_solve, runner, job, time.perf_counter()): index
+            for index, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
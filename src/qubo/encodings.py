@@ -0,0 +1,208 @@
+"""Alternative QUBO encodings of N-Queens and their shared decoding.
+
+Every encoding builds a :class:`SparseQubo` from the penalty-independent
+:class:`QuboStructure` of N and maps solver states back onto the ``N x N``
+board (``to_grid``), so all of them are validated and reported the same way.
+
+* ``grid``: the one-hot board of :func:`assemble_qubo`, with ``(sum - 1)^2``
+  penalties on every row and column and pairwise diagonal penalties.
+* ``permutation``: the same board variables, but columns only get pairwise
+  "at most one" penalties. With exactly one queen per row, pigeonhole makes
+  every column hold exactly one too, so the column linear terms and offset
+  are redundant and dropped. The pairs are the ones ``(sum - 1)^2`` expands
+  into, so it has exactly the grid's couplings and only changes the energy
+  landscape.
+* ``domain_wall``: each row is an integer column index stored as a domain
+  wall ``1..10..0`` in ``N - 1`` bits, so "one queen per row" holds by
+  construction up to a wall-consistency chain, whose strength is derived from
+  the penalties so that no broken wall scores below a valid board. The board
+  indicator ``x[r, c] = y[r, c-1] - y[r, c]`` is linear in the bits, so column
+  and diagonal conflicts stay quadratic. It saves N variables, but each
+  conflict expands into up to four bit products, so it has more couplings.
+
+A binary (log) encoding of the row index would need only ``log2 N`` bits per
+row, but conflict indicators then become polynomials of degree ``log2 N``,
+which a QUBO cannot express without auxiliary variables; it is not offered.
+None of these encodings has fewer couplings than ``grid``: every conflict pair
+of the board needs its own coupling however the rows are encoded.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Dict
+
+import numpy as np
+
+from src.qubo.qubo_builders import PenaltyConfig, QuboStructure, SparseQubo, assemble_qubo
+
+
+def merge_terms(
+    num_variables: int,
+    linear_idx: np.ndarray,
+    linear_w: np.ndarray,
+    quad_i: np.ndarray,
+    quad_j: np.ndarray,
+    quad_w: np.ndarray,
+    offset: float,
+) -> SparseQubo:
+    """Sum duplicate terms into an upper-triangular :class:`SparseQubo`, dropping zeros."""
+    linear = np.bincount(linear_idx, weights=linear_w, minlength=num_variables)
+    low, high = np.minimum(quad_i, quad_j), np.maximum(quad_i, quad_j)
+    keys, inverse = np.unique(low * num_variables + high, return_inverse=True)
+    weights = np.bincount(inverse, weights=quad_w, minlength=keys.size)
+    keep = weights != 0
+    keys, weights = keys[keep], weights[keep]
+    return SparseQubo(
+        num_variables=num_variables,
+        linear=linear.astype(np.float64),
+        rows=keys // num_variables,
+        cols=keys % num_variables,
+        weights=weights,
+        offset=float(offset),
+    )
+
+
+class QuboEncoding(ABC):
+    """Interface of an encoding: build the QUBO and decode states onto the board."""
+
+    name: str
+
+    @abstractmethod
+    def num_variables(self, n: int) -> int:
+        ...
+
+    @abstractmethod
+    def build(self, structure: QuboStructure, penalties: PenaltyConfig) -> SparseQubo:
+        ...
+
+    @abstractmethod
+    def to_grid(self, states: np.ndarray, n: int) -> np.ndarray:
+        """``(K, N*N)`` 0/1 row-major boards for a ``(K, num_variables)`` state matrix."""
+
+
+class GridEncoding(QuboEncoding):
+    name = "grid"
+
+    def num_variables(self, n: int) -> int:
+        return n * n
+
+    def build(self, structure: QuboStructure, penalties: PenaltyConfig) -> SparseQubo:
+        return assemble_qubo(structure, penalties)
+
+    def to_grid(self, states: np.ndarray, n: int) -> np.ndarray:
+        return np.asarray(states, dtype=np.uint8).reshape(-1, n * n)
+
+
+class PermutationEncoding(GridEncoding):
+    name = "permutation"
+
+    def build(self, structure: QuboStructure, penalties: PenaltyConfig) -> SparseQubo:
+        n = structure.n
+        row_penalty = penalties.get("row", 1.0)
+        groups = (
+            (structure.row_pairs, 2 * row_penalty),
+            (structure.col_pairs, penalties.get("col", 1.0)),
+            (structure.diag_pairs, penalties.get("diag", 1.0)),
+        )
+        pairs = np.concatenate([group for group, _ in groups], axis=1)
+        weights = np.concatenate(
+            [np.full(group.shape[1], weight, dtype=np.float64) for group, weight in groups]
+        )
+        return SparseQubo(
+            num_variables=n * n,
+            linear=np.full(n * n, -row_penalty, dtype=np.float64),
+            rows=pairs[0],
+            cols=pairs[1],
+            weights=weights,
+            offset=float(n * row_penalty),
+        )
+
+
+class DomainWallEncoding(QuboEncoding):
+    """Row ``r`` holds bits ``y[r, 0..N-2]``; ``k`` leading ones put its queen in column ``k``."""
+
+    name = "domain_wall"
+
+    def num_variables(self, n: int) -> int:
+        return n * (n - 1)
+
+    @staticmethod
+    def _cell_terms(n: int):
+        """Board indicators as ``coef * bit`` pairs; bit ``-1`` is the constant 1."""
+        rows, cols = np.divmod(np.arange(n * n), n)
+        # x[r, c] = y[r, c-1] - y[r, c] with y[r, -1] = 1 and y[r, n-1] = 0
+        idx = np.stack([rows * (n - 1) + cols - 1, rows * (n - 1) + cols], axis=1)
+        coef = np.stack([np.ones(n * n), -np.ones(n * n)], axis=1)
+        idx[cols == 0, 0] = -1
+        coef[cols == n - 1, 1] = 0.0
+        idx[cols == n - 1, 1] = 0
+        return idx, coef
+
+    def build(self, structure: QuboStructure, penalties: PenaltyConfig) -> SparseQubo:
+        n = structure.n
+        num_variables = self.num_variables(n)
+        idx, coef = self._cell_terms(n)
+        col_penalty, diag_penalty = penalties.get("col", 1.0), penalties.get("diag", 1.0)
+        # Rows are one-hot by construction, so columns need pairwise penalties only
+        pairs = np.concatenate([structure.col_pairs, structure.diag_pairs], axis=1)
+        pair_w = np.concatenate(
+            [
+                np.full(structure.col_pairs.shape[1], col_penalty),
+                np.full(structure.diag_pairs.shape[1], diag_penalty),
+            ]
+        )
+        # Expand w * x_u * x_v into the 2 x 2 products of their bit terms
+        iu = np.repeat(idx[pairs[0]], 2, axis=1).ravel()
+        iv = np.tile(idx[pairs[1]], (1, 2)).ravel()
+        w = (
+            pair_w[:, None]
+            * np.repeat(coef[pairs[0]], 2, axis=1)
+            * np.tile(coef[pairs[1]], (1, 2))
+        ).ravel()
+        live = w != 0
+        iu, iv, w = iu[live], iv[live], w[live]
+        const_u, const_v = iu < 0, iv < 0
+        quad = ~const_u & ~const_v
+        lin_u = ~const_u & const_v
+        lin_v = const_u & ~const_v
+        offset = float(w[const_u & const_v].sum())
+
+        # Wall consistency: y[r, i+1] = 1 requires y[r, i] = 1. Each break adds one
+        # -1 indicator, which can offset at most col + 2 * diag of conflict energy,
+        # so a wall of that strength plus "row" keeps broken rows above zero.
+        wall = penalties.get("row", 1.0) + col_penalty + 2 * diag_penalty
+        bits = np.arange(num_variables).reshape(n, n - 1)
+        upper, lower = bits[:, :-1].ravel(), bits[:, 1:].ravel()
+
+        return merge_terms(
+            num_variables,
+            np.concatenate([iu[lin_u], iv[lin_v], lower]),
+            np.concatenate([w[lin_u], w[lin_v], np.full(lower.size, wall)]),
+            np.concatenate([iu[quad], upper]),
+            np.concatenate([iv[quad], lower]),
+            np.concatenate([w[quad], np.full(lower.size, -wall)]),
+            offset,
+        )
+
+    def to_grid(self, states: np.ndarray, n: int) -> np.ndarray:
+        states = np.atleast_2d(np.asarray(states, dtype=np.int8))
+        # The candidate count is explicit: at N=1 rows have no bits and -1 cannot be inferred
+        states = states.reshape(states.shape[0], n, n - 1)
+        walls = np.ones((states.shape[0], n, n + 1), dtype=np.int8)
+        walls[:, :, 1:n] = states
+        walls[:, :, n] = 0
+        # A broken wall yields several queens in its row, which validation reports
+        return (walls[:, :, :-1] - walls[:, :, 1:] == 1).astype(np.uint8).reshape(-1, n * n)
+
+
+ENCODINGS: Dict[str, QuboEncoding] = {
+    encoding.name: encoding
+    for encoding in (GridEncoding(), PermutationEncoding(), DomainWallEncoding())
+}
+
+
+def get_encoding(name: str) -> QuboEncoding:
+    try:
+        return ENCODINGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown QUBO encoding: {name} (choose from {sorted(ENCODINGS)})")
@@ -0,0 +1,137 @@
+"""In-process simulated annealing on the N-Queens QUBO.
+
+Each replica keeps the local field ``h_i + sum_j J_ij x_j`` of every variable, so
+the energy change of a flip is read in O(1) and applied in O(degree). All
+replicas advance together as rows of one NumPy array.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import (
+    DEFAULT_SEED,
+    LOCAL_SA_BETA_RANGE,
+    LOCAL_SA_NUM_REPLICAS,
+    LOCAL_SA_NUM_SWEEPS,
+    QUBO_ENCODING,
+)
+from src.qubo.encodings import get_encoding
+from src.qubo.qubo_builders import PenaltyConfig, SparseQubo
+from src.qubo.qubo_cache import QuboCache
+from src.qubo.run_amplify import AmplifyResult, summarize_candidates
+from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PhaseTimer
+
+logger = setup_logging(__name__)
+
+
+def initial_fields(qubo: SparseQubo, states: np.ndarray) -> np.ndarray:
+    """Local fields ``linear + J @ x`` for each replica row of ``states``."""
+    fields = np.tile(qubo.linear, (states.shape[0], 1))
+    np.add.at(fields.T, qubo.rows, (states[:, qubo.cols] * qubo.weights).T)
+    np.add.at(fields.T, qubo.cols, (states[:, qubo.rows] * qubo.weights).T)
+    return fields
+
+
+def anneal(
+    qubo: SparseQubo,
+    num_replicas: int,
+    num_sweeps: int,
+    beta_range: Tuple[float, float],
+    rng: np.random.Generator,
+    timeout: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Run Metropolis sweeps with a geometric inverse-temperature schedule.
+
+    Without ``timeout`` the schedule spans ``num_sweeps`` sweeps; with it the
+    schedule follows elapsed wall time instead, so the run cools fully within
+    the budget. Returns ``(states, energies, sweeps_done)``.
+    """
+    indptr, indices, data = qubo.adjacency()
+    states = rng.integers(0, 2, size=(num_replicas, qubo.num_variables)).astype(np.float64)
+    fields = initial_fields(qubo, states)
+    beta_min, beta_max = beta_range
+    log_ratio = np.log(beta_max / beta_min)
+
+    start = time.perf_counter()
+    sweep = 0
+    while True:
+        if timeout is not None:
+            progress = (time.perf_counter() - start) / timeout
+        else:
+            progress = sweep / max(num_sweeps - 1, 1)
+        if progress > 1.0 or (timeout is None and sweep >= num_sweeps):
+            break
+        beta = beta_min * np.exp(log_ratio * progress)
+        # Accept when delta < -log(u) / beta, i.e. u < exp(-beta * delta)
+        thresholds = -np.log(rng.random((num_replicas, qubo.num_variables))) / beta
+        for i in range(qubo.num_variables):
+            step = 1.0 - 2.0 * states[:, i]
+            delta = step * fields[:, i]
+            accept = delta < thresholds[:, i]
+            if not accept.any():
+                continue
+            step *= accept
+            states[:, i] += step
+            lo, hi = indptr[i], indptr[i + 1]
+            fields[:, indices[lo:hi]] += step[:, None] * data[lo:hi]
+        sweep += 1
+
+    return states.astype(np.uint8), qubo.energies(states), sweep
+
+
+class LocalAnnealRunner:
+    """Simulated-annealing backend with the same contract as ``AmplifyRunner``."""
+
+    solver_name = "local_sa"
+
+    def __init__(
+        self,
+        num_replicas: int = LOCAL_SA_NUM_REPLICAS,
+        num_sweeps: int = LOCAL_SA_NUM_SWEEPS,
+        beta_range: Tuple[float, float] = LOCAL_SA_BETA_RANGE,
+        seed: int = DEFAULT_SEED,
+        cache: QuboCache | None = None,
+        encoding: str = QUBO_ENCODING,
+    ):
+        self.num_replicas = num_replicas
+        self.num_sweeps = num_sweeps
+        self.beta_range = beta_range
+        self.rng = np.random.default_rng(seed)
+        self.cache = cache if cache is not None else QuboCache()
+        self.encoding = get_encoding(encoding)
+
+    def solve(
+        self,
+        n: int,
+        penalties: PenaltyConfig,
+        timeout: float | None = None,
+        return_candidates: bool = False,
+        phases: PhaseTimer | None = None,
+    ) -> AmplifyResult:
+        phases = phases if phases is not None else PhaseTimer(profile=None)
+        with phases.span("build"):
+            qubo, _ = self.cache.sparse(n, penalties, self.encoding.name)
+
+        start = time.perf_counter()
+        with phases.span("wait"):
+            states, energies, sweeps = anneal(
+                qubo, self.num_replicas, self.num_sweeps, self.beta_range, self.rng, timeout
+            )
+        runtime = time.perf_counter() - start
+        logger.info("Local annealing ran %d sweeps over %d replicas", sweeps, self.num_replicas)
+        with phases.span("decode"):
+            boards = self.encoding.to_grid(states, n)
+        return summarize_candidates(
+            n,
+            penalties,
+            runtime,
+            energies,
+            boards,
+            "Local annealer",
+            keep_candidates=return_candidates,
+            phases=phases,
+        )
@@ -0,0 +1,137 @@
+"""Local stand-in for the Fixstars Amplify service.
+
+:class:`LocalAmplifyService` plays the remote side: it admits ``capacity`` jobs
+at a time (later ones wait in its queue), adds a fixed network latency to each
+round trip and solves with the in-process annealer of
+:mod:`src.qubo.local_anneal`. :class:`LocalAmplifySolver` mirrors the parts of
+``amplify.Solver`` and ``FixstarsClient`` that :class:`AmplifyRunner` uses,
+including the queue and execution timings of the last call, so concurrent
+submission and throughput can be exercised without a token or network.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    AMPLIFY_NUM_SAMPLES,
+    DEFAULT_SEED,
+    LOCAL_SA_BETA_RANGE,
+    LOCAL_SA_NUM_SWEEPS,
+    QUBO_MOCK_CAPACITY,
+    QUBO_ENCODING,
+    QUBO_MOCK_LATENCY_S,
+)
+from src.qubo.local_anneal import anneal
+from src.qubo.qubo_builders import SparseQubo
+from src.qubo.qubo_cache import QuboCache
+from src.qubo.run_amplify import AmplifyRunner
+
+
+class LocalAmplifyService:
+    """Shared "remote" side: a bounded number of concurrent jobs plus latency."""
+
+    def __init__(
+        self,
+        capacity: int = QUBO_MOCK_CAPACITY,
+        latency: float = QUBO_MOCK_LATENCY_S,
+        seed: int = DEFAULT_SEED,
+    ):
+        self.capacity = capacity
+        self.latency = latency
+        self._slots = threading.Semaphore(capacity)
+        self._seeds = np.random.SeedSequence(seed)
+        self._seed_lock = threading.Lock()
+
+    def _rng(self) -> np.random.Generator:
+        with self._seed_lock:
+            (child,) = self._seeds.spawn(1)
+        return np.random.default_rng(child)
+
+    def execute(
+        self, qubo: SparseQubo, num_outputs: int, timeout: float
+    ) -> Tuple[np.ndarray, np.ndarray, float, float]:
+        """Wait for a free slot and anneal; return states, energies, queue and solve seconds."""
+        queued = time.perf_counter()
+        with self._slots:
+            started = time.perf_counter()
+            states, energies, _ = anneal(
+                qubo, num_outputs, LOCAL_SA_NUM_SWEEPS, LOCAL_SA_BETA_RANGE, self._rng(), timeout
+            )
+            finished = time.perf_counter()
+        return states, energies, started - queued, finished - started
+
+
+@dataclass
+class LocalCandidate:
+    energy: float
+    values: Dict[int, int]
+
+
+@dataclass
+class _Parameters:
+    timeout: int = 1000  # milliseconds, as on FixstarsClient
+    num_outputs: int = AMPLIFY_NUM_SAMPLES
+    outputs: SimpleNamespace = field(default_factory=lambda: SimpleNamespace(duplicate=True))
+
+
+class LocalAmplifyClient:
+    """Client object holding per-request parameters, like ``FixstarsClient``."""
+
+    def __init__(self):
+        self.token = "local"
+        self.parameters = _Parameters()
+
+
+class LocalAmplifySolver:
+    """``amplify.Solver`` look-alike that submits to a :class:`LocalAmplifyService`."""
+
+    # AmplifyRunner hands this solver its SparseQubo instead of an Amplify model
+    model_format = "sparse"
+
+    def __init__(self, service: LocalAmplifyService, client: Optional[LocalAmplifyClient] = None):
+        self.service = service
+        self.client = client if client is not None else LocalAmplifyClient()
+        self.client_result: Optional[SimpleNamespace] = None
+        self.execution_time: Optional[float] = None
+
+    def solve(self, qubo: SparseQubo) -> List[LocalCandidate]:
+        params = self.client.parameters
+        time.sleep(self.service.latency / 2)  # upload
+        states, energies, queue_time, execution_time = self.service.execute(
+            qubo, params.num_outputs, params.timeout / 1000.0
+        )
+        time.sleep(self.service.latency / 2)  # download
+        # Milliseconds, as the Amplify client reports them
+        self.execution_time = execution_time * 1000.0
+        self.client_result = SimpleNamespace(
+            timing=SimpleNamespace(queue_time=queue_time * 1000.0, cpu_time=self.execution_time)
+        )
+        return [
+            LocalCandidate(float(energy), dict(enumerate(state.tolist())))
+            for energy, state in zip(energies, states)
+        ]
+
+
+class LocalAmplifyRunner(AmplifyRunner):
+    """``AmplifyRunner`` wired to a local service instead of Fixstars."""
+
+    solver_name = "amplify_local"
+
+    def __init__(
+        self,
+        service: Optional[LocalAmplifyService] = None,
+        cache: QuboCache | None = None,
+        encoding: str = QUBO_ENCODING,
+    ):
+        self.service = service if service is not None else LocalAmplifyService()
+        super().__init__(
+            cache=cache,
+            solver_factory=lambda: LocalAmplifySolver(self.service),
+            encoding=encoding,
+        )
@@ -0,0 +1,283 @@
+"""In-process parallel tempering (replica exchange) on the N-Queens QUBO.
+
+A chain is a ladder of replicas at fixed inverse temperatures. All replicas of
+a chain advance together as rows of one NumPy array, reusing the local-field
+updates of :mod:`src.qubo.local_anneal`. Every ``exchange_interval`` sweeps
+neighbouring temperatures propose to swap their states (even and odd pairs in
+turn), accepted with probability ``min(1, exp((beta_i - beta_j) (E_i - E_j)))``.
+Swaps exchange temperatures between rows, so no state is copied.
+
+Independent chains run on a process pool. Each replica keeps its energy up to
+date flip by flip and snapshots its best state when a sweep improves on it; a
+chain reaching ``target_energy`` stops every other chain through a shared event,
+so the reported runtime is the time to solution.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    DEFAULT_SEED,
+    PT_BETA_RANGE,
+    PT_EXCHANGE_INTERVAL,
+    PT_JOBS,
+    PT_NUM_CHAINS,
+    PT_NUM_SWEEPS,
+    PT_NUM_TEMPERATURES,
+    PT_TARGET_ENERGY,
+    QUBO_ENCODING,
+)
+from src.qubo.encodings import get_encoding
+from src.qubo.local_anneal import initial_fields
+from src.qubo.qubo_builders import PenaltyConfig, SparseQubo
+from src.qubo.qubo_cache import QuboCache
+from src.qubo.run_amplify import AmplifyResult, summarize_candidates
+from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PhaseTimer
+
+logger = setup_logging(__name__)
+
+# Energies are tracked incrementally in floating point; allow for rounding drift
+_ENERGY_TOLERANCE = 1e-6
+
+# Set in each pool worker by _init_worker; any chain hitting the target sets it
+_stop_event = None
+
+
+def temperature_ladder(beta_range: Tuple[float, float], num_temperatures: int) -> np.ndarray:
+    """Geometrically spaced inverse temperatures, hottest first."""
+    beta_min, beta_max = beta_range
+    if num_temperatures == 1:
+        return np.array([beta_max])
+    return np.geomspace(beta_min, beta_max, num_temperatures)
+
+
+@dataclass
+class ChainResult:
+    """Best state seen by each replica of one chain, with exchange statistics."""
+
+    best_states: np.ndarray
+    best_energies: np.ndarray
+    sweeps: int
+    exchanges_accepted: int
+    exchanges_proposed: int
+    reached_target: bool
+
+
+def temper(
+    qubo: SparseQubo,
+    ladder: np.ndarray,
+    rng: np.random.Generator,
+    num_sweeps: int,
+    exchange_interval: int = 1,
+    timeout: Optional[float] = None,
+    target_energy: Optional[float] = None,
+    stop_event=None,
+) -> ChainResult:
+    """Run one replica-exchange chain over ``ladder`` (one replica per temperature).
+
+    Without ``timeout`` the chain runs ``num_sweeps`` sweeps; with it the chain
+    runs until the wall-clock budget is spent. Either way it stops early once a
+    replica reaches ``target_energy`` or ``stop_event`` is set.
+    """
+    indptr, indices, data = qubo.adjacency()
+    num_replicas = ladder.shape[0]
+    states = rng.integers(0, 2, size=(num_replicas, qubo.num_variables)).astype(np.float64)
+    fields = initial_fields(qubo, states)
+    energies = qubo.energies(states)
+    best_states = states.astype(np.uint8)
+    best_energies = energies.copy()
+
+    # order[t] is the row currently at ladder temperature t
+    order = np.arange(num_replicas)
+    betas = ladder.copy()
+    accepted = proposed = 0
+    target = None if target_energy is None else target_energy + _ENERGY_TOLERANCE
+    reached = target is not None and bool((best_energies <= target).any())
+
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    sweep = 0
+    while not reached:
+        if deadline is not None:
+            if time.perf_counter() >= deadline:
+                break
+        elif sweep >= num_sweeps:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+
+        thresholds = -np.log(rng.random((num_replicas, qubo.num_variables))) / betas[:, None]
+        for i in range(qubo.num_variables):
+            step = 1.0 - 2.0 * states[:, i]
+            delta = step * fields[:, i]
+            accept = delta < thresholds[:, i]
+            if not accept.any():
+                continue
+            step *= accept
+            states[:, i] += step
+            energies += delta * accept
+            lo, hi = indptr[i], indptr[i + 1]
+            fields[:, indices[lo:hi]] += step[:, None] * data[lo:hi]
+        sweep += 1
+
+        improved = energies < best_energies
+        if improved.any():
+            best_states[improved] = states[improved]
+            best_energies[improved] = energies[improved]
+            reached = target is not None and bool((best_energies[improved] <= target).any())
+
+        if num_replicas > 1 and sweep % exchange_interval == 0:
+            parity = (sweep // exchange_interval) % 2
+            pairs = np.arange(parity, num_replicas - 1, 2)
+            cold, hot = order[pairs + 1], order[pairs]
+            log_ratio = (ladder[pairs] - ladder[pairs + 1]) * (energies[hot] - energies[cold])
+            swap = np.log(rng.random(pairs.shape[0])) < log_ratio
+            order[pairs[swap]], order[pairs[swap] + 1] = cold[swap], hot[swap]
+            betas[order] = ladder
+            accepted += int(swap.sum())
+            proposed += int(pairs.shape[0])
+
+    if reached and stop_event is not None:
+        stop_event.set()
+    # Replace the drifting running totals by exact energies of the kept states
+    return ChainResult(
+        best_states, qubo.energies(best_states), sweep, accepted, proposed, reached
+    )
+
+
+def _init_worker(stop_event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _run_chain(
+    qubo: SparseQubo,
+    ladder: np.ndarray,
+    seed: int,
+    num_sweeps: int,
+    exchange_interval: int,
+    timeout: Optional[float],
+    target_energy: Optional[float],
+) -> ChainResult:
+    return temper(
+        qubo,
+        ladder,
+        np.random.default_rng(seed),
+        num_sweeps,
+        exchange_interval,
+        timeout,
+        target_energy,
+        _stop_event,
+    )
+
+
+def run_chains(
+    qubo: SparseQubo,
+    ladder: np.ndarray,
+    seeds: List[int],
+    num_sweeps: int,
+    exchange_interval: int = 1,
+    timeout: Optional[float] = None,
+    target_energy: Optional[float] = None,
+    jobs: int = 1,
+) -> List[ChainResult]:
+    """Run one chain per seed, on up to ``jobs`` worker processes."""
+    args = (num_sweeps, exchange_interval, timeout, target_energy)
+    stop_event = multiprocessing.Event()
+    if jobs <= 1 or len(seeds) == 1:
+        _init_worker(stop_event)
+        return [_run_chain(qubo, ladder, seed, *args) for seed in seeds]
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(seeds)), initializer=_init_worker, initargs=(stop_event,)
+    ) as pool:
+        futures = [pool.submit(_run_chain, qubo, ladder, seed, *args) for seed in seeds]
+        return [future.result() for future in futures]
+
+
+class ParallelTemperingRunner:
+    """Replica-exchange backend with the same contract as ``AmplifyRunner``."""
+
+    solver_name = "local_pt"
+
+    def __init__(
+        self,
+        num_chains: int = PT_NUM_CHAINS,
+        num_temperatures: int = PT_NUM_TEMPERATURES,
+        beta_range: Tuple[float, float] = PT_BETA_RANGE,
+        exchange_interval: int = PT_EXCHANGE_INTERVAL,
+        num_sweeps: int = PT_NUM_SWEEPS,
+        target_energy: Optional[float] = PT_TARGET_ENERGY,
+        jobs: int = PT_JOBS,
+        seed: int = DEFAULT_SEED,
+        cache: QuboCache | None = None,
+        encoding: str = QUBO_ENCODING,
+    ):
+        if exchange_interval < 1:
+            raise ValueError("exchange_interval must be at least one sweep")
+        self.num_chains = num_chains
+        self.ladder = temperature_ladder(beta_range, num_temperatures)
+        self.exchange_interval = exchange_interval
+        self.num_sweeps = num_sweeps
+        self.target_energy = target_energy
+        self.jobs = jobs
+        self.rng = np.random.default_rng(seed)
+        self.cache = cache if cache is not None else QuboCache()
+        self.encoding = get_encoding(encoding)
+
+    def solve(
+        self,
+        n: int,
+        penalties: PenaltyConfig,
+        timeout: float | None = None,
+        return_candidates: bool = False,
+        phases: PhaseTimer | None = None,
+    ) -> AmplifyResult:
+        phases = phases if phases is not None else PhaseTimer(profile=None)
+        with phases.span("build"):
+            qubo, _ = self.cache.sparse(n, penalties, self.encoding.name)
+        seeds = self.rng.integers(0, 2**63 - 1, size=self.num_chains).tolist()
+
+        start = time.perf_counter()
+        with phases.span("wait"):
+            chains = run_chains(
+                qubo,
+                self.ladder,
+                seeds,
+                self.num_sweeps,
+                self.exchange_interval,
+                timeout,
+                self.target_energy,
+                self.jobs,
+            )
+        runtime = time.perf_counter() - start
+        proposed = sum(chain.exchanges_proposed for chain in chains)
+        logger.info(
+            "Parallel tempering ran %d-%d sweeps over %d chains x %d temperatures; "
+            "exchange acceptance %.2f; target reached=%s",
+            min(chain.sweeps for chain in chains),
+            max(chain.sweeps for chain in chains),
+            len(chains),
+            self.ladder.shape[0],
+            sum(chain.exchanges_accepted for chain in chains) / proposed if proposed else 0.0,
+            any(chain.reached_target for chain in chains),
+        )
+        with phases.span("decode"):
+            boards = self.encoding.to_grid(
+                np.concatenate([chain.best_states for chain in chains]), n
+            )
+        return summarize_candidates(
+            n,
+            penalties,
+            runtime,
+            np.concatenate([chain.best_energies for chain in chains]),
+            boards,
+            "Parallel tempering",
+            keep_candidates=return_candidates,
+            phases=phases,
+        )
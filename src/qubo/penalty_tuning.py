@@ -0,0 +1,181 @@
+"""Successive-halving search for QUBO penalty weights.
+
+Penalty settings are drawn log-uniformly from a continuous box (the fixed
+``QUBO_PENALTIES`` grid is always included). Every surviving setting gets the
+same number of solver runs per rung; the best ``1 / eta`` of them advance and
+run ``eta`` times as often on the next rung, until one remains.
+
+Settings are ranked by how often the best candidate was valid, then by the
+mean *constraint gap*: the energy of the returned placement under unit
+penalties, i.e. the number of violated constraints. Raw energies are not
+compared because they scale with the penalties being tuned.
+"""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    DEFAULT_SEED,
+    QUBO_PENALTIES,
+    TUNING_ETA,
+    TUNING_MIN_RUNS,
+    TUNING_NUM_CONFIGS,
+    TUNING_PENALTY_RANGE,
+)
+from src.qubo.qubo_builders import PenaltyConfig
+from src.qubo.qubo_cache import QuboCache
+from src.qubo.run_amplify import AmplifyResult
+from src.utils.logging_utils import setup_logging
+from src.validation.placement import Placement
+
+logger = setup_logging(__name__)
+
+PENALTY_GROUPS = ("row", "col", "diag")
+_UNIT_PENALTIES: PenaltyConfig = {group: 1.0 for group in PENALTY_GROUPS}
+
+
+def sample_penalties(
+    num_configs: int = TUNING_NUM_CONFIGS,
+    penalty_range: Tuple[float, float] = TUNING_PENALTY_RANGE,
+    rng: Optional[np.random.Generator] = None,
+    include: Sequence[PenaltyConfig] = QUBO_PENALTIES,
+) -> List[PenaltyConfig]:
+    """``include`` followed by log-uniform draws, ``num_configs`` settings in total."""
+    rng = rng if rng is not None else np.random.default_rng(DEFAULT_SEED)
+    configs = [dict(penalties) for penalties in include][:num_configs]
+    low, high = np.log(penalty_range[0]), np.log(penalty_range[1])
+    draws = np.exp(rng.uniform(low, high, size=(num_configs - len(configs), len(PENALTY_GROUPS))))
+    for weights in draws.round(3).tolist():
+        configs.append(dict(zip(PENALTY_GROUPS, weights)))
+    return configs
+
+
+def constraint_gap(positions: Placement, n: int, cache: QuboCache) -> float:
+    """Violated constraints of ``positions``: its energy under unit penalties."""
+    qubo, _ = cache.sparse(n, _UNIT_PENALTIES, encoding="grid")
+    state = np.zeros(n * n, dtype=np.float64)
+    coords = positions.coords().astype(np.int64)
+    in_bounds = ((coords >= 1) & (coords <= n)).all(axis=1)
+    rows, cols = coords[in_bounds].T
+    state[(rows - 1) * n + (cols - 1)] = 1.0
+    return float(qubo.energies(state)[0])
+
+
+@dataclass(eq=False)
+class ArmStats:
+    """Accumulated outcomes of one penalty setting."""
+
+    penalties: PenaltyConfig
+    runs: int = 0
+    successes: int = 0
+    gap_total: float = 0.0
+    runtime_total: float = 0.0
+    last_rung: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.runs if self.runs else 0.0
+
+    @property
+    def mean_gap(self) -> float:
+        return self.gap_total / self.runs if self.runs else math.inf
+
+    @property
+    def mean_runtime(self) -> float:
+        return self.runtime_total / self.runs if self.runs else math.inf
+
+    def rank_key(self) -> Tuple[float, float, float]:
+        return (-self.success_rate, self.mean_gap, self.mean_runtime)
+
+
+@dataclass
+class TuningResult:
+    """Best penalties for one N and what the search cost."""
+
+    n: int
+    best: ArmStats
+    arms: List[ArmStats]
+    solver_calls: int
+    anneal_time: float
+    wall_time: float
+    rungs: int
+    evaluations: List[Dict[str, object]] = field(default_factory=list, repr=False)
+
+
+def successive_halving(
+    solve: Callable[[int, PenaltyConfig, float], AmplifyResult],
+    n: int,
+    configs: Sequence[PenaltyConfig],
+    timeout: float,
+    cache: QuboCache,
+    eta: int = TUNING_ETA,
+    min_runs: int = TUNING_MIN_RUNS,
+    on_evaluation: Optional[Callable[[Dict[str, object]], None]] = None,
+) -> TuningResult:
+    """Tune penalties for one N with ``solve(n, penalties, timeout)`` as the oracle.
+
+    ``on_evaluation`` receives one dict per solver call as it finishes.
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    start = time.perf_counter()
+    arms = [ArmStats(dict(penalties)) for penalties in configs]
+    survivors = list(arms)
+    evaluations: List[Dict[str, object]] = []
+    runs_per_arm = max(1, min_runs)
+    rung = 0
+    while True:
+        for arm_id, arm in enumerate(arms):
+            if arm not in survivors:
+                continue
+            for _ in range(runs_per_arm):
+                outcome = solve(n, arm.penalties, timeout)
+                gap = 0.0
+                if not outcome.best_valid_found:
+                    gap = constraint_gap(outcome.positions, n, cache)
+                arm.runs += 1
+                arm.successes += int(outcome.best_valid_found)
+                arm.gap_total += gap
+                arm.runtime_total += outcome.runtime
+                arm.last_rung = rung
+                evaluation = {
+                    "N": n,
+                    "rung": rung,
+                    "arm": arm_id,
+                    "penalty_values": str(arm.penalties),
+                    "status": outcome.status,
+                    "best_valid_found": outcome.best_valid_found,
+                    "constraint_gap": gap,
+                    "energy": outcome.energy,
+                    "runtime_s": outcome.runtime,
+                }
+                evaluations.append(evaluation)
+                if on_evaluation is not None:
+                    on_evaluation(evaluation)
+        survivors.sort(key=ArmStats.rank_key)
+        logger.info(
+            "N=%d rung %d: %d settings x %d runs; leader %s (success %.2f, gap %.2f)",
+            n, rung, len(survivors), runs_per_arm, survivors[0].penalties,
+            survivors[0].success_rate, survivors[0].mean_gap,
+        )
+        if len(survivors) == 1:
+            break
+        survivors = survivors[: max(1, len(survivors) // eta)]
+        runs_per_arm *= eta
+        rung += 1
+
+    return TuningResult(
+        n=n,
+        best=survivors[0],
+        arms=arms,
+        solver_calls=len(evaluations),
+        anneal_time=sum(arm.runtime_total for arm in arms),
+        wall_time=time.perf_counter() - start,
+        rungs=rung + 1,
+        evaluations=evaluations,
+    )
@@ -2,17 +2,62 @@
 
 Rows and columns use equality; ``<= 1`` per column is equivalent by pigeonhole,
 and we stick with ``= 1`` to keep the penalties clear and stable in practice.
+
+All couplings are generated as NumPy index arrays in bulk. The Amplify
+``BinaryQuadraticModel`` is only assembled from them when a backend needs it.
 """
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
-from amplify import BinaryQuadraticModel, BinaryQuadraticModelBuilder, gen_symbols
+import numpy as np
+
+try:
+    from amplify import BinaryQuadraticModel, BinaryQuadraticModelBuilder, gen_symbols
+except ImportError:  # local backends only need the sparse form
+    BinaryQuadraticModel = BinaryQuadraticModelBuilder = gen_symbols = None
 
 
 PenaltyConfig = Dict[str, float]
 
 
+@dataclass
+class SparseQubo:
+    """QUBO as a linear vector plus upper-triangular couplings ``rows < cols``.
+
+    The energy of a binary state ``x`` is
+    ``offset + linear @ x + sum(weights * x[rows] * x[cols])``.
+    """
+
+    num_variables: int
+    linear: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    weights: np.ndarray
+    offset: float = 0.0
+
+    @property
+    def num_couplings(self) -> int:
+        return int(self.weights.size)
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the symmetric coupling matrix in CSR form ``(indptr, indices, data)``."""
+        src = np.concatenate([self.rows, self.cols])
+        dst = np.concatenate([self.cols, self.rows])
+        data = np.concatenate([self.weights, self.weights])
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(self.num_variables + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.num_variables), out=indptr[1:])
+        return indptr, dst[order], data[order]
+
+    def energies(self, states: np.ndarray) -> np.ndarray:
+        """Evaluate the energy of each row of a ``(K, num_variables)`` 0/1 matrix."""
+        states = np.atleast_2d(states).astype(np.float64, copy=False)
+        pair_terms = (states[:, self.rows] * states[:, self.cols]) @ self.weights
+        return self.offset + states @ self.linear + pair_terms
+
+
 def generate_mapping(n: int) -> Tuple[List[Tuple[int, int]], Dict[Tuple[int, int], int]]:
     """Create index-to-coordinate and coordinate-to-index mappings."""
     idx_to_coord: List[Tuple[int, int]] = []
@@ -25,74 +70,111 @@ def generate_mapping(n: int) -> Tuple[List[Tuple[int, int]], Dict[Tuple[int, int
     return idx_to_coord, coord_to_idx
 
 
-def build_qubo(
-    n: int, penalties: PenaltyConfig
-) -> Tuple[BinaryQuadraticModel, List[Tuple[int, int]], list]:
-    """Create the N-Queens BinaryQuadraticModel with penalty scaling."""
-    idx_to_coord, coord_to_idx = generate_mapping(n)
-    x = gen_symbols(BinaryQuadraticModelBuilder, n * n)
-    bqm = BinaryQuadraticModel()
-
-    # Row constraints: (sum - 1)^2 to enforce exactly one queen per row
+@dataclass
+class QuboStructure:
+    """Unit-weight coupling patterns of the three penalty groups for one N.
+
+    Each ``*_pairs`` array has shape ``(2, num_pairs)`` with ``pairs[0] < pairs[1]``.
+    The pattern only depends on N; penalties merely scale each group.
+    """
+
+    n: int
+    row_pairs: np.ndarray
+    col_pairs: np.ndarray
+    diag_pairs: np.ndarray
+
+
+def build_qubo_structure(n: int) -> QuboStructure:
+    """Enumerate row, column and diagonal conflict pairs with array operations."""
+    first, second = np.triu_indices(n, 1)
+    cells = np.arange(n)
+
+    # Same row: (r, a) with (r, b); same column: (a, c) with (b, c)
+    row_pairs = np.stack(
+        [(cells[:, None] * n + first).ravel(), (cells[:, None] * n + second).ravel()]
+    )
+    col_pairs = np.stack(
+        [(first[:, None] * n + cells).ravel(), (second[:, None] * n + cells).ravel()]
+    )
+
+    # Rows a < b are on a shared diagonal when their columns differ by d = b - a
+    offset = (second - first)[:, None]
+    upper = first[:, None] * n + cells
+    lower = second[:, None] * n + cells
+    down_mask = cells + offset < n
+    up_mask = cells - offset >= 0
+    diag_pairs = np.concatenate(
+        [
+            np.stack([upper[down_mask], (lower + offset)[down_mask]]),
+            np.stack([upper[up_mask], (lower - offset)[up_mask]]),
+        ],
+        axis=1,
+    )
+    return QuboStructure(
+        n=n,
+        row_pairs=row_pairs.astype(np.int64),
+        col_pairs=col_pairs.astype(np.int64),
+        diag_pairs=diag_pairs.astype(np.int64),
+    )
+
+
+def assemble_qubo(structure: QuboStructure, penalties: PenaltyConfig) -> SparseQubo:
+    """Scale the penalty groups of ``structure`` into a concrete QUBO."""
+    n = structure.n
     row_penalty = penalties.get("row", 1.0)
-    for r in range(n):
-        row_indices = [coord_to_idx[(r + 1, c + 1)] for c in range(n)]
-        _add_equality_penalty(bqm, x, row_indices, row_penalty)
-
-    # Column constraints: equality is equivalent to <= 1 because total queens = N
     col_penalty = penalties.get("col", 1.0)
-    for c in range(n):
-        col_indices = [coord_to_idx[(r + 1, c + 1)] for r in range(n)]
-        _add_equality_penalty(bqm, x, col_indices, col_penalty, target=1)
-
-    # Diagonal constraints: pairwise conflicts only (at most one)
     diag_penalty = penalties.get("diag", 1.0)
-    diagonals = _collect_diagonals(n)
-    for indices in diagonals:
-        _add_at_most_one_penalty(bqm, x, indices, diag_penalty)
 
+    # (sum - 1)^2 per row/column: -x_i per variable, 2 x_i x_j per pair, +1 offset.
+    # Every cell lies in exactly one row and one column.
+    linear = np.full(n * n, -(row_penalty + col_penalty), dtype=np.float64)
+    groups = (
+        (structure.row_pairs, 2 * row_penalty),
+        (structure.col_pairs, 2 * col_penalty),
+        # Diagonals: pairwise conflicts only (at most one)
+        (structure.diag_pairs, diag_penalty),
+    )
+    pairs = np.concatenate([group for group, _ in groups], axis=1)
+    weights = np.concatenate(
+        [np.full(group.shape[1], weight, dtype=np.float64) for group, weight in groups]
+    )
+    return SparseQubo(
+        num_variables=n * n,
+        linear=linear,
+        rows=pairs[0],
+        cols=pairs[1],
+        weights=weights,
+        offset=float(n * (row_penalty + col_penalty)),
+    )
+
+
+def build_qubo_matrix(n: int, penalties: PenaltyConfig) -> Tuple[SparseQubo, List[Tuple[int, int]]]:
+    """Create the sparse N-Queens QUBO without touching Amplify."""
+    idx_to_coord, _ = generate_mapping(n)
+    return assemble_qubo(build_qubo_structure(n), penalties), idx_to_coord
+
+
+def to_bqm(qubo: SparseQubo) -> Tuple[BinaryQuadraticModel, list]:
+    """Convert a :class:`SparseQubo` into an Amplify model and its variables."""
+    if gen_symbols is None:
+        raise ImportError("Amplify SDK is required to build a BinaryQuadraticModel")
+    x = gen_symbols(BinaryQuadraticModelBuilder, qubo.num_variables)
+    bqm = BinaryQuadraticModel()
+    for idx, bias in enumerate(qubo.linear.tolist()):
+        if bias:
+            bqm.add_bias(x[idx], bias)
+    for idx_i, idx_j, weight in zip(qubo.rows.tolist(), qubo.cols.tolist(), qubo.weights.tolist()):
+        bqm.add_quadratic(x[idx_i], x[idx_j], weight)
+    bqm.add_offset(qubo.offset)
+    return bqm, x
+
+
+def build_qubo(
+    n: int, penalties: PenaltyConfig
+) -> Tuple[BinaryQuadraticModel, List[Tuple[int, int]], list]:
+    """Create the N-Queens BinaryQuadraticModel with penalty scaling."""
+    qubo, idx_to_coord = build_qubo_matrix(n, penalties)
+    bqm, x = to_bqm(qubo)
     # Offset is not essential but kept for clarity
     bqm.normalize()
     return bqm, idx_to_coord, x
-
-
-def _add_equality_penalty(
-    bqm: BinaryQuadraticModel,
-    vars_builder,
-    indices: List[int],
-    penalty: float,
-    target: int = 1,
-) -> None:
-    """Add quadratic penalty (sum xi - target)^2 scaled by penalty."""
-    if not indices:
-        return
-    for idx in indices:
-        bqm.add_bias(vars_builder[idx], penalty * (1 - 2 * target))
-    for i, idx_i in enumerate(indices):
-        for idx_j in indices[i + 1 :]:
-            bqm.add_quadratic(vars_builder[idx_i], vars_builder[idx_j], 2 * penalty)
-    bqm.add_offset(penalty * target * target)
-
-
-def _add_at_most_one_penalty(
-    bqm: BinaryQuadraticModel,
-    vars_builder,
-    indices: List[int],
-    penalty: float,
-) -> None:
-    """Penalize any pair of active variables in the provided index set."""
-    for i, idx_i in enumerate(indices):
-        for idx_j in indices[i + 1 :]:
-            bqm.add_quadratic(vars_builder[idx_i], vars_builder[idx_j], penalty)
-
-
-def _collect_diagonals(n: int) -> List[List[int]]:
-    idx_to_coord, _ = generate_mapping(n)
-    diag_map: Dict[int, List[int]] = {}
-    anti_diag_map: Dict[int, List[int]] = {}
-    for idx, (r, c) in enumerate(idx_to_coord):
-        diag = r - c
-        anti = r + c
-        diag_map.setdefault(diag, []).append(idx)
-        anti_diag_map.setdefault(anti, []).append(idx)
-    return list(diag_map.values()) + list(anti_diag_map.values())
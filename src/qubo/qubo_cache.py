@@ -0,0 +1,146 @@
+"""Cache built N-Queens QUBO models across repeated solver calls.
+
+Level one is an in-memory LRU of assembled models keyed by ``(N, penalties)``.
+Level two is an on-disk ``.npz`` store of the penalty-independent pair
+structure per N, so a new penalty setting only rescales three term groups.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, List, Tuple
+
+import numpy as np
+
+from config import QUBO_CACHE_DIR, QUBO_CACHE_SIZE, QUBO_ENCODING
+from src.qubo.encodings import get_encoding
+from src.qubo.qubo_builders import (
+    PenaltyConfig,
+    QuboStructure,
+    SparseQubo,
+    assemble_qubo,
+    build_qubo_structure,
+    generate_mapping,
+    to_bqm,
+)
+from src.utils.logging_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Bump when the arrays stored per N change, so files of the old layout are not loaded
+STRUCTURE_FORMAT = 1
+
+
+def _penalty_key(penalties: PenaltyConfig) -> Tuple[Tuple[str, float], ...]:
+    return tuple(sorted((name, float(value)) for name, value in penalties.items()))
+
+
+class QuboCache:
+    """Two-level cache of QUBO structures and assembled models."""
+
+    def __init__(self, maxsize: int = QUBO_CACHE_SIZE, cache_dir: Path | None = QUBO_CACHE_DIR):
+        self.maxsize = maxsize
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Hashable):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def _put(self, key: Hashable, value) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _structure_path(self, n: int) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"structure_v{STRUCTURE_FORMAT}_n{n}.npz"
+
+    def structure(self, n: int) -> QuboStructure:
+        """Return the coupling structure for N, loading or persisting it on disk."""
+        key = ("structure", n)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        path = self._structure_path(n)
+        if path is not None and path.exists():
+            with np.load(path) as data:
+                structure = QuboStructure(
+                    n=n,
+                    row_pairs=data["row_pairs"],
+                    col_pairs=data["col_pairs"],
+                    diag_pairs=data["diag_pairs"],
+                )
+            logger.debug("Loaded QUBO structure for N=%d from %s", n, path)
+        else:
+            structure = build_qubo_structure(n)
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # A name of its own per writer, so concurrent builders never share a file
+                with tempfile.NamedTemporaryFile(
+                    dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+                ) as handle:
+                    try:
+                        np.savez(
+                            handle,
+                            row_pairs=structure.row_pairs,
+                            col_pairs=structure.col_pairs,
+                            diag_pairs=structure.diag_pairs,
+                        )
+                    except BaseException:
+                        os.unlink(handle.name)
+                        raise
+                os.replace(handle.name, path)
+                logger.debug("Stored QUBO structure for N=%d at %s", n, path)
+        self._put(key, structure)
+        return structure
+
+    def sparse(
+        self, n: int, penalties: PenaltyConfig, encoding: str = QUBO_ENCODING
+    ) -> Tuple[SparseQubo, List[Tuple[int, int]]]:
+        """Return the assembled sparse QUBO and the board index-to-coordinate mapping.
+
+        The mapping describes the board that ``encoding`` decodes onto, which is
+        the variable order only for the grid-style encodings.
+        """
+        key = ("sparse", n, _penalty_key(penalties), encoding)
+        cached = self._get(key)
+        if cached is None:
+            idx_to_coord, _ = generate_mapping(n)
+            if encoding == "grid":
+                qubo = assemble_qubo(self.structure(n), penalties)
+            else:
+                qubo = get_encoding(encoding).build(self.structure(n), penalties)
+            logger.debug(
+                "Built %s QUBO for N=%d: %d variables, %d couplings",
+                encoding, n, qubo.num_variables, qubo.num_couplings,
+            )
+            cached = (qubo, idx_to_coord)
+            self._put(key, cached)
+        return cached
+
+    def bqm(self, n: int, penalties: PenaltyConfig, encoding: str = QUBO_ENCODING):
+        """Return ``(bqm, idx_to_coord, variables)`` as produced by ``build_qubo``."""
+        key = ("bqm", n, _penalty_key(penalties), encoding)
+        cached = self._get(key)
+        if cached is None:
+            qubo, idx_to_coord = self.sparse(n, penalties, encoding)
+            bqm, variables = to_bqm(qubo)
+            bqm.normalize()
+            cached = (bqm, idx_to_coord, variables)
+            self._put(key, cached)
+        return cached
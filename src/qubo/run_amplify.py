@@ -2,29 +2,70 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Callable, Dict, Optional, Tuple
 
-from amplify import Solver
-from amplify.client import FixstarsClient
+import numpy as np
 
-from config import AMPLIFY_TOKEN_ENV, AMPLIFY_NUM_SAMPLES
-from src.qubo.qubo_builders import PenaltyConfig, build_qubo
-from src.validation.validate_solution import validate_solution
+try:
+    from amplify import Solver
+    from amplify.client import FixstarsClient
+except ImportError:  # the local backends run without the Amplify SDK
+    Solver = FixstarsClient = None
+
+from config import AMPLIFY_TOKEN_ENV, AMPLIFY_NUM_SAMPLES, QUBO_ENCODING
+from src.qubo.encodings import get_encoding
+from src.qubo.qubo_builders import PenaltyConfig
+from src.qubo.qubo_cache import QuboCache
+from src.validation.placement import Placement
+from src.validation.validate_solution import BatchValidation, validate_grid_batch
 from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PhaseTimer
 
 logger = setup_logging(__name__)
 
 
-class AmplifyTokenMissing(EnvironmentError):
+class AmplifyUnavailable(EnvironmentError):
+    """Raised when the Amplify backend cannot be used on this machine."""
+
+
+class AmplifyTokenMissing(AmplifyUnavailable):
     """Raised when the Amplify token is not available."""
 
 
+@dataclass
+class CandidateSet:
+    """All decoded candidates of one solve call with their validation outcome."""
+
+    n: int
+    energies: np.ndarray
+    states: np.ndarray
+    validation: BatchValidation
+
+    def __len__(self) -> int:
+        return int(self.energies.shape[0])
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.validation.valid
+
+    def positions(self, k: int) -> Placement:
+        return self.validation.positions_of(k)
+
+    def reason(self, k: int) -> str:
+        return self.validation.reason(k)
+
+    def details(self, k: int) -> Dict[str, object]:
+        return self.validation.details(k)
+
+
 @dataclass
 class AmplifyResult:
     energy: float
-    positions: List[Tuple[int, int]]
+    positions: Placement
     valid: bool
     runtime: float
     penalties: PenaltyConfig
@@ -33,39 +74,121 @@ class AmplifyResult:
     reason_summary: str
     status: str = "OK"
     message: Optional[str] = None
+    candidates: Optional[CandidateSet] = None
+    # Remote runs only: seconds queued at the service, solving, and the remainder
+    # of the round trip (upload, download, decoding of the reply)
+    queue_time: Optional[float] = None
+    execution_time: Optional[float] = None
+    transfer_time: Optional[float] = None
+    # Seconds per phase of the call (see src.utils.phase_timer)
+    phases: Dict[str, float] = field(default_factory=dict)
 
 
-class AmplifyRunner:
-    """Wrapper around the Amplify annealing workflow."""
+def fixstars_solver_factory(token_env: str = AMPLIFY_TOKEN_ENV) -> Callable[[], "Solver"]:
+    """Return a factory of Amplify solvers, each on its own configured ``FixstarsClient``."""
+    if Solver is None:
+        raise AmplifyUnavailable("Amplify SDK is not installed (pip install amplify).")
+    token = os.getenv(token_env)
+    if not token:
+        raise AmplifyTokenMissing(f"Amplify token not found in environment variable {token_env}.")
 
-    def __init__(self, token_env: str = AMPLIFY_TOKEN_ENV):
-        token = os.getenv(token_env)
-        if not token:
-            raise AmplifyTokenMissing(
-                f"Amplify token not found in environment variable {token_env}."
-            )
+    def make_solver() -> Solver:
         client = FixstarsClient()
         client.token = token
         client.parameters.outputs.duplicate = True
-        self.client = client
-        self.solver = Solver(client)
+        return Solver(client)
+
+    return make_solver
+
+
+def split_timing(solver, runtime: float) -> Tuple[Optional[float], ...]:
+    """``(queue, execution, transfer)`` seconds of the last ``solver.solve`` call.
+
+    The service reports queue and execution times in milliseconds on the client
+    result; whatever else the round trip took counts as transfer.
+    """
+    timing = getattr(getattr(solver, "client_result", None), "timing", None)
+    if timing is None:
+        return None, None, None
+    queue = getattr(timing, "queue_time", None)
+    execution = getattr(timing, "cpu_time", None)
+    if execution is None:
+        execution = getattr(solver, "execution_time", None)
+    queue = None if queue is None else queue / 1000.0
+    execution = None if execution is None else execution / 1000.0
+    transfer = max(0.0, runtime - (queue or 0.0) - (execution or 0.0))
+    return queue, execution, transfer
 
-    def solve(self, n: int, penalties: PenaltyConfig, timeout: float | None = None) -> AmplifyResult:
-        bqm, idx_to_coord, variables = build_qubo(n, penalties)
-        if timeout is not None:
-            self.client.parameters.timeout = int(timeout * 1000)
-        self.client.parameters.num_outputs = AMPLIFY_NUM_SAMPLES
+
+class AmplifyRunner:
+    """Wrapper around the Amplify annealing workflow.
+
+    ``solve`` may be called from several threads at once: each thread builds one
+    solver (and client) through ``solver_factory`` on first use and reuses it for
+    every later request, so the per-request parameters never race.
+    """
+
+    solver_name = "amplify_ae"
+
+    def __init__(
+        self,
+        token_env: str = AMPLIFY_TOKEN_ENV,
+        cache: QuboCache | None = None,
+        solver_factory: Optional[Callable[[], object]] = None,
+        encoding: str = QUBO_ENCODING,
+    ):
+        self.solver_factory = (
+            solver_factory if solver_factory is not None else fixstars_solver_factory(token_env)
+        )
+        self.cache = cache if cache is not None else QuboCache()
+        self.encoding = get_encoding(encoding)
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        self.solver = self._solver()
+        self.client = self.solver.client
+
+    def _solver(self):
+        solver = getattr(self._local, "solver", None)
+        if solver is None:
+            solver = self._local.solver = self.solver_factory()
+        return solver
+
+    def _model(self, solver, n: int, penalties: PenaltyConfig):
+        with self._cache_lock:
+            if getattr(solver, "model_format", "bqm") == "sparse":
+                qubo, idx_to_coord = self.cache.sparse(n, penalties, self.encoding.name)
+                return qubo, idx_to_coord, range(qubo.num_variables)
+            return self.cache.bqm(n, penalties, self.encoding.name)
+
+    def solve(
+        self,
+        n: int,
+        penalties: PenaltyConfig,
+        timeout: float | None = None,
+        return_candidates: bool = False,
+        phases: PhaseTimer | None = None,
+    ) -> AmplifyResult:
+        phases = phases if phases is not None else PhaseTimer(profile=None)
+        with phases.span("submit"):
+            solver = self._solver()
+        with phases.span("build"):
+            model, _, variables = self._model(solver, n, penalties)
+        with phases.span("submit"):
+            if timeout is not None:
+                solver.client.parameters.timeout = int(timeout * 1000)
+            solver.client.parameters.num_outputs = AMPLIFY_NUM_SAMPLES
 
         start = time.perf_counter()
         try:
-            result = self.solver.solve(bqm)
+            with phases.span("wait"):
+                result = solver.solve(model)
         except Exception as exc:  # Amplify exceptions are varied
             runtime = time.perf_counter() - start
             message = f"Amplify solver error: {exc}"
             logger.error(message)
             return AmplifyResult(
                 energy=float("inf"),
-                positions=[],
+                positions=Placement.empty(),
                 valid=False,
                 runtime=runtime,
                 penalties=penalties,
@@ -74,79 +197,97 @@ class AmplifyRunner:
                 reason_summary="format_error",
                 status="ERROR",
                 message=message,
+                phases=phases.seconds,
             )
 
         runtime = time.perf_counter() - start
-        num_candidates = len(result)
-        if num_candidates == 0:
-            logger.warning("Amplify returned no solutions")
-            return AmplifyResult(
-                energy=float("inf"),
-                positions=[],
-                valid=False,
-                runtime=runtime,
-                penalties=penalties,
-                num_candidates=0,
-                best_valid_found=False,
-                reason_summary="wrong_count",
-                status="NO_CANDIDATES",
-                message="No candidates returned",
-            )
-
-        best_energy = float("inf")
-        best_positions: List[Tuple[int, int]] = []
-        best_reason = "wrong_count"
-        best_valid_found = False
-        best_valid_energy = float("inf")
-        best_valid_positions: List[Tuple[int, int]] = []
-        best_valid_reason = "wrong_count"
-
-        for candidate in result:
-            energy = candidate.energy
-            values: Dict = candidate.values
-            positions: List[Tuple[int, int]] = []
-            for idx, coord in enumerate(idx_to_coord):
-                if values.get(variables[idx], 0) == 1:
-                    positions.append(coord)
-            validation = validate_solution(positions, n)
-
-            if energy < best_energy:
-                best_energy = energy
-                best_positions = positions
-                best_reason = str(validation.get("reason_summary", "wrong_count"))
-
-            if validation["valid"] and energy < best_valid_energy:
-                best_valid_found = True
-                best_valid_energy = energy
-                best_valid_positions = positions
-                best_valid_reason = str(validation.get("reason_summary", "ok"))
-
-        logger.info(
-            "Amplify returned %d candidates; best energy %.3f; any valid=%s",
-            num_candidates,
-            best_energy,
-            best_valid_found,
+        with phases.span("decode"):
+            num_vars = len(variables)
+            energies = np.empty(len(result), dtype=np.float64)
+            states = np.empty((len(result), num_vars), dtype=np.uint8)
+            for k, candidate in enumerate(result):
+                energies[k] = candidate.energy
+                states[k] = np.fromiter(
+                    map(candidate.values.get, variables, repeat(0)), dtype=np.uint8, count=num_vars
+                )
+            boards = self.encoding.to_grid(states, n)
+        outcome = summarize_candidates(
+            n,
+            penalties,
+            runtime,
+            energies,
+            boards,
+            "Amplify",
+            keep_candidates=return_candidates,
+            phases=phases,
+        )
+        outcome.queue_time, outcome.execution_time, outcome.transfer_time = split_timing(
+            solver, runtime
         )
+        return outcome
 
-        if best_valid_found:
-            return AmplifyResult(
-                energy=best_valid_energy,
-                positions=best_valid_positions,
-                valid=True,
-                runtime=runtime,
-                penalties=penalties,
-                num_candidates=num_candidates,
-                best_valid_found=True,
-                reason_summary=best_valid_reason,
-            )
 
+def summarize_candidates(
+    n: int,
+    penalties: PenaltyConfig,
+    runtime: float,
+    energies: np.ndarray,
+    states: np.ndarray,
+    source: str = "Solver",
+    keep_candidates: bool = False,
+    phases: PhaseTimer | None = None,
+) -> AmplifyResult:
+    """Pick the best valid candidate, falling back to the lowest energy overall.
+
+    ``states`` is a ``(K, N*N)`` 0/1 matrix of row-major boards aligned with
+    ``energies``; all candidates are validated together with array reductions.
+    Validation is timed into ``phases``, whose totals the result carries.
+    """
+    phases = phases if phases is not None else PhaseTimer(profile=None)
+    energies = np.asarray(energies, dtype=np.float64)
+    num_candidates = int(energies.shape[0])
+    if num_candidates == 0:
+        logger.warning("%s returned no solutions", source)
         return AmplifyResult(
-            energy=best_energy,
-            positions=best_positions,
+            energy=float("inf"),
+            positions=Placement.empty(),
             valid=False,
             runtime=runtime,
             penalties=penalties,
-            num_candidates=num_candidates,
+            num_candidates=0,
             best_valid_found=False,
-            reason_summary=best_reason,
+            reason_summary="wrong_count",
+            status="NO_CANDIDATES",
+            message="No candidates returned",
+            phases=phases.seconds,
         )
+
+    with phases.span("validate"):
+        validation = validate_grid_batch(states, n)
+    valid = validation.valid
+    candidates = CandidateSet(n=n, energies=energies, states=states, validation=validation)
+    best_valid_found = bool(valid.any())
+    # argmin keeps the first of equal energies, like a strict "<" scan would
+    ranked = np.where(valid, energies, np.inf) if best_valid_found else energies
+    best = int(np.argmin(ranked))
+
+    logger.info(
+        "%s returned %d candidates; best energy %.3f; any valid=%s",
+        source,
+        num_candidates,
+        float(energies.min()),
+        best_valid_found,
+    )
+
+    return AmplifyResult(
+        energy=float(energies[best]),
+        positions=candidates.positions(best),
+        valid=best_valid_found,
+        runtime=runtime,
+        penalties=penalties,
+        num_candidates=num_candidates,
+        best_valid_found=best_valid_found,
+        reason_summary=candidates.reason(best),
+        candidates=candidates if keep_candidates else None,
+        phases=phases.seconds,
+    )
@@ -0,0 +1,103 @@
+"""Wall-clock spans for the phases of one solver run.
+
+A :class:`PhaseTimer` accumulates seconds per phase from ``with
+timer.span(phase):`` blocks, or from durations measured elsewhere (``add``).
+Every run records the same phases, written to the raw CSVs as
+``<phase>_time_s``:
+
+* ``build``: constructing the model (QUBO assembly, MiniZinc flattening)
+* ``submit``: dispatching it until the solver starts (thread-pool queueing and
+  client setup for QUBO runs; process and cache overhead for MiniZinc runs)
+* ``wait``: the solver itself (the remote call, annealing, the solve process)
+* ``decode``: turning solver output into placements
+* ``validate``: checking those placements
+
+With ``profile="cprofile"`` the spans also run under one ``cProfile`` profiler
+that :meth:`PhaseTimer.dump` writes to a ``.prof`` file. With
+``profile="tracemalloc"`` the peak Python heap seen inside any span is kept as
+``traced_peak_mb``. Both hooks are process-wide, so profile serial runs only.
+"""
+from __future__ import annotations
+
+import cProfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from config import PHASE_PROFILE
+
+PHASES = ("build", "submit", "wait", "decode", "validate")
+PHASE_TIME_COLUMNS = [f"{phase}_time_s" for phase in PHASES]
+PHASE_COLUMNS = [*PHASE_TIME_COLUMNS, "traced_peak_mb"]
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+class PhaseTimer:
+    """Seconds per phase of one run, with optional profiling of the spans."""
+
+    def __init__(self, profile: Optional[str] = PHASE_PROFILE):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile} (choose from {PROFILE_MODES})")
+        self.profile = profile
+        self.seconds: Dict[str, float] = {}
+        self.traced_peak: Optional[int] = None
+        self._profiler = cProfile.Profile() if profile == "cprofile" else None
+        self._depth = 0
+        self._started_tracing = False
+
+    def add(self, phase: str, seconds: Optional[float]) -> None:
+        if seconds is not None:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def _enter_hooks(self) -> None:
+        if self._profiler is not None:
+            self._profiler.enable()
+        elif self.profile == "tracemalloc":
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+    def _exit_hooks(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        elif self.profile == "tracemalloc":
+            peak = tracemalloc.get_traced_memory()[1]
+            self.traced_peak = max(self.traced_peak or 0, peak)
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Time the block as ``phase``; nested spans are counted in both phases."""
+        outermost = self._depth == 0
+        self._depth += 1
+        if outermost:
+            self._enter_hooks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+            self._depth -= 1
+            if outermost:
+                self._exit_hooks()
+
+    def as_row(self) -> Dict[str, object]:
+        """CSV columns of :data:`PHASE_COLUMNS`; phases a run never entered stay blank."""
+        row: Dict[str, object] = {
+            f"{phase}_time_s": self.seconds.get(phase) for phase in PHASES
+        }
+        row["traced_peak_mb"] = None if self.traced_peak is None else self.traced_peak / 2**20
+        return row
+
+    def dump(self, path: Path) -> Optional[Path]:
+        """Write the cProfile statistics to ``path`` (no-op unless profiling with cProfile)."""
+        if self._profiler is None:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(path)
+        return path
@@ -0,0 +1,202 @@
+"""Typed, columnar copies of the raw result CSVs for analysis.
+
+Experiments keep streaming rows to CSV, which is append-only and resumable.
+:func:`load_table` reads a raw table with typed columns: categories for
+repeated strings, nullable booleans and integers, and floats for measurements.
+With pyarrow installed, the first load also writes the table as a Parquet
+dataset under ``RESULTS_STORE_DIR/<table>/``, partitioned by solver and N
+(``solver_name=.../N=.../part.parquet``). Later loads read that dataset instead
+of parsing the CSV, until the CSV changes. Without pyarrow the CSV is parsed,
+with the same types, every time.
+"""
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:  # analysis falls back to the raw CSVs
+    pyarrow = None
+
+from config import (
+    CP_RESULTS_CSV,
+    PORTFOLIO_RESULTS_CSV,
+    QUBO_RESULTS_CSV,
+    RESULTS_STORE_DIR,
+    RESULTS_STORE_ENABLED,
+)
+from src.minizinc.run_minizinc import USAGE_COLUMNS
+from src.utils.logging_utils import setup_logging
+from src.utils.phase_timer import PHASE_COLUMNS
+
+logger = setup_logging(__name__)
+
+# Written next to the partitions; pyarrow skips files starting with "_"
+_MANIFEST = "_source.json"
+
+_CP_DTYPES = {
+    "solver_name": "category",
+    "model_name": "category",
+    "run_id": "Int64",
+    "N": "int32",
+    "timeout_s": "float64",
+    "status": "category",
+    "runtime_s": "float64",
+    "flatten_time_s": "float64",
+    "solve_time_s": "float64",
+    "flatten_cached": "boolean",
+    **{column: "float64" for column in USAGE_COLUMNS},
+    "stat_nodes": "float64",
+    "stat_failures": "float64",
+    "stat_propagations": "float64",
+    "stat_flat_time": "float64",
+    "stat_solve_time": "float64",
+    "stat_peak_depth": "float64",
+    "is_valid": "boolean",
+    "reason_summary": "category",
+    "num_queens": "Int32",
+    **{column: "float64" for column in PHASE_COLUMNS},
+}
+_QUBO_DTYPES = {
+    "solver_name": "category",
+    "model_name": "category",
+    "run_id": "Int64",
+    "N": "int32",
+    "timeout_s": "float64",
+    "status": "category",
+    "runtime_s": "float64",
+    "is_valid": "boolean",
+    "reason_summary": "category",
+    "penalty_set_name": "category",
+    "penalty_values": "category",
+    "energy": "float64",
+    "num_candidates": "Int32",
+    "best_valid_found": "boolean",
+    "run_repeat": "Int32",
+    "encoding": "category",
+    "num_variables": "Int64",
+    "num_couplings": "Int64",
+    "queue_time_s": "float64",
+    "transfer_time_s": "float64",
+    "execution_time_s": "float64",
+    **{column: "float64" for column in PHASE_COLUMNS},
+}
+_PORTFOLIO_DTYPES = {
+    "N": "int32",
+    "timeout_s": "float64",
+    "status": "category",
+    "runtime_s": "float64",
+    "winner_model": "category",
+    "winner_solver": "category",
+    "winner_solve_time_s": "float64",
+    "num_entrants": "Int32",
+}
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """A raw results table: its CSV, column types and Parquet partition keys."""
+
+    name: str
+    csv_path: Path
+    dtypes: Dict[str, str]
+    partition_cols: Tuple[str, ...]
+
+
+TABLES: Dict[str, TableSpec] = {
+    spec.name: spec
+    for spec in (
+        TableSpec("cp", CP_RESULTS_CSV, _CP_DTYPES, ("solver_name", "N")),
+        TableSpec("qubo", QUBO_RESULTS_CSV, _QUBO_DTYPES, ("solver_name", "N")),
+        TableSpec("portfolio", PORTFOLIO_RESULTS_CSV, _PORTFOLIO_DTYPES, ("N",)),
+    )
+}
+
+
+def read_csv_typed(spec: TableSpec) -> pd.DataFrame:
+    """Parse the table's CSV with its declared column types and ISO timestamps."""
+    engine = "c" if pyarrow is None else "pyarrow"
+    df = pd.read_csv(spec.csv_path, dtype=spec.dtypes, engine=engine)
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+    return df
+
+
+def _apply_dtypes(df: pd.DataFrame, spec: TableSpec, columns) -> pd.DataFrame:
+    # Partition keys come back from Parquet as categories and are appended last
+    df = df[[column for column in columns if column in df]]
+    return df.astype({c: t for c, t in spec.dtypes.items() if c in df and df[c].dtype != t})
+
+
+def _source_stamp(path: Path) -> Dict[str, int]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_store(spec: TableSpec, df: pd.DataFrame, root: Path = RESULTS_STORE_DIR) -> Path:
+    """Replace the table's Parquet dataset with ``df``, partitioned by ``spec.partition_cols``."""
+    target = Path(root) / spec.name
+    staging = target.with_name(f"{spec.name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    partition_cols = [column for column in spec.partition_cols if column in df]
+    if partition_cols:
+        df.to_parquet(staging, partition_cols=partition_cols, index=False)
+    else:
+        df.to_parquet(staging / "part-0.parquet", index=False)
+    manifest = {**_source_stamp(spec.csv_path), "columns": list(df.columns)}
+    (staging / _MANIFEST).write_text(json.dumps(manifest))
+    shutil.rmtree(target, ignore_errors=True)
+    staging.rename(target)
+    return target
+
+
+def _read_store(spec: TableSpec, root: Path) -> pd.DataFrame | None:
+    """The stored dataset, or ``None`` if it is missing or older than the CSV."""
+    manifest_path = Path(root) / spec.name / _MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if {k: manifest.get(k) for k in ("size", "mtime_ns")} != _source_stamp(spec.csv_path):
+        return None
+    df = pd.read_parquet(manifest_path.parent)
+    return _apply_dtypes(df, spec, manifest["columns"])
+
+
+def load_table(
+    name: str, use_store: bool = RESULTS_STORE_ENABLED, root: Path = RESULTS_STORE_DIR
+) -> pd.DataFrame:
+    """Typed raw results of table ``name`` (``cp``, ``qubo`` or ``portfolio``).
+
+    Raises ``FileNotFoundError`` if the table's CSV does not exist.
+    """
+    spec = TABLES[name]
+    if not spec.csv_path.exists():
+        raise FileNotFoundError(f"No {name} results at {spec.csv_path}")
+    if not use_store or pyarrow is None:
+        return read_csv_typed(spec)
+    df = _read_store(spec, root)
+    if df is not None:
+        logger.debug("Loaded %d %s rows from the Parquet store", len(df), name)
+        return df
+    df = read_csv_typed(spec)
+    path = write_store(spec, df, root)
+    logger.info("Stored %d %s rows as Parquet under %s", len(df), name, path)
+    return df
+
+
+if __name__ == "__main__":
+    if pyarrow is None:
+        raise SystemExit("pyarrow is not installed; analysis reads the CSVs directly")
+    for table in TABLES:
+        try:
+            load_table(table, use_store=True)
+        except FileNotFoundError as exc:
+            logger.warning("%s", exc)
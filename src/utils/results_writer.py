@@ -0,0 +1,175 @@
+"""Append experiment rows to CSV as runs finish, with resume support."""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import RESULTS_FSYNC_EVERY
+from src.utils.logging_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+RowKey = Tuple[str, ...]
+
+
+def _drop_partial_line(path: Path) -> None:
+    """Truncate a trailing, half-written row left behind by a crash."""
+    with open(path, "rb+") as handle:
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        if size == 0:
+            return
+        tail_len = min(size, 1 << 16)
+        handle.seek(size - tail_len)
+        tail = handle.read(tail_len)
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        new_size = size - tail_len + cut + 1 if cut >= 0 else 0
+        handle.truncate(new_size)
+        logger.warning("Dropped %d bytes of an incomplete row from %s", size - new_size, path)
+
+
+def row_key(row: Dict[str, object], key_columns: Sequence[str]) -> RowKey:
+    """Key of a row as strings, matching what is read back from the CSV."""
+    return tuple(str(row[column]) for column in key_columns)
+
+
+def load_completed_keys(path: Path, key_columns: Sequence[str]) -> Set[RowKey]:
+    """Keys of rows already present in ``path`` (empty if it does not exist)."""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    _drop_partial_line(path)
+    with open(path, newline="") as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in key_columns if column not in (reader.fieldnames or [])]
+        if missing:
+            logger.warning("Cannot resume from %s: missing key columns %s", path, missing)
+            return set()
+        return {row_key(row, key_columns) for row in reader}
+
+
+def drop_rows(path: Path, match: Dict[str, object], fieldnames: Sequence[str]) -> bool:
+    """Remove the rows of ``path`` whose ``match`` columns all equal the given values.
+
+    Only done when the file's header is exactly ``fieldnames``; returns whether the
+    file was kept, so that the caller can append to it instead of replacing it.
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    _drop_partial_line(path)
+    wanted = {column: str(value) for column, value in match.items()}
+    with open(path, newline="") as handle:
+        reader = csv.DictReader(handle)
+        if reader.fieldnames != list(fieldnames):
+            return False
+        kept = [
+            row for row in reader
+            if any(row[column] != value for column, value in wanted.items())
+        ]
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(fieldnames))
+        writer.writeheader()
+        writer.writerows(kept)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+class StreamingCsvWriter:
+    """Write CSV rows incrementally, flushing and fsyncing in small batches.
+
+    Each batch is serialized first and appended with one ``write`` call, so a
+    crash loses at most the rows of the current batch. With ``resume=True`` an
+    existing file is appended to under its own header; otherwise it is replaced.
+
+    ``persist_time`` sums the seconds spent writing and fsyncing batches;
+    batches mix rows of unrelated runs, so it is logged once for the whole file
+    on :meth:`close` rather than attributed to rows.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: Sequence[str],
+        resume: bool = False,
+        fsync_every: int = RESULTS_FSYNC_EVERY,
+    ):
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.rows_written = 0
+        self.flushes = 0
+        self.persist_time = 0.0
+        self._pending: List[Dict[str, object]] = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        existing_header: Optional[List[str]] = None
+        if resume and self.path.exists() and self.path.stat().st_size > 0:
+            _drop_partial_line(self.path)
+            with open(self.path, newline="") as handle:
+                existing_header = next(csv.reader(handle), None)
+
+        if existing_header:
+            dropped = [name for name in fieldnames if name not in existing_header]
+            if dropped:
+                logger.warning(
+                    "Existing %s lacks columns %s; they will not be written", self.path, dropped
+                )
+            self.fieldnames = existing_header
+            self._handle = open(self.path, "a", newline="")
+        else:
+            self.fieldnames = list(fieldnames)
+            self._handle = open(self.path, "w", newline="")
+            self._write_chunk(self._format([], header=True))
+
+    def _format(self, rows: Iterable[Dict[str, object]], header: bool = False) -> str:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, extrasaction="ignore")
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    def _write_chunk(self, chunk: str) -> None:
+        start = time.perf_counter()
+        self._handle.write(chunk)
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.persist_time += time.perf_counter() - start
+        self.flushes += 1
+
+    def write(self, row: Dict[str, object]) -> None:
+        self._pending.append(row)
+        if len(self._pending) >= self.fsync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self._write_chunk(self._format(self._pending))
+        self.rows_written += len(self._pending)
+        self._pending = []
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self.flush()
+        self._handle.close()
+        logger.info(
+            "Wrote %d rows to %s in %d fsynced writes taking %.3fs",
+            self.rows_written, self.path, self.flushes, self.persist_time,
+        )
+
+    def __enter__(self) -> "StreamingCsvWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
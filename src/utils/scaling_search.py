@@ -0,0 +1,155 @@
+"""Find the largest N a solver still handles, within a wall-clock budget.
+
+The search first grows N geometrically from ``SCALING_START_N`` by
+``SCALING_GROWTH`` until some N fails. It then bisects between the last N that
+passed and the first that failed, until they are within ``SCALING_RESOLUTION``
+of each other. An N passes when at least ``SCALING_MIN_SUCCESS_RATE`` of its
+runs return a valid placement; a timeout counts as a failed run. A probe stops
+as soon as its outcome is decided, and is only started if all of its runs fit
+in the remaining budget even when each takes as long as the worst case: the
+given run cost, or the slowest run so far if that took longer (model
+construction is not covered by solver timeouts).
+
+Bisection assumes success is monotone in N. Stochastic solvers only roughly
+satisfy that, so give them several runs per N.
+"""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from config import (
+    SCALING_GROWTH,
+    SCALING_MAX_N,
+    SCALING_MIN_SUCCESS_RATE,
+    SCALING_RESOLUTION,
+    SCALING_START_N,
+)
+from src.utils.logging_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+@dataclass
+class ScalingRun:
+    """Outcome of one solver run at one N."""
+
+    valid: bool
+    status: str
+    runtime: float
+
+
+@dataclass
+class Probe:
+    """All runs at one N."""
+
+    n: int
+    phase: str  # "grow" or "bisect"
+    runs: int = 0
+    successes: int = 0
+    timeouts: int = 0
+    wall_time: float = 0.0
+    passed: bool = False
+
+
+@dataclass
+class ScalingResult:
+    """Where the search located the boundary and what it cost."""
+
+    largest_passed: Optional[int]
+    smallest_failed: Optional[int]
+    probes: List[Probe] = field(default_factory=list)
+    wall_time: float = 0.0
+    stop_reason: str = "converged"  # or "budget" / "max_n"
+
+    @property
+    def runs(self) -> int:
+        return sum(probe.runs for probe in self.probes)
+
+
+def find_scaling_limit(
+    run: Callable[[int], ScalingRun],
+    budget_s: float,
+    run_cost_s: float,
+    runs_per_n: int = 1,
+    min_success_rate: float = SCALING_MIN_SUCCESS_RATE,
+    start_n: int = SCALING_START_N,
+    growth: float = SCALING_GROWTH,
+    resolution: float = SCALING_RESOLUTION,
+    max_n: int = SCALING_MAX_N,
+    on_run: Optional[Callable[[Probe, int, ScalingRun], None]] = None,
+) -> ScalingResult:
+    """Search the N boundary of ``run(n)``, spending at most ``budget_s`` seconds.
+
+    ``run_cost_s`` is the expected worst case of one run (its timeout plus overhead).
+    ``on_run`` receives the probe, the repeat index and the outcome of every run.
+    """
+    if growth <= 1.0:
+        raise ValueError("growth must be greater than 1")
+    start = time.perf_counter()
+    deadline = start + budget_s
+    needed = math.ceil(min_success_rate * runs_per_n)
+    result = ScalingResult(largest_passed=None, smallest_failed=None)
+    slowest = 0.0
+
+    def probe(n: int, phase: str) -> Optional[Probe]:
+        nonlocal slowest
+        if time.perf_counter() + runs_per_n * max(run_cost_s, slowest) > deadline:
+            result.stop_reason = "budget"
+            return None
+        current = Probe(n, phase)
+        probe_start = time.perf_counter()
+        for repeat in range(runs_per_n):
+            run_start = time.perf_counter()
+            outcome = run(n)
+            slowest = max(slowest, time.perf_counter() - run_start)
+            current.runs += 1
+            current.successes += int(outcome.valid)
+            current.timeouts += int(outcome.status == "TIMEOUT")
+            if on_run is not None:
+                on_run(current, repeat, outcome)
+            failures = current.runs - current.successes
+            # Stop once the remaining runs can no longer change the verdict
+            if current.successes >= needed or failures > runs_per_n - needed:
+                break
+        current.wall_time = time.perf_counter() - probe_start
+        current.passed = current.successes >= needed
+        result.probes.append(current)
+        logger.info(
+            "%s N=%d: %d/%d valid, %d timeouts in %.2fs -> %s",
+            phase, n, current.successes, current.runs, current.timeouts, current.wall_time,
+            "pass" if current.passed else "fail",
+        )
+        return current
+
+    n = start_n
+    while True:
+        current = probe(n, "grow")
+        if current is None:
+            break
+        if not current.passed:
+            result.smallest_failed = n
+            break
+        result.largest_passed = n
+        if n >= max_n:
+            result.stop_reason = "max_n"
+            break
+        n = min(max_n, max(n + 1, round(n * growth)))
+
+    if result.largest_passed is not None and result.smallest_failed is not None:
+        low, high = result.largest_passed, result.smallest_failed
+        while high - low > max(1, int(low * resolution)):
+            mid = (low + high) // 2
+            current = probe(mid, "bisect")
+            if current is None:
+                break
+            if current.passed:
+                low = mid
+            else:
+                high = mid
+        result.largest_passed, result.smallest_failed = low, high
+
+    result.wall_time = time.perf_counter() - start
+    return result
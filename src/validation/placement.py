@@ -0,0 +1,153 @@
+"""Compact queen placements.
+
+A :class:`Placement` stores one column per row in a ``uint16`` array (``uint32``
+once N exceeds 65535), 2-4 bytes per queen instead of a Python tuple each.
+Placements that do not fit that form (two queens in a row, coordinates off the
+board) keep their ``(row, col)`` pairs in a compact ``(Q, 2)`` array instead, so
+every decoded answer, valid or not, has the same type.
+
+Arrays of the right dtype are wrapped without copying, and the list-of-tuples
+form is only built when :meth:`Placement.to_list` (or iteration) asks for it.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Position = Tuple[int, int]
+
+
+def placement_dtype(n: int) -> np.dtype:
+    """Smallest unsigned dtype holding the 1-based columns of an ``n``-board."""
+    return np.dtype(np.uint16) if n <= np.iinfo(np.uint16).max else np.dtype(np.uint32)
+
+
+class Placement:
+    """Queens of one board as ``columns[r]`` = 1-based column in row ``r + 1`` (0 = empty).
+
+    Iterating yields ``(row, col)`` tuples in row order and ``len()`` is the number
+    of queens, so code written for ``List[Tuple[int, int]]`` keeps working.
+    """
+
+    __slots__ = ("_columns", "_coords")
+
+    def __init__(self, columns: Optional[np.ndarray] = None, coords: Optional[np.ndarray] = None):
+        if (columns is None) == (coords is None):
+            raise ValueError("Pass exactly one of columns or coords")
+        if columns is not None:
+            columns = np.asarray(columns)
+            if columns.ndim != 1:
+                raise ValueError(f"Expected a 1-D column array, got shape {columns.shape}")
+            dtype = placement_dtype(max(len(columns), int(columns.max(initial=0))))
+            self._columns = columns if columns.dtype == dtype else columns.astype(dtype)
+            self._coords = None
+        else:
+            coords = np.asarray(coords).reshape(-1, 2)
+            dtype = placement_dtype(int(coords.max(initial=0)))
+            if coords.min(initial=0) < 0:
+                dtype = np.dtype(np.int64)
+            self._coords = coords if coords.dtype == dtype else coords.astype(dtype)
+            self._columns = None
+
+    @classmethod
+    def empty(cls) -> "Placement":
+        return cls(columns=np.zeros(0, dtype=np.uint16))
+
+    @classmethod
+    def from_positions(
+        cls, positions: Union["Placement", Iterable[Position], np.ndarray], n: Optional[int] = None
+    ) -> "Placement":
+        """Build from ``(row, col)`` pairs; the row form is used whenever it can hold them."""
+        if isinstance(positions, Placement):
+            return positions
+        coords = np.asarray(list(positions) if not isinstance(positions, np.ndarray) else positions)
+        return cls.from_coords(coords.reshape(-1, 2), n)
+
+    @classmethod
+    def from_coords(cls, coords: np.ndarray, n: Optional[int] = None) -> "Placement":
+        """Build from a ``(Q, 2)`` array of 1-based ``(row, col)`` pairs."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        rows, cols = coords[:, 0], coords[:, 1]
+        size = int(n if n is not None else max(rows.max(initial=0), cols.max(initial=0)))
+        fits = bool(((rows >= 1) & (rows <= size) & (cols >= 1) & (cols <= size)).all())
+        if fits and np.unique(rows).size == rows.size:
+            columns = np.zeros(size, dtype=placement_dtype(size))
+            columns[rows - 1] = cols
+            return cls(columns=columns)
+        return cls(coords=coords)
+
+    @classmethod
+    def from_grid(cls, grid: np.ndarray, n: Optional[int] = None) -> "Placement":
+        """Build from an ``N x N`` (or flat, row-major) 0/1 board."""
+        grid = np.asarray(grid)
+        if n is not None:
+            grid = grid.reshape(n, n)
+        per_row = np.count_nonzero(grid, axis=1)
+        if (per_row <= 1).all():
+            columns = np.where(per_row > 0, np.argmax(grid != 0, axis=1) + 1, 0)
+            return cls(columns=columns)
+        rows, cols = np.nonzero(grid)
+        return cls(coords=np.stack((rows + 1, cols + 1), axis=1))
+
+    @classmethod
+    def from_buffer(cls, buffer, n: int) -> "Placement":
+        """Wrap a buffer of ``n`` columns in :func:`placement_dtype` order without copying."""
+        return cls(columns=np.frombuffer(buffer, dtype=placement_dtype(n), count=n))
+
+    @property
+    def is_row_form(self) -> bool:
+        return self._columns is not None
+
+    @property
+    def columns(self) -> np.ndarray:
+        """The per-row column array (a view); raises if the placement has no row form."""
+        if self._columns is None:
+            raise ValueError("Placement has rows with several queens; use coords()")
+        return self._columns
+
+    @property
+    def nbytes(self) -> int:
+        return int((self._columns if self._columns is not None else self._coords).nbytes)
+
+    def as_array(self) -> np.ndarray:
+        """``(N,)`` columns or ``(Q, 2)`` coordinates, as accepted by ``validate_many``."""
+        return self._columns if self._columns is not None else self._coords
+
+    def coords(self) -> np.ndarray:
+        """1-based ``(row, col)`` pairs as a ``(Q, 2)`` array."""
+        if self._coords is not None:
+            return self._coords
+        rows = np.flatnonzero(self._columns)
+        return np.stack((rows + 1, self._columns[rows]), axis=1).astype(self._columns.dtype)
+
+    def to_list(self) -> List[Position]:
+        return [tuple(pair) for pair in self.coords().tolist()]
+
+    def __len__(self) -> int:
+        if self._columns is not None:
+            return int(np.count_nonzero(self._columns))
+        return int(self._coords.shape[0])
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(self.to_list())
+
+    def __getitem__(self, k: int) -> Position:
+        row, col = self.coords()[k].tolist()
+        return row, col
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Placement):
+            if self.is_row_form and other.is_row_form:
+                return np.array_equal(self._columns, other._columns)
+            return np.array_equal(self.coords(), other.coords())
+        if isinstance(other, Sequence):
+            return self.to_list() == [tuple(pair) for pair in other]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        form = "rows" if self.is_row_form else "coords"
+        dtype = self.as_array().dtype
+        return f"Placement(queens={len(self)}, form={form}, dtype={dtype})"
@@ -2,16 +2,27 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Dict, Iterable, List, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.validation.placement import Placement
 
 
 class ValidationError(Exception):
     """Raised when a validation precondition fails."""
 
 
+# Reason summaries as compact codes; index = code, ordered by reporting priority
+REASON_CODES = ("ok", "wrong_count", "format_error", "row_conflict", "col_conflict", "diag_conflict")
+VALIDATION_DTYPE = np.dtype([("valid", np.bool_), ("reason", np.uint8)])
+
+# Queens processed per vectorized step in the batch validators
+_CHUNK_QUEENS = 1 << 20
 
-def _has_duplicates(values: Iterable[int]) -> bool:
-    counter = Counter(values)
+
+def _has_duplicates(counter: Counter) -> bool:
     return any(count > 1 for count in counter.values())
 
 
@@ -31,22 +42,49 @@ def _summary_from_flags(
     return "ok"
 
 
-def validate_solution(positions: List[Tuple[int, int]], n: int) -> Dict[str, object]:
-    """Check board bounds, conflicts, and produce a concise summary."""
+def _counter_of(values: np.ndarray) -> Counter:
+    keys, counts = np.unique(values, return_counts=True)
+    return Counter(dict(zip(keys.tolist(), counts.tolist())))
+
+
+def _placement_keys(placement: Placement) -> Tuple[Counter, Counter, Counter, Counter]:
+    coords = placement.coords().astype(np.int64)
+    rows, cols = coords[:, 0], coords[:, 1]
+    return (
+        _counter_of(rows),
+        _counter_of(cols),
+        _counter_of(rows + cols),
+        _counter_of(rows - cols),
+    )
+
+
+def validate_solution(
+    positions: Union[Placement, List[Tuple[int, int]]], n: int
+) -> Dict[str, object]:
+    """Check board bounds, conflicts, and produce a concise summary.
+
+    A :class:`Placement` is checked with array operations instead of per-queen lists.
+    """
     if n <= 0:
         raise ValidationError("Board size must be positive")
 
     violations: List[str] = []
-    rows = [r for r, _ in positions]
-    cols = [c for _, c in positions]
-    diag1 = [r + c for r, c in positions]
-    diag2 = [r - c for r, c in positions]
+    if isinstance(positions, Placement):
+        rows, cols, diag1, diag2 = _placement_keys(positions)
+        coords = positions.coords()
+        out_of_bounds = bool(((coords < 1) | (coords > n)).any())
+    else:
+        rows = Counter(r for r, _ in positions)
+        cols = Counter(c for _, c in positions)
+        diag1 = Counter(r + c for r, c in positions)
+        diag2 = Counter(r - c for r, c in positions)
+        out_of_bounds = any(r < 1 or r > n or c < 1 or c > n for r, c in positions)
 
     wrong_count = len(positions) != n
-    out_of_bounds = any(r < 1 or r > n or c < 1 or c > n for r, c in positions)
     row_dup = _has_duplicates(rows)
     col_dup = _has_duplicates(cols)
-    diag_dup = _has_duplicates(diag1) or _has_duplicates(diag2)
+    diag1_dup, diag2_dup = _has_duplicates(diag1), _has_duplicates(diag2)
+    diag_dup = diag1_dup or diag2_dup
 
     if wrong_count:
         violations.append(f"Expected {n} queens, found {len(positions)}")
@@ -58,9 +96,9 @@ def validate_solution(positions: List[Tuple[int, int]], n: int) -> Dict[str, obj
         violations.append("Row conflict detected")
     if col_dup:
         violations.append("Column conflict detected")
-    if _has_duplicates(diag1):
+    if diag1_dup:
         violations.append("Positive diagonal conflict detected")
-    if _has_duplicates(diag2):
+    if diag2_dup:
         violations.append("Negative diagonal conflict detected")
 
     valid = len(violations) == 0
@@ -68,11 +106,195 @@ def validate_solution(positions: List[Tuple[int, int]], n: int) -> Dict[str, obj
     return {
         "valid": valid,
         "violations": violations,
-        "counts": {
-            "rows": Counter(rows),
-            "cols": Counter(cols),
-            "diag1": Counter(diag1),
-            "diag2": Counter(diag2),
-        },
+        "counts": {"rows": rows, "cols": cols, "diag1": diag1, "diag2": diag2},
         "reason_summary": reason_summary,
     }
+
+
+class _ConflictCounter:
+    """Distinct row/column/diagonal keys per candidate for a block of candidates.
+
+    Keys are scattered into boolean tables (one byte per key), so a candidate has
+    a conflict exactly when it has fewer distinct keys than placed queens. Queens
+    may be added in several slices, which bounds memory for very large N.
+    """
+
+    def __init__(self, num_candidates: int, n: int):
+        self.num_candidates = num_candidates
+        self.n = n
+        self.sizes = {"row": n, "col": n, "diag1": 2 * n - 1, "diag2": 2 * n - 1}
+        self.seen = {
+            name: np.zeros(num_candidates * size, dtype=bool) for name, size in self.sizes.items()
+        }
+        self.placed = np.zeros(num_candidates, dtype=np.int64)
+        self.out_of_bounds = np.zeros(num_candidates, dtype=bool)
+
+    def add(self, owner: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> None:
+        """Record queens given as flat ``(owner, row, col)`` triples with 1-based coordinates."""
+        n = self.n
+        in_bounds = (rows >= 1) & (rows <= n) & (cols >= 1) & (cols <= n)
+        self.out_of_bounds[owner[~in_bounds]] = True
+        owner = owner[in_bounds].astype(np.int64)
+        rows = rows[in_bounds].astype(np.int64) - 1
+        cols = cols[in_bounds].astype(np.int64) - 1
+        self.placed += np.bincount(owner, minlength=self.num_candidates)
+        self.seen["row"][owner * n + rows] = True
+        self.seen["col"][owner * n + cols] = True
+        self.seen["diag1"][owner * (2 * n - 1) + rows + cols] = True
+        self.seen["diag2"][owner * (2 * n - 1) + rows - cols + n - 1] = True
+
+    def _duplicates(self, name: str) -> np.ndarray:
+        distinct = self.seen[name].reshape(self.num_candidates, self.sizes[name]).sum(axis=1)
+        return distinct < self.placed
+
+    def reason_codes(self, queen_counts: np.ndarray) -> np.ndarray:
+        # Assign from lowest to highest priority so the first failing check wins
+        codes = np.zeros(self.num_candidates, dtype=np.uint8)
+        diag_dup = self._duplicates("diag1") | self._duplicates("diag2")
+        codes[diag_dup] = REASON_CODES.index("diag_conflict")
+        codes[self._duplicates("col")] = REASON_CODES.index("col_conflict")
+        codes[self._duplicates("row")] = REASON_CODES.index("row_conflict")
+        codes[self.out_of_bounds] = REASON_CODES.index("format_error")
+        codes[queen_counts != self.n] = REASON_CODES.index("wrong_count")
+        return codes
+
+
+@dataclass
+class BatchValidation:
+    """Compact validation outcome for many placements.
+
+    ``records`` is a structured array with ``valid`` and ``reason`` (an index
+    into :data:`REASON_CODES`). The full ``validate_solution`` detail, with its
+    Counters and violation strings, is built only for rows asked for.
+    """
+
+    n: int
+    records: np.ndarray
+    positions_of: Callable[[int], Placement]
+    _details: Dict[int, Dict[str, object]] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return int(self.records.shape[0])
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.records["valid"]
+
+    @property
+    def reasons(self) -> np.ndarray:
+        return self.records["reason"]
+
+    def reason(self, k: int) -> str:
+        return REASON_CODES[self.records["reason"][k]]
+
+    def details(self, k: int) -> Dict[str, object]:
+        if k not in self._details:
+            self._details[k] = validate_solution(self.positions_of(k), self.n)
+        return self._details[k]
+
+
+def _records_from_codes(codes: np.ndarray) -> np.ndarray:
+    records = np.empty(codes.shape[0], dtype=VALIDATION_DTYPE)
+    records["valid"] = codes == 0
+    records["reason"] = codes
+    return records
+
+
+def _stack_placements(placements: Sequence[Placement]) -> np.ndarray:
+    arrays = [placement.as_array() for placement in placements]
+    if len({array.shape for array in arrays}) > 1:
+        # Mixed forms or queen counts: pad to a common (K, Q, 2) coordinate array
+        coords = [placement.coords().astype(np.int64) for placement in placements]
+        padded = np.zeros((len(coords), max(len(c) for c in coords), 2), dtype=np.int64)
+        for k, pairs in enumerate(coords):
+            padded[k, : len(pairs)] = pairs
+        return padded
+    return np.stack(arrays)
+
+
+def validate_many(placements, n: int, chunk_queens: int = _CHUNK_QUEENS) -> BatchValidation:
+    """Validate many placements of the same board size at once.
+
+    ``placements`` is either a ``(K, N)`` permutation array, where entry ``i`` is
+    the 1-based column of the queen in row ``i + 1``, a ``(K, Q, 2)`` array of
+    1-based ``(row, col)`` coordinates, or one or more :class:`Placement` objects
+    (a single one is validated in place, without copying). Small boards are
+    validated many rows per step; a single very large board is consumed in
+    slices of ``chunk_queens``. In a :class:`Placement` a zero column marks an
+    empty row; in a raw permutation array it is out of bounds (``format_error``).
+    """
+    if n <= 0:
+        raise ValidationError("Board size must be positive")
+    originals: Optional[Sequence[Placement]] = None
+    if isinstance(placements, Placement):
+        placements = [placements]
+    if isinstance(placements, (list, tuple)) and placements and all(
+        isinstance(placement, Placement) for placement in placements
+    ):
+        originals = placements
+        if len(placements) == 1:
+            placements = placements[0].as_array()[np.newaxis]
+        else:
+            placements = _stack_placements(placements)
+    data = np.asarray(placements)
+    if data.ndim == 2:
+        is_permutation = True
+    elif data.ndim == 3 and data.shape[2] == 2:
+        is_permutation = False
+    else:
+        raise ValidationError(f"Expected a (K, N) or (K, Q, 2) array, got shape {data.shape}")
+
+    num_candidates, num_queens = data.shape[0], data.shape[1]
+    codes = np.empty(num_candidates, dtype=np.uint8)
+    # Only Placement columns use 0 for an empty row
+    skip_empty_rows = is_permutation and originals is not None
+    if skip_empty_rows:
+        queen_counts = np.count_nonzero(data, axis=1)
+    elif originals is not None:
+        queen_counts = np.array([len(placement) for placement in originals])
+    else:
+        queen_counts = np.full(num_candidates, num_queens)
+    rows_per_block = max(1, chunk_queens // max(num_queens, 1))
+    slice_len = max(1, min(num_queens, chunk_queens))
+    for start in range(0, num_candidates, rows_per_block):
+        block = data[start : start + rows_per_block]
+        block_counts = queen_counts[start : start + block.shape[0]]
+        counter = _ConflictCounter(block.shape[0], n)
+        for lo in range(0, max(num_queens, 1), slice_len):
+            part = block[:, lo : lo + slice_len]
+            owner = np.repeat(np.arange(block.shape[0]), part.shape[1])
+            if is_permutation:
+                rows = np.tile(np.arange(lo + 1, lo + part.shape[1] + 1), block.shape[0])
+                cols = part.ravel()
+                keep = cols != 0 if skip_empty_rows else np.ones(cols.shape, dtype=bool)
+            else:
+                rows, cols = part[..., 0].ravel(), part[..., 1].ravel()
+                # Padding past a placement's own queens when shorter ones were stacked
+                keep = (np.arange(lo, lo + part.shape[1]) < block_counts[:, np.newaxis]).ravel()
+            counter.add(owner[keep], rows[keep], cols[keep])
+        codes[start : start + block.shape[0]] = counter.reason_codes(block_counts)
+
+    def positions_of(k: int) -> Placement:
+        if originals is not None:
+            return originals[k]
+        if is_permutation:
+            return Placement(columns=data[k])
+        return Placement.from_coords(data[k], n)
+
+    return BatchValidation(n=n, records=_records_from_codes(codes), positions_of=positions_of)
+
+
+def validate_grid_batch(states: np.ndarray, n: int) -> BatchValidation:
+    """Validate a ``(K, N*N)`` 0/1 matrix of row-major boards in one pass."""
+    if n <= 0:
+        raise ValidationError("Board size must be positive")
+    states = np.asarray(states).reshape(-1, n * n)
+    owner, cells = np.nonzero(states)
+    counter = _ConflictCounter(states.shape[0], n)
+    counter.add(owner, cells // n + 1, cells % n + 1)
+    codes = counter.reason_codes(np.count_nonzero(states, axis=1))
+
+    def positions_of(k: int) -> Placement:
+        return Placement.from_grid(states[k], n)
+
+    return BatchValidation(n=n, records=_records_from_codes(codes), positions_of=positions_of)